@@ -0,0 +1,80 @@
+"""
+Benchmark de la compression des réponses : CPU consommé vs octets économisés.
+
+    python -m benchmarks.compression --pages 10 100 1000
+
+Sérialise de vraies pages de IssueListSerializer (base peuplée par
+generate_data) puis compresse chaque page avec chaque encodage disponible
+(gzip, brotli, zstd) à plusieurs niveaux.
+"""
+
+import argparse
+import os
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+    import django
+
+    django.setup()
+
+    from django.db.models import Count
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    from core.compression import Brotli, Gzip, Zstd, brotli, zstandard
+    from issues.serializers import IssueListSerializer
+    from issues.views import IssueViewSet
+    from projects.models import Project
+
+    project = (
+        Project.objects.alive()
+        .annotate(total=Count("issues"))
+        .order_by("-total")
+        .first()
+    )
+    if project is None:
+        raise SystemExit("Base vide : lancez d'abord python manage.py generate_data.")
+
+    codecs = [Gzip(1), Gzip(6), Gzip(9)]
+    if brotli is not None:
+        codecs += [Brotli(4), Brotli(11)]
+    if zstandard is not None:
+        codecs += [Zstd(3), Zstd(19)]
+
+    # get_queryset() filtre selon l'utilisateur : l'auteur du projet lit tout
+    url = f"/api/projects/{project.pk}/issues/"
+    request = Request(APIRequestFactory().get(url))
+    request.user = project.author
+    view = IssueViewSet(
+        action="list", kwargs={"project_pk": project.pk}, request=request
+    )
+    print(f"{'page':>6}{'encodage':>10}{'octets':>11}{'ratio':>8}{'ms':>9}{'Mo/s':>8}")
+    for size in args.pages:
+        issues = list(view.get_queryset()[:size])
+        body = JSONRenderer().render(IssueListSerializer(issues, many=True).data)
+        print(f"{len(issues):>6}{'aucun':>10}{len(body):>11}{1:>8.2f}{0:>9.3f}{'':>8}")
+        for codec in codecs:
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                compressed = codec.compress(body)
+            elapsed = (time.perf_counter() - start) / args.repeat
+            label = (
+                f"{codec.name}-{getattr(codec, 'level', getattr(codec, 'quality', ''))}"
+            )
+            print(
+                f"{len(issues):>6}{label:>10}{len(compressed):>11}"
+                f"{len(body) / len(compressed):>8.2f}{elapsed * 1000:>9.3f}"
+                f"{len(body) / elapsed / 1e6:>8.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Benchmark lecture/écriture concurrente sur SQLite : profil par défaut vs production.
+
+    python -m benchmarks.sqlite_concurrency --readers 8 --writers 2 --duration 5
+
+Simule le trafic de l'API sans passer par Django :
+- lecteurs : liste paginée des problèmes d'un projet + comptage
+- écrivains : lecture puis insertion dans la même transaction (comme un
+  perform_create qui vérifie des contraintes avant d'écrire)
+
+Profil « default » : journal rollback, transactions différées, une nouvelle
+connexion par requête (CONN_MAX_AGE=0). Profil « production » : les pragmas
+de core/settings.py, BEGIN IMMEDIATE et une connexion persistante par thread.
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+from core.settings import SQLITE_PRODUCTION_PRAGMAS
+
+PROJECTS = 50
+
+
+def _create_database(path, rows):
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        """
+        CREATE TABLE issue (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            project_id INTEGER NOT NULL,
+            title VARCHAR(255) NOT NULL,
+            description TEXT NOT NULL,
+            created_time REAL NOT NULL
+        );
+        CREATE INDEX issue_project ON issue (project_id, id);
+        """
+    )
+    conn.executemany(
+        "INSERT INTO issue (project_id, title, description, created_time) VALUES (?, ?, ?, ?)",
+        (
+            (random.randrange(PROJECTS), f"Issue {i}", "x" * 200, time.time())
+            for i in range(rows)
+        ),
+    )
+    conn.commit()
+    conn.close()
+
+
+class Profile:
+    """Manière d'ouvrir les connexions et de démarrer les transactions."""
+
+    def __init__(self, name, path, persistent, pragmas, begin, timeout):
+        self.name = name
+        self.path = path
+        self.persistent = persistent
+        self.pragmas = pragmas
+        self.begin = begin
+        self.timeout = timeout
+        self.local = threading.local()
+
+    def connect(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            for pragma in self.pragmas:
+                conn.execute(pragma)
+            if self.persistent:
+                self.local.conn = conn
+        return conn
+
+    def release(self, conn):
+        if not self.persistent:
+            conn.close()
+
+
+def _read(conn):
+    project_id = random.randrange(PROJECTS)
+    conn.execute(
+        "SELECT id, title, description FROM issue WHERE project_id = ? ORDER BY id DESC LIMIT 10",
+        (project_id,),
+    ).fetchall()
+    conn.execute("SELECT COUNT(*) FROM issue WHERE project_id = ?", (project_id,)).fetchone()
+
+
+def _write(conn, begin):
+    project_id = random.randrange(PROJECTS)
+    conn.execute(begin)
+    try:
+        conn.execute("SELECT COUNT(*) FROM issue WHERE project_id = ?", (project_id,)).fetchone()
+        conn.execute(
+            "INSERT INTO issue (project_id, title, description, created_time) VALUES (?, ?, ?, ?)",
+            (project_id, "New issue", "y" * 200, time.time()),
+        )
+        conn.execute("COMMIT")
+    except sqlite3.OperationalError:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _worker(profile, role, deadline, results):
+    latencies = []
+    errors = 0
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        conn = profile.connect()
+        try:
+            if role == "read":
+                _read(conn)
+            else:
+                _write(conn, profile.begin)
+        except sqlite3.OperationalError:
+            # "database is locked"
+            errors += 1
+        else:
+            latencies.append(time.perf_counter() - start)
+        finally:
+            profile.release(conn)
+    results.append((role, latencies, errors))
+
+
+def run_profile(profile, readers, writers, duration):
+    results = []
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=_worker, args=(profile, role, deadline, results))
+        for role in ["read"] * readers + ["write"] * writers
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    summary = {}
+    for role in ("read", "write"):
+        latencies = sorted(l for r, ls, _ in results if r == role for l in ls)
+        errors = sum(e for r, _, e in results if r == role)
+        if latencies:
+            p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) > 1 else latencies[0]
+            summary[role] = {
+                "ops_per_s": len(latencies) / duration,
+                "p50_ms": statistics.median(latencies) * 1000,
+                "p95_ms": p95 * 1000,
+                "errors": errors,
+            }
+        else:
+            summary[role] = {"ops_per_s": 0, "p50_ms": 0, "p95_ms": 0, "errors": errors}
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=5.0,
+        help="Attente maximale d'un verrou en secondes (profil default, comme Django).",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        profiles = []
+        for name in ("default", "production"):
+            path = os.path.join(tmp, f"{name}.sqlite3")
+            _create_database(path, args.rows)
+            if name == "default":
+                profile = Profile(name, path, False, [], "BEGIN", args.timeout)
+            else:
+                profile = Profile(name, path, True, SQLITE_PRODUCTION_PRAGMAS, "BEGIN IMMEDIATE", 20)
+            profiles.append(profile)
+
+        print(
+            f"{args.readers} lecteurs, {args.writers} écrivains, {args.duration:.0f} s, "
+            f"{args.rows} lignes"
+        )
+        print(f"{'profil':<12}{'rôle':<7}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'erreurs':>10}")
+        for profile in profiles:
+            summary = run_profile(profile, args.readers, args.writers, args.duration)
+            for role, stats in summary.items():
+                print(
+                    f"{profile.name:<12}{role:<7}{stats['ops_per_s']:>10.0f}"
+                    f"{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['errors']:>10}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Outils communs aux pages d'administration des grandes tables (problèmes,
+commentaires, contributeurs).
+"""
+
+from django.conf import settings
+from django.contrib import admin
+from django.core.exceptions import ImproperlyConfigured
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator qui évite le COUNT(*) complet.
+
+    - table entière sous PostgreSQL : estimation des statistiques (pg_class)
+    - sinon : comptage plafonné à ADMIN_COUNT_LIMIT lignes, les pages
+      au-delà ne sont pas proposées (affiner la recherche ou les filtres)
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        limit = settings.ADMIN_COUNT_LIMIT
+        estimate = self._estimate(queryset)
+        if estimate is not None and estimate > limit:
+            return estimate
+        return queryset.values("pk")[:limit].count()
+
+    def _estimate(self, queryset):
+        """Nombre de lignes estimé, pour une table non filtrée sous PostgreSQL."""
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql" or queryset.query.where:
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        return row[0] if row and row[0] > 0 else None
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    ModelAdmin pour les tables de plusieurs millions de lignes.
+
+    Les sous-classes déclarent list_select_related (colonnes et __str__ des
+    clés étrangères), autocomplete_fields, et des search_fields indexables,
+    préfixés par "^" (début du texte) ou "=" (égalité).
+    """
+
+    paginator = EstimatedCountPaginator
+    # Pas de second COUNT(*) sur la table entière pendant une recherche
+    show_full_result_count = False
+    # Tri sur la clé primaire : parcours de l'index sans tri en mémoire
+    ordering = ["-pk"]
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Recherche sensible à la casse, pour que l'index de chaque champ serve :
+        istartswith / iexact (UPPER(...) sous PostgreSQL, LIKE sous SQLite)
+        parcourent toute la table. "^champ" devient l'intervalle
+        terme <= champ < terme + U+10FFFF, "=champ" une égalité. Un terme
+        numérique recherche aussi l'identifiant exact.
+        """
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+
+        condition = Q()
+        for field in self.get_search_fields(request):
+            if field[0] not in "^=":
+                raise ImproperlyConfigured(
+                    f"{type(self).__name__}.search_fields : préfixe ^ ou = "
+                    f"attendu ({field})."
+                )
+            name = field[1:]
+            if field[0] == "^":
+                lookup = {f"{name}__gte": term, f"{name}__lt": term + "\U0010ffff"}
+            else:
+                lookup = {name: term}
+            # Un sous-ensemble d'ids par champ : chacun parcourt son propre index
+            # (un OR entre colonnes de tables différentes ne le permet pas)
+            matching = self.model._default_manager.filter(**lookup).values("pk")
+            condition |= Q(pk__in=matching)
+        if term.isdigit():
+            condition |= Q(pk=int(term))
+        return queryset.filter(condition), False
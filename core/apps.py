@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    name = 'core'
+
+    def ready(self):
+        """Enregistre les vérifications de configuration (python manage.py check)."""
+        from . import checks  # noqa: F401
@@ -0,0 +1,73 @@
+"""
+Authentification JWT instrumentée : mêmes règles que JWTAuthentication, avec
+mesure du décodage du jeton et du chargement de l'utilisateur (voir core/metrics.py).
+
+Le jeton n'est décodé qu'une fois par requête : les middlewares qui ont besoin
+de l'utilisateur avant DRF (idempotence, épinglage au primaire) passent par
+token_user_id(), et l'authentification DRF réutilise le jeton validé.
+"""
+
+import time
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from .metrics import registry
+
+
+class InstrumentedJWTAuthentication(JWTAuthentication):
+    def validated_token(self, request):
+        """
+        Jeton validé de request (None sans en-tête Authorization), gardé sur
+        la requête Django. Lève InvalidToken si le jeton est refusé.
+        """
+        http_request = getattr(request, "_request", request)
+        header = self.get_header(http_request)
+        raw_token = self.get_raw_token(header) if header else None
+        if raw_token is None:
+            return None
+        cached = getattr(http_request, "_validated_jwt", None)
+        if cached is not None and cached[0] == raw_token:
+            return cached[1]
+        token = self.get_validated_token(raw_token)
+        http_request._validated_jwt = (raw_token, token)
+        return token
+
+    def authenticate(self, request):
+        token = self.validated_token(request)
+        if token is None:
+            return None
+        return self.get_user(token), token
+
+    def get_validated_token(self, raw_token):
+        start = time.perf_counter()
+        try:
+            return super().get_validated_token(raw_token)
+        finally:
+            registry.observe(
+                "softdesk_auth_duration_seconds",
+                ("token_decode",),
+                time.perf_counter() - start,
+            )
+
+    def get_user(self, validated_token):
+        start = time.perf_counter()
+        try:
+            return super().get_user(validated_token)
+        finally:
+            registry.observe(
+                "softdesk_auth_duration_seconds",
+                ("user_load",),
+                time.perf_counter() - start,
+            )
+
+
+def token_user_id(request):
+    """Id de l'utilisateur du JWT de request (None sans jeton valide)."""
+    try:
+        token = InstrumentedJWTAuthentication().validated_token(request)
+        return None if token is None else token[api_settings.USER_ID_CLAIM]
+    except (InvalidToken, TokenError, KeyError):
+        # Jeton refusé par la vue (401) : la requête n'est pas exécutée
+        return None
@@ -0,0 +1,23 @@
+"""
+SQLite pour les shards (core/sharding.py).
+
+Les clés étrangères des tables d'un shard pointent vers des tables de la base
+principale (projets, utilisateurs), absentes du fichier : elles ne sont ni
+appliquées à l'écriture ni vérifiées après une migration. L'intégrité est
+assurée par l'application (projects/deletion.py, users/deletion.py).
+"""
+
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        conn.execute("PRAGMA foreign_keys = OFF")
+        return conn
+
+    def enable_constraint_checking(self):
+        pass
+
+    def check_constraints(self, table_names=None):
+        pass
@@ -0,0 +1,259 @@
+"""
+Banc d'essai des endpoints de l'API, exécuté dans le processus (sans serveur HTTP).
+
+Chaque route de projects/urls.py et users/urls.py (plus le login JWT) est
+appelée via le client de test de Django : middlewares, authentification JWT,
+permissions et sérialisation sont donc mesurés comme en production.
+
+Les routes d'écriture sont enchaînées sur des objets créés pour l'occasion
+(création -> modification -> suppression), les données existantes ne sont
+pas modifiées.
+"""
+
+import json
+import math
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from issues.models import Issue, Comment
+from projects.models import Project, Contributor
+from users.models import CustomUser
+from .querycount import QueryRecorder
+
+# Mot de passe des comptes du banc d'essai et des utilisateurs de generate_data
+BENCHMARK_PASSWORD = "benchmark-password"
+
+
+def percentile(values, p):
+    """Percentile par la méthode du rang le plus proche (values triées)."""
+    if not values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(values)))
+    return values[rank - 1]
+
+
+class EndpointBenchmark:
+    """Appelle chaque route et collecte latence, statut et nombre de requêtes SQL."""
+
+    def __init__(self, user, host=None):
+        self.user = user
+        self.host = host or next(
+            (h.lstrip(".") for h in settings.ALLOWED_HOSTS if h != "*"), "localhost"
+        )
+        self.client = self._client_for(user)
+        self.samples = defaultdict(list)
+        self.recording = True
+        self.counter = 0
+
+    def _client_for(self, user):
+        return Client(
+            HTTP_HOST=self.host,
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}",
+        )
+
+    def call(self, method, name, kwargs=None, data=None, client=None):
+        """Appelle la route nommée name et enregistre la mesure sous "METHOD name"."""
+        client = client or self.client
+        url = reverse(name, kwargs=kwargs)
+        recorder = QueryRecorder()
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            start = time.perf_counter()
+            if method == "GET":
+                response = client.get(url)
+            else:
+                response = getattr(client, method.lower())(
+                    url, data=json.dumps(data or {}), content_type="application/json"
+                )
+            if response.streaming:
+                # Une réponse streamée n'est complète qu'une fois consommée
+                for _ in response.streaming_content:
+                    pass
+            elapsed = time.perf_counter() - start
+
+        if self.recording:
+            self.samples[f"{method} {name}"].append(
+                (elapsed, recorder.count, response.status_code)
+            )
+        return response
+
+    def fixtures(self):
+        """Choisit les objets existants les plus volumineux visibles par l'utilisateur."""
+        project = (
+            Project.objects.alive()
+            .filter(contributors__user=self.user)
+            .annotate(issues_total=Count("issues", distinct=True))
+            .order_by("-issues_total")
+            .first()
+        )
+        if project is None:
+            raise ValueError(f"{self.user.username} ne contribue à aucun projet.")
+
+        issue = (
+            Issue.objects.filter(project=project)
+            .annotate(comments_total=Count("comments"))
+            .order_by("-comments_total")
+            .first()
+        )
+        comment = Comment.objects.filter(issue=issue).first() if issue else None
+        contributor = Contributor.objects.filter(project=project).first()
+        outsider = (
+            CustomUser.objects.exclude(contributions__project=project)
+            .order_by("pk")
+            .first()
+        )
+        return project, issue, comment, contributor, outsider
+
+    def run_reads(self, project, issue, comment, contributor):
+        p = {"pk": project.pk}
+        nested = {"project_pk": project.pk}
+        self.call("GET", "project-list")
+        self.call("GET", "project-detail", p)
+        self.call("GET", "project-contributors", p)
+        self.call(
+            "GET", "project-contributors-detail", {**nested, "pk": contributor.pk}
+        )
+        self.call("GET", "project-issues-list", nested)
+        if issue:
+            issue_kwargs = {**nested, "issue_pk": issue.pk}
+            self.call("GET", "project-issues-detail", {**nested, "pk": issue.pk})
+            self.call("GET", "issue-comments-list", issue_kwargs)
+            if comment:
+                self.call(
+                    "GET", "issue-comments-detail", {**issue_kwargs, "pk": comment.pk}
+                )
+        self.call("GET", "profile")
+        self.call("GET", "profile-export")
+
+    def run_writes(self, outsider):
+        """Cycle complet création -> modification -> suppression sur des objets temporaires."""
+        self.counter += 1
+        response = self.call(
+            "POST",
+            "project-list",
+            data={
+                "name": f"Bench {self.counter}",
+                "description": "Benchmark",
+                "type": "backend",
+            },
+        )
+        project_pk = response.json()["id"]
+        p = {"pk": project_pk}
+        nested = {"project_pk": project_pk}
+
+        self.call("PATCH", "project-detail", p, {"description": "Benchmark (modifié)"})
+        if outsider:
+            response = self.call(
+                "POST",
+                "project-contributors-list",
+                nested,
+                {"user_id": outsider.pk, "role": Contributor.ROLE_CONTRIBUTOR},
+            )
+            self.call(
+                "DELETE",
+                "project-contributors-detail",
+                {**nested, "pk": response.json()["id"]},
+            )
+
+        response = self.call(
+            "POST",
+            "project-issues-list",
+            nested,
+            {"title": "Bench", "description": "Benchmark"},
+        )
+        issue_pk = response.json()["id"]
+        issue_kwargs = {**nested, "issue_pk": issue_pk}
+        self.call(
+            "PATCH",
+            "project-issues-detail",
+            {**nested, "pk": issue_pk},
+            {"status": "in_progress"},
+        )
+
+        response = self.call(
+            "POST", "issue-comments-list", issue_kwargs, {"description": "Bench"}
+        )
+        comment_kwargs = {**issue_kwargs, "pk": response.json()["id"]}
+        self.call(
+            "PATCH",
+            "issue-comments-detail",
+            comment_kwargs,
+            {"description": "Bench (modifié)"},
+        )
+        self.call("DELETE", "issue-comments-detail", comment_kwargs)
+        self.call("DELETE", "project-issues-detail", {**nested, "pk": issue_pk})
+        self.call("DELETE", "project-detail", p)
+
+    def run_account_cycle(self):
+        """Inscription -> login JWT -> suppression d'un compte temporaire."""
+        self.counter += 1
+        username = f"bench_account_{time.time_ns()}_{self.counter}"
+        anonymous = Client(HTTP_HOST=self.host)
+        self.call(
+            "POST",
+            "register",
+            data={"username": username, "password": BENCHMARK_PASSWORD, "age": 30},
+            client=anonymous,
+        )
+        response = self.call(
+            "POST",
+            "token_obtain_pair",
+            data={"username": username, "password": BENCHMARK_PASSWORD},
+            client=anonymous,
+        )
+        client = Client(
+            HTTP_HOST=self.host,
+            HTTP_AUTHORIZATION=f"Bearer {response.json()['access']}",
+        )
+        self.call("DELETE", "profile-delete", client=client)
+
+    def run(self, iterations, warmup=1, writes=True):
+        """Exécute warmup itérations non mesurées puis iterations mesurées."""
+        project, issue, comment, contributor, outsider = self.fixtures()
+        started = None
+        # Un seul utilisateur enchaîne les requêtes : la limitation de débit est
+        # coupée. Suppression synchrone et sans notifications : ni tombstone ni
+        # tâche laissés derrière
+        with override_settings(
+            THROTTLING={**settings.THROTTLING, "ENABLED": False},
+            NOTIFICATIONS={**settings.NOTIFICATIONS, "ENABLED": False},
+            BACKGROUND_PROJECT_DELETION=False,
+        ):
+            for i in range(warmup + iterations):
+                self.recording = i >= warmup
+                if i == warmup:
+                    started = time.perf_counter()
+                self.run_reads(project, issue, comment, contributor)
+                if writes:
+                    self.run_writes(outsider)
+                    self.run_account_cycle()
+        self.wall_time = time.perf_counter() - (started or time.perf_counter())
+        return self.report()
+
+    def report(self):
+        """Statistiques par route : percentiles (ms), débit, requêtes SQL, statuts."""
+        stats = {}
+        for key, samples in sorted(self.samples.items()):
+            latencies = sorted(s[0] * 1000 for s in samples)
+            stats[key] = {
+                "count": len(samples),
+                "p50": percentile(latencies, 50),
+                "p95": percentile(latencies, 95),
+                "p99": percentile(latencies, 99),
+                "mean": sum(latencies) / len(latencies),
+                "rps": len(latencies) / (sum(latencies) / 1000),
+                "queries": sum(s[1] for s in samples) / len(samples),
+                "statuses": sorted({s[2] for s in samples}),
+            }
+        return stats
@@ -0,0 +1,74 @@
+"""
+Opérations en masse par lots bornés.
+
+Ces fonctions découpent une suppression ou une mise à jour en lots de taille
+fixe, chacun dans sa propre transaction courte : la mémoire consommée et la
+durée des verrous restent bornées quel que soit le nombre de lignes concernées.
+"""
+
+from django.conf import settings
+from django.db import transaction
+
+
+def _batches(queryset, batch_size):
+    """
+    Génère des listes d'ids (au plus batch_size) correspondant au queryset.
+    Le queryset est réévalué à chaque lot : les lignes traitées au lot
+    précédent ne doivent plus y correspondre (supprimées ou modifiées).
+    """
+    ids_query = queryset.order_by().values_list("pk", flat=True)
+    while True:
+        ids = list(ids_query[:batch_size])
+        if not ids:
+            return
+        yield ids
+
+
+def delete_in_batches(queryset, batch_size=None, progress=None, label=None):
+    """
+    Supprime les lignes du queryset par lots de batch_size.
+
+    Chaque lot passe par QuerySet.delete() : les règles on_delete et les signaux
+    sont respectés, et les modèles sans dépendances sont supprimés par un simple
+    DELETE ... WHERE id IN (...). Les dépendances volumineuses doivent être
+    supprimées avant (par lots elles aussi) pour que la cascade reste bornée.
+
+    progress(label, total) est appelé après chaque lot avec le total cumulé.
+    Retourne le nombre de lignes supprimées.
+    """
+    batch_size = batch_size or settings.BULK_BATCH_SIZE
+    label = label or queryset.model._meta.label
+    model = queryset.model
+    total = 0
+
+    for ids in _batches(queryset, batch_size):
+        with transaction.atomic(using=queryset.db):
+            model._base_manager.using(queryset.db).filter(pk__in=ids).delete()
+        total += len(ids)
+        if progress:
+            progress(label, total)
+
+    return total
+
+
+def update_in_batches(queryset, values, batch_size=None, progress=None, label=None):
+    """
+    Applique queryset.update(**values) par lots de batch_size.
+
+    Les valeurs doivent faire sortir les lignes du queryset (ex. assignee=None
+    sur un filtre assignee=user), sinon la boucle ne se terminerait pas.
+    Retourne le nombre de lignes modifiées.
+    """
+    batch_size = batch_size or settings.BULK_BATCH_SIZE
+    label = label or queryset.model._meta.label
+    model = queryset.model
+    total = 0
+
+    for ids in _batches(queryset, batch_size):
+        with transaction.atomic(using=queryset.db):
+            model._base_manager.using(queryset.db).filter(pk__in=ids).update(**values)
+        total += len(ids)
+        if progress:
+            progress(label, total)
+
+    return total
@@ -0,0 +1,135 @@
+"""
+Vérifications de configuration (python manage.py check, lancé aussi par
+runserver et migrate).
+
+Le cache par défaut de Django vit dans la mémoire du processus : chaque
+worker a le sien. Les fonctionnalités qui partagent un état entre les
+requêtes d'un même client l'exigent partagé dès que plusieurs processus
+servent l'API.
+"""
+
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+
+# Caches propres à un processus (ou qui ne gardent rien)
+LOCAL_CACHE_BACKENDS = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+# Caches partagés dont add() n'est pas atomique (lecture puis écriture)
+NON_ATOMIC_CACHE_BACKENDS = {
+    "django.core.cache.backends.filebased.FileBasedCache",
+}
+
+
+# Entrées du cache partagé en dessous desquelles Django en supprime au hasard
+# (épinglages au primaire et seaux de débit perdus sous la charge)
+MIN_CACHE_ENTRIES = 10000
+
+
+def cache_is_shared():
+    """Vrai si le cache par défaut est partagé entre les processus."""
+    return settings.CACHES["default"]["BACKEND"] not in LOCAL_CACHE_BACKENDS
+
+
+@register(Tags.caches)
+def check_replica_cache(app_configs, **kwargs):
+    """Les réplicas épinglent un client au primaire dans le cache (core/db_routers.py)."""
+    if settings.DATABASE_REPLICAS and not cache_is_shared():
+        return [
+            Error(
+                "Les réplicas exigent un cache partagé entre les processus : "
+                "l'épinglage au primaire après une écriture serait perdu d'un "
+                "processus à l'autre.",
+                hint="Définir SOFTDESK_CACHE_DIR (ou un autre cache partagé dans CACHES).",
+                id="core.E001",
+            )
+        ]
+    return []
+
+
+@register(Tags.caches)
+def check_cache_size(app_configs, **kwargs):
+    """Le cache partagé garde une entrée par client actif (réplicas, débit)."""
+    config = settings.CACHES["default"]
+    uses_cache = settings.DATABASE_REPLICAS or (
+        settings.THROTTLING["ENABLED"] and settings.THROTTLING["STORE"] == "cache"
+    )
+    # 300 : valeur par défaut de Django
+    max_entries = config.get("OPTIONS", {}).get("MAX_ENTRIES", 300)
+    if uses_cache and cache_is_shared() and max_entries < MIN_CACHE_ENTRIES:
+        return [
+            Warning(
+                f"Le cache partagé est limité à {max_entries} entrées : au-delà, "
+                "Django en supprime au hasard, ce qui remet à zéro des limites de "
+                "débit et des épinglages au primaire.",
+                hint=f'Définir CACHES["default"]["OPTIONS"]["MAX_ENTRIES"] '
+                f"(au moins {MIN_CACHE_ENTRIES}, SOFTDESK_CACHE_MAX_ENTRIES).",
+                id="core.W001",
+            )
+        ]
+    return []
+
+
+@register(Tags.caches)
+def check_shared_stores(app_configs, **kwargs):
+    """Stockages "cache" de THROTTLING et IDEMPOTENCY sur un cache non partagé."""
+    if cache_is_shared():
+        return check_idempotency_cache()
+    errors = []
+    if settings.THROTTLING["ENABLED"] and settings.THROTTLING["STORE"] == "cache":
+        errors.append(
+            Error(
+                'THROTTLING["STORE"] = "cache" exige un cache partagé entre les '
+                "processus : chaque processus appliquerait sa propre limite.",
+                hint="Définir SOFTDESK_CACHE_DIR, ou utiliser le stockage \"local\".",
+                id="core.E002",
+            )
+        )
+    if settings.IDEMPOTENCY["ENABLED"] and settings.IDEMPOTENCY["STORE"] == "cache":
+        errors.append(
+            Error(
+                'IDEMPOTENCY["STORE"] = "cache" exige un cache partagé entre les '
+                "processus : un doublon servi par un autre processus serait réexécuté.",
+                hint='Utiliser le stockage "database".',
+                id="core.E003",
+            )
+        )
+    return errors
+
+
+def check_idempotency_cache():
+    """Le stockage "cache" d'IDEMPOTENCY réserve les clés par cache.add()."""
+    backend = settings.CACHES["default"]["BACKEND"]
+    if (
+        settings.IDEMPOTENCY["ENABLED"]
+        and settings.IDEMPOTENCY["STORE"] == "cache"
+        and backend in NON_ATOMIC_CACHE_BACKENDS
+    ):
+        return [
+            Error(
+                f'IDEMPOTENCY["STORE"] = "cache" exige un add() atomique, ce que '
+                f"n'offre pas {backend} : deux doublons simultanés pourraient "
+                "réserver la même clé et être exécutés tous les deux.",
+                hint='Utiliser le stockage "database" (ou un cache Redis/Memcached).',
+                id="core.E005",
+            )
+        ]
+    return []
+
+
+@register(Tags.caches, deploy=True)
+def check_idempotency_store(app_configs, **kwargs):
+    """En production (check --deploy), les clés d'idempotence doivent être partagées."""
+    if settings.IDEMPOTENCY["ENABLED"] and settings.IDEMPOTENCY["STORE"] == "local":
+        return [
+            Error(
+                'IDEMPOTENCY["STORE"] = "local" ne garde les clés que dans la mémoire '
+                "du processus : un doublon servi par un autre worker serait réexécuté.",
+                hint='Utiliser le stockage "database".',
+                id="core.E004",
+            )
+        ]
+    return []
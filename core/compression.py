@@ -0,0 +1,183 @@
+"""
+Compression négociée des réponses (COMPRESSION dans settings.py).
+
+L'encodage est choisi selon l'en-tête Accept-Encoding du client parmi ceux
+disponibles : zstd (paquet zstandard), brotli (paquet brotli) puis gzip,
+toujours disponible. Seuls les types textuels (JSON, NDJSON, CSV, HTML) sont
+compressés, et uniquement au-delà de MIN_SIZE octets : en dessous, le coût
+CPU dépasse le gain. Les réponses en streaming (exports) sont compressées
+morceau par morceau, sans attendre la fin du flux.
+
+BREACH : compresser dans une même réponse un secret et un texte choisi par un
+attaquant laisse deviner le secret à la taille des réponses. Ne sont donc pas
+compressées les réponses des routes EXCLUDED_ROUTES (jetons JWT du login et du
+refresh) ni celles qui posent un cookie (session, CSRF). Le jeton CSRF des
+pages HTML de l'admin est masqué différemment à chaque réponse par Django.
+
+Mesure du compromis CPU/octets : python -m benchmarks.compression
+"""
+
+import re
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+_ACCEPT_ENCODING = re.compile(r"\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([\d.]+))?\s*")
+
+
+class Gzip:
+    name = "gzip"
+
+    def __init__(self, level):
+        self.level = level
+
+    def compress(self, data):
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        return compressor.compress(data) + compressor.flush()
+
+    def stream(self, chunks):
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            # Vidage à chaque morceau : le client reçoit les lignes au fil de l'eau
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
+
+
+class Brotli:
+    name = "br"
+
+    def __init__(self, quality):
+        self.quality = quality
+
+    def compress(self, data):
+        return brotli.compress(data, quality=self.quality)
+
+    def stream(self, chunks):
+        compressor = brotli.Compressor(quality=self.quality)
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+
+
+class Zstd:
+    name = "zstd"
+
+    def __init__(self, level):
+        self.level = level
+
+    def compress(self, data):
+        return zstandard.ZstdCompressor(level=self.level).compress(data)
+
+    def stream(self, chunks):
+        compressor = zstandard.ZstdCompressor(level=self.level).compressobj()
+        for chunk in chunks:
+            data = compressor.compress(chunk) + compressor.flush(
+                zstandard.COMPRESSOBJ_FLUSH_BLOCK
+            )
+            if data:
+                yield data
+        yield compressor.flush()
+
+
+def available_codecs(config=None):
+    """Encodages utilisables, par ordre de préférence du serveur."""
+    config = config or settings.COMPRESSION
+    codecs = []
+    if zstandard is not None:
+        codecs.append(Zstd(config["ZSTD_LEVEL"]))
+    if brotli is not None:
+        codecs.append(Brotli(config["BROTLI_QUALITY"]))
+    codecs.append(Gzip(config["GZIP_LEVEL"]))
+    return codecs
+
+
+def negotiate(accept_encoding, codecs):
+    """Encodage le mieux noté par le client (à égalité, préférence du serveur)."""
+    weights = {}
+    for part in accept_encoding.split(","):
+        match = _ACCEPT_ENCODING.fullmatch(part)
+        if match:
+            try:
+                weights[match[1].lower()] = float(match[2] or 1)
+            except ValueError:
+                continue
+    best, best_weight = None, 0.0
+    for codec in codecs:
+        weight = weights.get(codec.name, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = codec, weight
+    return best
+
+
+class CompressionMiddleware:
+    """Compresse les réponses textuelles selon Accept-Encoding."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = settings.COMPRESSION
+        self.codecs = available_codecs(self.config)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            not self.config["ENABLED"]
+            or not self._compressible(response)
+            or self._carries_secret(request, response)
+        ):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        codec = negotiate(request.headers.get("Accept-Encoding", ""), self.codecs)
+        if codec is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                return response
+            response.streaming_content = codec.stream(response.streaming_content)
+            del response["Content-Length"]
+        else:
+            if len(response.content) < self.config["MIN_SIZE"]:
+                return response
+            compressed = codec.compress(response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response["Content-Length"] = str(len(compressed))
+
+        # Le corps envoyé n'est plus identique octet pour octet : ETag faible
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        response["Content-Encoding"] = codec.name
+        return response
+
+    def _compressible(self, response):
+        if response.status_code < 200 or response.status_code in (204, 304):
+            return False
+        if response.has_header("Content-Encoding"):
+            return False
+        content_type = response.get("Content-Type", "").split(";")[0].strip()
+        return content_type in self.config["CONTENT_TYPES"]
+
+    def _carries_secret(self, request, response):
+        """Réponse contenant un jeton ou posant un cookie (voir BREACH ci-dessus)."""
+        match = getattr(request, "resolver_match", None)
+        if match and match.url_name in self.config["EXCLUDED_ROUTES"]:
+            return True
+        return bool(response.cookies)
@@ -0,0 +1,99 @@
+"""
+Routage des lectures vers les réplicas (DATABASE_REPLICAS dans core/settings.py).
+
+Seules les lectures des modèles des applications projects et issues, faites
+pendant une requête GET/HEAD/OPTIONS, partent vers un réplica. Tout le reste
+(écritures, transactions, worker, commandes) reste sur le primaire : une
+lecture périmée n'est acceptable que pour l'affichage.
+
+Un seul réplica par requête, tiré au sort à son début : le COUNT et la page
+d'une liste (ou la permission et l'objet) sont lus avec le même retard.
+
+Lecture de ses propres écritures : après un POST/PUT/PATCH/DELETE réussi, les
+requêtes du même client (même utilisateur du JWT, quel que soit le jeton ; à
+défaut même adresse IP) sont servies par le primaire pendant
+REPLICA_STICKINESS_SECONDS, le temps que les réplicas rattrapent leur retard.
+L'échéance est gardée dans le cache Django, qui doit être partagé entre les
+processus (vérifié par core/checks.py).
+"""
+
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from .authentication import token_user_id
+from .metrics import record_cache
+
+REPLICA_APPS = {"projects", "issues"}
+
+# Réplica de la requête de lecture en cours non « collée » au primaire (None : aucun)
+_request_replica = ContextVar("request_replica", default=None)
+
+
+def _client_key(request):
+    """Identifie le client par l'utilisateur du JWT, à défaut par son adresse IP."""
+    user_id = token_user_id(request)
+    if user_id is not None:
+        return f"replica-pin:user:{user_id}"
+    return f"replica-pin:ip:{request.META.get('REMOTE_ADDR', '')}"
+
+
+class ReplicaRouter:
+    """Envoie les lectures autorisées vers le réplica choisi pour la requête."""
+
+    def db_for_read(self, model, **hints):
+        replica = _request_replica.get()
+        if (
+            replica is not None
+            and model._meta.app_label in REPLICA_APPS
+            # Dans une transaction, on lit ce qu'on vient d'écrire
+            and not connections["default"].in_atomic_block
+        ):
+            return replica
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primaire et réplicas contiennent les mêmes données
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Les réplicas sont des copies du primaire (voir sync_replicas)
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaStickinessMiddleware:
+    """Active les lectures sur réplica pour les requêtes sûres d'un client non « collé »."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        key = _client_key(request)
+        safe = request.method in ("GET", "HEAD", "OPTIONS")
+        pinned_until = 0
+        if safe:
+            pinned_until = cache.get(key, 0)
+            record_cache("replica_pin", pinned_until != 0)
+        replica = None
+        if safe and pinned_until < time.time():
+            replica = random.choice(settings.DATABASE_REPLICAS)
+        token = _request_replica.set(replica)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_replica.reset(token)
+
+        if not safe and response.status_code < 400:
+            stickiness = settings.REPLICA_STICKINESS_SECONDS
+            cache.set(key, time.time() + stickiness, timeout=stickiness)
+        return response
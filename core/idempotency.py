@@ -0,0 +1,333 @@
+"""
+Requêtes idempotentes avec l'en-tête Idempotency-Key (IDEMPOTENCY dans settings.py).
+
+Un client qui renvoie une requête POST/PATCH (réseau instable) avec la même
+clé reçoit la réponse de la première exécution, rejouée sans repasser par la
+vue : pas de doublon, ni de nouvelles requêtes de validation et de permission.
+
+- La clé est propre au client : elle est combinée à l'id de l'utilisateur du
+  JWT (décodé ici une fois pour toute la requête, voir core/authentication.py),
+  à défaut à l'adresse IP. Un nouveau jeton du même utilisateur rejoue donc la
+  même réponse.
+- Empreinte : méthode, chemin et corps. Une clé réutilisée pour une autre
+  requête reçoit un 422.
+- Doublons simultanés : la première requête réserve la clé ; les suivantes
+  attendent sa réponse au plus WAIT_TIMEOUT secondes, puis reçoivent un 409.
+- Seules les réponses définitives sont conservées (pas les 5xx, 409 et 429,
+  qui libèrent la clé), pendant TTL secondes.
+- Stockage "database" (par défaut) : table IdempotencyKey de la base
+  principale ; la réservation est un INSERT sur la clé primaire, atomique
+  entre les processus. Les clés expirées sont supprimées par
+  prune_idempotency_keys (à planifier).
+- Stockage "cache" : cache Django partagé dont add() est atomique (Redis,
+  Memcached ; pas FileBasedCache, voir core/checks.py).
+- Stockage "local" : mémoire du processus, pour le développement seulement
+  (un doublon servi par un autre worker serait réexécuté) ; MAX_KEYS clés au
+  plus, les moins récemment utilisées étant oubliées.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+
+from .authentication import token_user_id
+from .metrics import registry
+from .models import IdempotencyKey
+
+# En-têtes propres à la première exécution, non rejoués
+NOT_REPLAYED_HEADERS = {"set-cookie", "server-timing"}
+
+
+class LocalIdempotencyStore:
+    """Réponses en mémoire, expirées après leur TTL et bornées en nombre (LRU)."""
+
+    def __init__(self, max_keys=10000):
+        # clé -> (expiration, {"fingerprint": ..., "response": None si en cours})
+        self.records = OrderedDict()
+        self.max_keys = max_keys
+        self.changed = threading.Condition()
+
+    def _get(self, key):
+        item = self.records.get(key)
+        if item is None:
+            return None
+        if item[0] <= time.monotonic():
+            del self.records[key]
+            return None
+        return item[1]
+
+    def begin(self, key, fingerprint, timeout):
+        """Réserve key ; retourne (True, enregistrement) ou (False, enregistrement existant)."""
+        with self.changed:
+            record = self._get(key)
+            if record is not None:
+                self.records.move_to_end(key)
+                return False, record
+            record = {"fingerprint": fingerprint, "response": None}
+            self.records[key] = (time.monotonic() + timeout, record)
+            while len(self.records) > self.max_keys:
+                self.records.popitem(last=False)
+            return True, record
+
+    def finish(self, key, record, response, ttl):
+        with self.changed:
+            record["response"] = response
+            self.records[key] = (time.monotonic() + ttl, record)
+            self.changed.notify_all()
+
+    def abandon(self, key, record):
+        with self.changed:
+            item = self.records.get(key)
+            if item is not None and item[1] is record:
+                del self.records[key]
+            self.changed.notify_all()
+
+    def wait(self, key, timeout):
+        """Enregistrement de key une fois terminé (None s'il a été abandonné)."""
+        deadline = time.monotonic() + timeout
+        with self.changed:
+            while True:
+                record = self._get(key)
+                remaining = deadline - time.monotonic()
+                if record is None or record["response"] is not None or remaining <= 0:
+                    return record
+                self.changed.wait(remaining)
+
+
+class CacheIdempotencyStore:
+    """Réponses dans le cache Django, partagées entre les processus."""
+
+    POLL_INTERVAL = 0.05
+
+    def _cache_key(self, key):
+        return f"idempotency:{key}"
+
+    def begin(self, key, fingerprint, timeout):
+        record = {"fingerprint": fingerprint, "response": None}
+        if cache.add(self._cache_key(key), record, timeout):
+            return True, record
+        return False, cache.get(self._cache_key(key)) or record
+
+    def finish(self, key, record, response, ttl):
+        cache.set(self._cache_key(key), {**record, "response": response}, ttl)
+
+    def abandon(self, key, record):
+        cache.delete(self._cache_key(key))
+
+    def wait(self, key, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            record = cache.get(self._cache_key(key))
+            if (
+                record is None
+                or record["response"] is not None
+                or time.monotonic() >= deadline
+            ):
+                return record
+            time.sleep(self.POLL_INTERVAL)
+
+
+class DatabaseIdempotencyStore:
+    """Réponses dans la table IdempotencyKey, réservées par un INSERT."""
+
+    POLL_INTERVAL = 0.05
+
+    def _get(self, key):
+        row = IdempotencyKey.objects.filter(
+            key=key, expires_time__gt=timezone.now()
+        ).first()
+        if row is None:
+            return None
+        response = None
+        if row.status is not None:
+            response = {
+                "status": row.status,
+                "headers": [tuple(header) for header in row.headers],
+                "content": bytes(row.content),
+            }
+        return {"fingerprint": row.fingerprint, "response": response}
+
+    def _insert(self, key, fingerprint, timeout):
+        try:
+            # Savepoint : l'échec ne rompt pas une transaction englobante
+            with transaction.atomic():
+                IdempotencyKey.objects.create(
+                    key=key,
+                    fingerprint=fingerprint,
+                    expires_time=timezone.now() + timedelta(seconds=timeout),
+                )
+            return True
+        except IntegrityError:
+            return False
+
+    def begin(self, key, fingerprint, timeout):
+        record = {"fingerprint": fingerprint, "response": None}
+        if self._insert(key, fingerprint, timeout):
+            return True, record
+        # Clé expirée pas encore purgée : libérée, puis une seule nouvelle tentative
+        expired = IdempotencyKey.objects.filter(
+            key=key, expires_time__lte=timezone.now()
+        ).delete()[0]
+        if expired and self._insert(key, fingerprint, timeout):
+            return True, record
+        return False, self._get(key) or record
+
+    def finish(self, key, record, response, ttl):
+        IdempotencyKey.objects.filter(key=key).update(
+            status=response["status"],
+            headers=response["headers"],
+            content=response["content"],
+            expires_time=timezone.now() + timedelta(seconds=ttl),
+        )
+
+    def abandon(self, key, record):
+        IdempotencyKey.objects.filter(key=key, status__isnull=True).delete()
+
+    def wait(self, key, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            record = self._get(key)
+            if (
+                record is None
+                or record["response"] is not None
+                or time.monotonic() >= deadline
+            ):
+                return record
+            time.sleep(self.POLL_INTERVAL)
+
+
+def prune_expired_keys():
+    """Supprime les clés expirées du stockage "database" ; retourne leur nombre."""
+    return IdempotencyKey.objects.filter(expires_time__lte=timezone.now()).delete()[0]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            config = settings.IDEMPOTENCY
+            if config["STORE"] == "database":
+                _store = DatabaseIdempotencyStore()
+            elif config["STORE"] == "cache":
+                _store = CacheIdempotencyStore()
+            else:
+                _store = LocalIdempotencyStore(config["MAX_KEYS"])
+    return _store
+
+
+def _digest(*parts):
+    sha = hashlib.sha256()
+    for part in parts:
+        sha.update(part if isinstance(part, bytes) else part.encode())
+        sha.update(b"\0")
+    return sha.hexdigest()
+
+
+def _client_scope(request):
+    """Utilisateur du JWT de la requête ("user:<id>"), à défaut adresse IP."""
+    user_id = token_user_id(request)
+    if user_id is not None:
+        return f"user:{user_id}"
+    return f"ip:{request.META.get('REMOTE_ADDR', '')}"
+
+
+def _error(status, detail, result):
+    registry.inc("softdesk_idempotency_total", (result,))
+    response = JsonResponse({"detail": detail}, status=status)
+    if status == 409:
+        response["Retry-After"] = "1"
+    return response
+
+
+class IdempotencyMiddleware:
+    """Rejoue la réponse d'une requête déjà exécutée avec la même Idempotency-Key."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        config = settings.IDEMPOTENCY
+        idempotency_key = request.headers.get("Idempotency-Key")
+        if (
+            not config["ENABLED"]
+            or idempotency_key is None
+            or request.method not in config["METHODS"]
+        ):
+            return self.get_response(request)
+        if not 0 < len(idempotency_key) <= 255:
+            return _error(
+                400, "Idempotency-Key invalide (1 à 255 caractères).", "invalid"
+            )
+
+        key = _digest(_client_scope(request), idempotency_key)
+        fingerprint = _digest(request.method, request.get_full_path(), request.body)
+
+        store = get_store()
+        owner, record = store.begin(key, fingerprint, config["LOCK_TIMEOUT"])
+        if not owner:
+            if record["fingerprint"] != fingerprint:
+                return _error(
+                    422,
+                    "Idempotency-Key déjà utilisée pour une autre requête.",
+                    "mismatch",
+                )
+            record = store.wait(key, config["WAIT_TIMEOUT"])
+            if record is None or record["response"] is None:
+                return _error(
+                    409,
+                    "Requête identique en cours de traitement, réessayez plus tard.",
+                    "conflict",
+                )
+            registry.inc("softdesk_idempotency_total", ("replayed",))
+            return self._replay(record["response"])
+
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            store.abandon(key, record)
+            raise
+
+        if self._storable(response, config):
+            store.finish(key, record, self._freeze(response), config["TTL"])
+            registry.inc("softdesk_idempotency_total", ("stored",))
+        else:
+            store.abandon(key, record)
+        return response
+
+    def _storable(self, response, config):
+        return (
+            not response.streaming
+            and response.status_code < 500
+            and response.status_code not in (409, 429)
+            and len(response.content) <= config["MAX_RESPONSE_SIZE"]
+        )
+
+    def _freeze(self, response):
+        return {
+            "status": response.status_code,
+            "headers": [
+                (name, value)
+                for name, value in response.items()
+                if name.lower() not in NOT_REPLAYED_HEADERS
+            ],
+            "content": response.content,
+        }
+
+    def _replay(self, frozen):
+        response = HttpResponse(frozen["content"], status=frozen["status"])
+        for name, value in frozen["headers"]:
+            response[name] = value
+        response["Idempotent-Replayed"] = "true"
+        return response
@@ -0,0 +1,111 @@
+"""
+Banc d'essai des endpoints : python manage.py bench_endpoints --iterations 50
+
+À lancer sur une base peuplée par generate_data. --save enregistre les
+résultats comme référence, --compare affiche l'écart avec une référence :
+
+    python manage.py bench_endpoints --save avant.json
+    # ... modification ...
+    python manage.py bench_endpoints --compare avant.json
+"""
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+
+from core.benchmark import EndpointBenchmark
+from projects.models import Project
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = "Mesure latence, débit et requêtes SQL de chaque route de l'API."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument(
+            "--username",
+            help="Utilisateur simulé (par défaut l'auteur du projet ayant le plus de problèmes).",
+        )
+        parser.add_argument(
+            "--reads-only",
+            action="store_true",
+            help="N'exécute pas les routes d'écriture.",
+        )
+        parser.add_argument(
+            "--save", help="Enregistre les résultats dans ce fichier JSON."
+        )
+        parser.add_argument(
+            "--compare", help="Compare avec un fichier JSON enregistré par --save."
+        )
+
+    def _default_user(self):
+        project = (
+            Project.objects.alive()
+            .annotate(issues_total=Count("issues"))
+            .order_by("-issues_total")
+            .select_related("author")
+            .first()
+        )
+        if project is None:
+            raise CommandError(
+                "Base vide : lancez d'abord python manage.py generate_data."
+            )
+        return project.author
+
+    def handle(self, *args, **options):
+        if options["username"]:
+            user = CustomUser.objects.filter(username=options["username"]).first()
+            if user is None:
+                raise CommandError(f"Utilisateur inconnu : {options['username']}")
+        else:
+            user = self._default_user()
+
+        baseline = None
+        if options["compare"]:
+            with open(options["compare"], encoding="utf-8") as f:
+                baseline = json.load(f)
+
+        benchmark = EndpointBenchmark(user)
+        try:
+            stats = benchmark.run(
+                options["iterations"],
+                warmup=options["warmup"],
+                writes=not options["reads_only"],
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        total = sum(s["count"] for s in stats.values())
+        self.stdout.write(
+            f"Utilisateur {user.username}, {options['iterations']} itérations, "
+            f"{total} requêtes en {benchmark.wall_time:.1f} s "
+            f"({total / benchmark.wall_time:.0f} req/s)\n"
+        )
+        header = f"{'route':<42}{'p50':>8}{'p95':>8}{'p99':>8}{'req/s':>8}{'SQL':>6}  statuts"
+        if baseline:
+            header += f"{'Δp50':>9}{'Δp95':>9}{'ΔSQL':>7}"
+        self.stdout.write(header)
+
+        for key, s in stats.items():
+            line = (
+                f"{key:<42}{s['p50']:>8.2f}{s['p95']:>8.2f}{s['p99']:>8.2f}"
+                f"{s['rps']:>8.0f}{s['queries']:>6.1f}  {','.join(map(str, s['statuses'])):<7}"
+            )
+            reference = (baseline or {}).get(key)
+            if reference:
+                line += (
+                    f"{(s['p50'] / reference['p50'] - 1) * 100:>+8.0f}%"
+                    f"{(s['p95'] / reference['p95'] - 1) * 100:>+8.0f}%"
+                    f"{s['queries'] - reference['queries']:>+7.1f}"
+                )
+            self.stdout.write(line)
+
+        if options["save"]:
+            with open(options["save"], "w", encoding="utf-8") as f:
+                json.dump(stats, f, indent=2)
+            self.stdout.write(
+                self.style.SUCCESS(f"Résultats enregistrés dans {options['save']}.")
+            )
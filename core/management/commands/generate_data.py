@@ -0,0 +1,174 @@
+"""
+Génère un jeu de données synthétique réaliste : python manage.py generate_data
+
+Les volumes sont paramétrables et la génération est reproductible (--seed).
+Le nombre de commentaires par problème suit une loi de Pareto : la plupart des
+problèmes en ont peu, quelques-uns en concentrent des milliers, comme en
+production. Toutes les insertions se font par lots (bulk_create).
+"""
+
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.benchmark import BENCHMARK_PASSWORD
+from issues.models import Issue, Comment
+from projects.models import Project, Contributor
+from users.models import CustomUser
+
+WORDS = (
+    "api backend frontend login erreur page formulaire cache base requête lent "
+    "crash mobile export import utilisateur projet ticket notification recherche "
+    "filtre tri pagination sécurité token session migration test déploiement"
+).split()
+
+
+class Command(BaseCommand):
+    help = "Génère des utilisateurs, projets, contributeurs, problèmes et commentaires synthétiques."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--projects", type=int, default=50)
+        parser.add_argument(
+            "--contributors",
+            type=int,
+            default=10,
+            help="Contributeurs par projet (auteur inclus).",
+        )
+        parser.add_argument(
+            "--issues", type=int, default=200, help="Problèmes par projet."
+        )
+        parser.add_argument(
+            "--comments",
+            type=int,
+            default=5,
+            help="Nombre moyen de commentaires par problème (distribution de Pareto).",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--prefix",
+            default="bench",
+            help="Préfixe des usernames générés (doivent être uniques).",
+        )
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def _sentence(self, words):
+        return " ".join(self.rng.choice(WORDS) for _ in range(words)).capitalize()
+
+    def _comment_counts(self, issues, mean):
+        """Répartit issues * mean commentaires selon des poids de Pareto (alpha 1.2)."""
+        weights = [self.rng.paretovariate(1.2) for _ in range(issues)]
+        scale = issues * mean / sum(weights)
+        return [int(w * scale) for w in weights]
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        batch_size = options["batch_size"]
+        prefix = options["prefix"]
+        start = time.perf_counter()
+
+        if options["contributors"] > options["users"]:
+            raise CommandError("--contributors ne peut pas dépasser --users.")
+        if CustomUser.objects.filter(username__startswith=f"{prefix}_").exists():
+            raise CommandError(
+                f"Des utilisateurs {prefix}_* existent déjà : changez --prefix."
+            )
+
+        # Un seul hachage : le hachage de mot de passe est volontairement lent
+        password = make_password(BENCHMARK_PASSWORD)
+        users = CustomUser.objects.bulk_create(
+            [
+                CustomUser(
+                    username=f"{prefix}_{i}",
+                    email=f"{prefix}_{i}@example.com",
+                    password=password,
+                    age=self.rng.randint(13, 70),
+                    can_be_contacted=self.rng.random() < 0.7,
+                    can_data_be_shared=self.rng.random() < 0.5,
+                )
+                for i in range(options["users"])
+            ],
+            batch_size=batch_size,
+        )
+        self.stdout.write(f"{len(users)} utilisateurs")
+
+        totals = {"projects": 0, "contributors": 0, "issues": 0, "comments": 0}
+        for _ in range(options["projects"]):
+            # Une transaction par projet : lots de taille bornée
+            with transaction.atomic():
+                members = self.rng.sample(users, options["contributors"])
+                author = members[0]
+                project = Project.objects.create(
+                    name=self._sentence(3),
+                    description=self._sentence(20),
+                    type=self.rng.choice(
+                        [choice for choice, _ in Project.TYPE_CHOICES]
+                    ),
+                    author=author,
+                )
+                contributors = [
+                    Contributor(
+                        project=project,
+                        user=user,
+                        role=(
+                            Contributor.ROLE_AUTHOR
+                            if user is author
+                            else Contributor.ROLE_CONTRIBUTOR
+                        ),
+                    )
+                    for user in members
+                ]
+                issues = [
+                    Issue(
+                        project=project,
+                        title=self._sentence(6),
+                        description=self._sentence(self.rng.randint(20, 150)),
+                        priority=self.rng.choice(["low", "medium", "high"]),
+                        status=self.rng.choice(["to_do", "in_progress", "finished"]),
+                        tag=self.rng.choice(["bug", "feature", "task"]),
+                        author=self.rng.choice(members),
+                        assignee=self.rng.choice(members + [None]),
+                    )
+                    for _ in range(options["issues"])
+                ]
+                # bulk_create n'appelle pas save() : usernames dénormalisés à la main
+                for obj in contributors + issues:
+                    obj.fill_usernames()
+                Contributor.objects.bulk_create(contributors)
+                issues = Issue.objects.bulk_create(issues, batch_size=batch_size)
+
+                comments = []
+                for issue, count in zip(
+                    issues, self._comment_counts(len(issues), options["comments"])
+                ):
+                    for _ in range(count):
+                        comment = Comment(
+                            issue=issue,
+                            author=self.rng.choice(members),
+                            description=self._sentence(self.rng.randint(5, 80)),
+                        )
+                        comment.fill_usernames()
+                        comments.append(comment)
+                        if len(comments) >= batch_size:
+                            Comment.objects.bulk_create(comments)
+                            totals["comments"] += len(comments)
+                            comments = []
+                Comment.objects.bulk_create(comments)
+                totals["comments"] += len(comments)
+
+            totals["projects"] += 1
+            totals["contributors"] += len(members)
+            totals["issues"] += len(issues)
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            ", ".join(f"{count} {name}" for name, count in totals.items())
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Données générées en {elapsed:.1f} s (mot de passe : {BENCHMARK_PASSWORD})."
+            )
+        )
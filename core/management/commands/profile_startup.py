@@ -0,0 +1,122 @@
+"""
+Mesure le démarrage à froid : python manage.py profile_startup
+
+Lance un interpréteur neuf avec "python -X importtime" (aucun module déjà
+importé ne fausse la mesure) et rapporte :
+- la durée de django.setup(), de l'import du ROOT_URLCONF, de la construction
+  du résolveur d'URL et de chaque étape de core.warmup.warm_up()
+- le temps d'import de chaque module d'URL (routers imbriqués compris)
+- les modules et paquets les plus coûteux à importer
+"""
+
+import json
+import subprocess
+import sys
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Exécuté dans le sous-processus ; la dernière ligne de stdout est un JSON
+SCRIPT = """
+import json, time
+from importlib import import_module
+
+timings, urlconfs = {}, {}
+start = time.perf_counter()
+import django
+django.setup()
+timings["django.setup()"] = time.perf_counter() - start
+
+# include() passe par importlib, que -X importtime ne mesure pas
+import django.urls.conf
+
+def timed_import(name, *args):
+    start = time.perf_counter()
+    try:
+        return import_module(name, *args)
+    finally:
+        urlconfs.setdefault(name, time.perf_counter() - start)
+
+django.urls.conf.import_module = timed_import
+
+from django.conf import settings
+timed_import(settings.ROOT_URLCONF)
+timings["import " + settings.ROOT_URLCONF] = urlconfs[settings.ROOT_URLCONF]
+
+from django.urls import get_resolver
+start = time.perf_counter()
+get_resolver().reverse_dict
+timings["résolveur d'URL"] = time.perf_counter() - start
+
+from core.warmup import warm_up
+for name, (duration, _) in warm_up().items():
+    timings["warm_up : " + name] = duration
+print(json.dumps({"timings": timings, "urlconfs": urlconfs}))
+"""
+
+
+def parse_importtime(output):
+    """Lignes "-X importtime" -> [(module, self µs, cumulé µs)]."""
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:") :].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        modules.append((parts[2].strip(), int(parts[0]), int(parts[1])))
+    return modules
+
+
+class Command(BaseCommand):
+    help = "Mesure les imports et la construction des URL au démarrage."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=15,
+            help="Nombre de modules et de paquets affichés (15 par défaut).",
+        )
+
+    def handle(self, *args, **options):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", SCRIPT],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+        modules = parse_importtime(result.stderr)
+        top = options["top"]
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Étapes du démarrage"))
+        for name, duration in report["timings"].items():
+            self.stdout.write(f"  {duration * 1000:9.1f} ms  {name}")
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Modules d'URL (import cumulé)"))
+        for name, duration in report["urlconfs"].items():
+            self.stdout.write(f"  {duration * 1000:9.1f} ms  {name}")
+
+        self.stdout.write(
+            self.style.MIGRATE_HEADING("Modules les plus lents (import propre)")
+        )
+        for name, own, _ in sorted(modules, key=lambda m: m[1], reverse=True)[:top]:
+            self.stdout.write(f"  {own / 1000:9.1f} ms  {name}")
+
+        packages = Counter()
+        for name, own, _ in modules:
+            packages[name.split(".")[0]] += own
+        self.stdout.write(self.style.MIGRATE_HEADING("Paquets les plus lents"))
+        for name, own in packages.most_common(top):
+            self.stdout.write(f"  {own / 1000:9.1f} ms  {name}")
+
+        total = sum(own for _, own, _ in modules)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(modules)} modules importés en {total / 1000:.1f} ms."
+            )
+        )
@@ -0,0 +1,19 @@
+"""
+Purge les Idempotency-Key expirées : python manage.py prune_idempotency_keys
+
+À planifier (cron) avec le stockage "database" (IDEMPOTENCY dans settings.py) :
+une clé expirée est libérée à sa réutilisation, mais sa ligne resterait sinon
+dans la table. Sans danger à relancer.
+"""
+
+from django.core.management.base import BaseCommand
+
+from core.idempotency import prune_expired_keys
+
+
+class Command(BaseCommand):
+    help = "Supprime les Idempotency-Key expirées (stockage \"database\")."
+
+    def handle(self, *args, **options):
+        deleted = prune_expired_keys()
+        self.stdout.write(self.style.SUCCESS(f"{deleted} clés supprimées."))
@@ -0,0 +1,147 @@
+"""
+Range les données de chaque projet dans son shard : python manage.py rebalance_shards
+
+À lancer API arrêtée, après l'activation du sharding (les données sont encore
+dans la base principale) ou un changement de SOFTDESK_SHARD_COUNT, une fois
+chaque shard migré (python manage.py migrate --database shard_<n>).
+
+Pour chaque base (principale, puis chaque shard), les projets dont les lignes
+ne sont pas dans leur shard (core/sharding.py) sont déplacés par lots : copie
+dans le shard cible avec les mêmes ids, puis suppression de la source. Les
+parents sont copiés avant leurs enfants et supprimés après eux. Sans danger à
+relancer après une interruption : les lignes déjà copiées sont ignorées.
+"""
+
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import DateTimeField
+
+from core.bulk import delete_in_batches
+from core.sharding import shard_for_project, sync_id_sequences
+from issues.models import ArchivedComment, ArchivedIssue, Comment, HistoryEntry, Issue
+from projects.models import Contributor
+
+
+@contextmanager
+def _keep_dates(*models):
+    """Désactive auto_now / auto_now_add : les dates copiées sont conservées."""
+    fields = [
+        (field, field.auto_now, field.auto_now_add)
+        for model in models
+        for field in model._meta.concrete_fields
+        if isinstance(field, DateTimeField)
+    ]
+    for field, _, _ in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in fields:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _copy(queryset, target, batch_size):
+    """Copie les lignes de queryset dans la base target ; retourne leur nombre."""
+    model = queryset.model
+    rows = queryset.order_by("pk").values(
+        *(field.attname for field in model._meta.concrete_fields)
+    )
+    copied = 0
+    batch = []
+    for row in rows.iterator(chunk_size=batch_size):
+        batch.append(model(**row))
+        if len(batch) >= batch_size:
+            model._base_manager.using(target).bulk_create(batch, ignore_conflicts=True)
+            copied += len(batch)
+            batch = []
+    model._base_manager.using(target).bulk_create(batch, ignore_conflicts=True)
+    return copied + len(batch)
+
+
+class Command(BaseCommand):
+    help = "Déplace les contributeurs, problèmes, commentaires et l'historique de chaque projet dans son shard."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Nombre de lignes par lot (BULK_BATCH_SIZE par défaut).",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_SHARDS:
+            raise CommandError("Sharding désactivé (SOFTDESK_SHARD_COUNT).")
+        batch_size = options["batch_size"] or settings.BULK_BATCH_SIZE
+
+        moved = 0
+        with _keep_dates(Contributor, Issue, Comment, ArchivedIssue, ArchivedComment):
+            for source in ["default", *settings.DATABASE_SHARDS]:
+                for project_id in self._project_ids(source):
+                    target = shard_for_project(project_id)
+                    if target != source:
+                        counts = self._move(project_id, source, target, batch_size)
+                        self.stdout.write(
+                            f"projet {project_id} : {source} -> {target} "
+                            + ", ".join(f"{n} {label}" for label, n in counts.items())
+                        )
+                        moved += 1
+        sync_id_sequences()
+        self.stdout.write(self.style.SUCCESS(f"{moved} projets déplacés."))
+
+    def _project_ids(self, alias):
+        """Projets ayant des lignes dans la base alias."""
+        project_ids = set()
+        for model in (Contributor, Issue, ArchivedIssue, HistoryEntry):
+            project_ids.update(
+                model._base_manager.using(alias)
+                .order_by()
+                .values_list("project_id", flat=True)
+                .distinct()
+            )
+        return sorted(project_ids)
+
+    def _move(self, project_id, source, target, batch_size):
+        counts = {}
+        for issue_model, comment_model, issue_label, comment_label in (
+            (Issue, Comment, "problèmes", "commentaires"),
+            (
+                ArchivedIssue,
+                ArchivedComment,
+                "problèmes archivés",
+                "commentaires archivés",
+            ),
+        ):
+            issues = issue_model._base_manager.using(source).filter(
+                project_id=project_id
+            )
+            ids_query = issues.order_by("pk").values_list("pk", flat=True)
+            while True:
+                ids = list(ids_query[:batch_size])
+                if not ids:
+                    break
+                batch = issues.filter(pk__in=ids)
+                comments = comment_model._base_manager.using(source).filter(
+                    issue_id__in=ids
+                )
+                counts[issue_label] = counts.get(issue_label, 0) + _copy(
+                    batch, target, batch_size
+                )
+                counts[comment_label] = counts.get(comment_label, 0) + _copy(
+                    comments, target, batch_size
+                )
+                delete_in_batches(comments, batch_size=batch_size)
+                delete_in_batches(batch, batch_size=batch_size)
+
+        contributors = Contributor._base_manager.using(source).filter(
+            project_id=project_id
+        )
+        counts["contributeurs"] = _copy(contributors, target, batch_size)
+        delete_in_batches(contributors, batch_size=batch_size)
+
+        history = HistoryEntry._base_manager.using(source).filter(project_id=project_id)
+        counts["lignes d'historique"] = _copy(history, target, batch_size)
+        delete_in_batches(history, batch_size=batch_size)
+        return counts
@@ -0,0 +1,38 @@
+"""
+Copie la base primaire dans les réplicas SQLite : python manage.py sync_replicas
+
+Destiné aux tests locaux du routage (core/db_routers.py) ; en production, les
+réplicas sont alimentés par l'outil de réplication.
+"""
+
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = "Copie la base SQLite primaire dans chaque réplica (DATABASE_REPLICAS)."
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError("Aucun réplica configuré (SOFTDESK_DB_REPLICAS).")
+
+        primary = settings.DATABASES["default"]
+        if primary["ENGINE"] != "django.db.backends.sqlite3":
+            raise CommandError("sync_replicas ne gère que SQLite.")
+
+        connections.close_all()
+        source = sqlite3.connect(primary["NAME"])
+        try:
+            for alias in settings.DATABASE_REPLICAS:
+                target = sqlite3.connect(settings.DATABASES[alias]["NAME"])
+                try:
+                    # API de sauvegarde en ligne : copie cohérente même pendant des écritures
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f"{alias} : synchronisé")
+        finally:
+            source.close()
@@ -0,0 +1,277 @@
+"""
+Métriques au format Prometheus, exposées sur /metrics/.
+
+- latence et nombre de requêtes HTTP par route DRF (ex. "project-issues-list"),
+  méthode et statut, requêtes en cours
+- nombre et durée des requêtes SQL par requête HTTP
+- taux de succès des caches (record_cache)
+- durée de l'authentification JWT : décodage du jeton et chargement de l'utilisateur
+
+Agrégation répartie : un nombre fixe de « shards » (METRICS["SHARDS"]),
+chacun avec son verrou ; un thread est affecté à un shard à sa première
+écriture (tour à tour), si bien que les threads se disputent rarement un
+verrou et que la mémoire ne croît pas avec les threads créés puis terminés.
+Les shards ne sont additionnés qu'à la lecture de /metrics/. Les valeurs sont
+propres à chaque processus : avec plusieurs workers, chacun expose les siennes.
+"""
+
+import hmac
+import itertools
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+# nom -> (type, aide, noms des labels, buckets)
+METRICS = {
+    "softdesk_http_requests_total": (
+        "counter",
+        "Requêtes HTTP traitées.",
+        ("route", "method", "status"),
+        None,
+    ),
+    "softdesk_http_request_duration_seconds": (
+        "histogram",
+        "Durée de traitement des requêtes HTTP.",
+        ("route", "method"),
+        LATENCY_BUCKETS,
+    ),
+    "softdesk_http_requests_in_flight": (
+        "gauge",
+        "Requêtes HTTP en cours de traitement.",
+        (),
+        None,
+    ),
+    "softdesk_db_queries_per_request": (
+        "histogram",
+        "Nombre de requêtes SQL par requête HTTP.",
+        ("route",),
+        QUERY_COUNT_BUCKETS,
+    ),
+    "softdesk_db_duration_seconds": (
+        "histogram",
+        "Temps SQL cumulé par requête HTTP.",
+        ("route",),
+        LATENCY_BUCKETS,
+    ),
+    "softdesk_requests_rejected_total": (
+        "counter",
+        "Requêtes refusées par limitation de débit (429) ou délestage (503).",
+        ("reason",),
+        None,
+    ),
+    "softdesk_idempotency_total": (
+        "counter",
+        "Requêtes avec Idempotency-Key, par résultat (stored, replayed, conflict...).",
+        ("result",),
+        None,
+    ),
+    "softdesk_cache_requests_total": (
+        "counter",
+        "Accès aux caches, par résultat (hit/miss).",
+        ("cache", "result"),
+        None,
+    ),
+    "softdesk_auth_duration_seconds": (
+        "histogram",
+        "Durée des étapes de l'authentification JWT.",
+        ("step",),
+        LATENCY_BUCKETS,
+    ),
+}
+
+
+# Méthodes reconnues ; les autres sont regroupées sous "other" (cardinalité bornée)
+HTTP_METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+
+class _Shard:
+    """Valeurs écrites par un groupe de threads, sous self.lock."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # (nom, labels) -> valeur
+        self.values = {}
+        # (nom, labels) -> [compteurs par bucket..., somme, nombre]
+        self.histograms = {}
+
+
+class MetricsRegistry:
+    def __init__(self, shards=16):
+        self._shards = [_Shard() for _ in range(shards)]
+        self._local = threading.local()
+        self._next = itertools.count()
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            # next() sur itertools.count est atomique (GIL)
+            shard = self._shards[next(self._next) % len(self._shards)]
+            self._local.shard = shard
+        return shard
+
+    def inc(self, name, labels=(), value=1):
+        """Incrémente un compteur (ou une jauge, value pouvant être négative)."""
+        shard = self._shard()
+        key = (name, labels)
+        with shard.lock:
+            shard.values[key] = shard.values.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        """Ajoute une observation à un histogramme."""
+        buckets = METRICS[name][3]
+        index = next((i for i, bound in enumerate(buckets) if value <= bound), None)
+        shard = self._shard()
+        key = (name, labels)
+        with shard.lock:
+            data = shard.histograms.get(key)
+            if data is None:
+                data = shard.histograms[key] = [0] * (len(buckets) + 2)
+            if index is not None:
+                data[index] += 1
+            data[-2] += value
+            data[-1] += 1
+
+    def collect(self):
+        """Additionne les shards : ({(nom, labels): valeur}, {(nom, labels): données})."""
+        values, histograms = {}, {}
+        for shard in self._shards:
+            with shard.lock:
+                shard_values = list(shard.values.items())
+                shard_histograms = [(k, list(d)) for k, d in shard.histograms.items()]
+            for key, value in shard_values:
+                values[key] = values.get(key, 0) + value
+            for key, data in shard_histograms:
+                total = histograms.setdefault(key, [0] * len(data))
+                for i, v in enumerate(data):
+                    total[i] += v
+        return values, histograms
+
+    def render(self):
+        """Texte au format d'exposition Prometheus."""
+        values, histograms = self.collect()
+        lines = []
+        for name, (kind, help_text, label_names, buckets) in METRICS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "histogram":
+                for (metric, labels), data in sorted(histograms.items()):
+                    if metric != name:
+                        continue
+                    base = _format_labels(label_names, labels)
+                    cumulative = 0
+                    for bound, count in zip(buckets, data):
+                        cumulative += count
+                        lines.append(
+                            f"{name}_bucket{_format_labels(label_names, labels, le=bound)} {cumulative}"
+                        )
+                    lines.append(
+                        f"{name}_bucket{_format_labels(label_names, labels, le='+Inf')} {data[-1]}"
+                    )
+                    lines.append(f"{name}_sum{base} {data[-2]}")
+                    lines.append(f"{name}_count{base} {data[-1]}")
+            else:
+                for (metric, labels), value in sorted(values.items()):
+                    if metric == name:
+                        lines.append(
+                            f"{name}{_format_labels(label_names, labels)} {value}"
+                        )
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    """Échappe une valeur de label (format d'exposition Prometheus)."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, le=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if le is not None:
+        pairs.append(f'le="{le}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+registry = MetricsRegistry(settings.METRICS["SHARDS"])
+
+
+def record_cache(cache_name, hit):
+    """À appeler après chaque lecture de cache instrumentée."""
+    registry.inc(
+        "softdesk_cache_requests_total", (cache_name, "hit" if hit else "miss")
+    )
+
+
+class _QueryTimer:
+    """execute_wrapper minimal : nombre et durée des requêtes SQL."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+class MetricsMiddleware:
+    """Mesure chaque requête HTTP ; à placer en tête de MIDDLEWARE."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.METRICS["ENABLED"]:
+            return self.get_response(request)
+
+        timer = _QueryTimer()
+        registry.inc("softdesk_http_requests_in_flight", (), 1)
+        start = time.perf_counter()
+        status = 500
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all(initialized_only=False):
+                    stack.enter_context(connection.execute_wrapper(timer))
+                response = self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            elapsed = time.perf_counter() - start
+            registry.inc("softdesk_http_requests_in_flight", (), -1)
+
+            match = getattr(request, "resolver_match", None)
+            route = (match.url_name or match.view_name) if match else "unmatched"
+            method = request.method if request.method in HTTP_METHODS else "other"
+            registry.inc("softdesk_http_requests_total", (route, method, str(status)))
+            registry.observe(
+                "softdesk_http_request_duration_seconds", (route, method), elapsed
+            )
+            registry.observe("softdesk_db_queries_per_request", (route,), timer.count)
+            registry.observe("softdesk_db_duration_seconds", (route,), timer.duration)
+
+
+def metrics_view(request):
+    """
+    GET /metrics/ : réservé au jeton METRICS["TOKEN"] (en-tête Authorization)
+    ou aux adresses METRICS["ALLOWED_IPS"], vides par défaut.
+    """
+    config = settings.METRICS
+    token = config["TOKEN"]
+    authorized = request.META.get("REMOTE_ADDR") in config["ALLOWED_IPS"] or bool(
+        token
+        and hmac.compare_digest(
+            request.META.get("HTTP_AUTHORIZATION", ""), f"Bearer {token}"
+        )
+    )
+    if not config["ENABLED"] or not authorized:
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4")
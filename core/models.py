@@ -0,0 +1,34 @@
+from django.db import models
+
+
+class IdSequence(models.Model):
+    """
+    Dernier identifiant réservé d'un modèle réparti entre les shards
+    (core/sharding.py). Les identifiants sont réservés par blocs dans la base
+    principale : ils restent uniques quel que soit le shard qui stocke la ligne.
+    """
+
+    name = models.CharField(max_length=100, primary_key=True)
+    value = models.BigIntegerField()
+
+    def __str__(self):
+        return f"{self.name} : {self.value}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Idempotency-Key réservée ou réponse à rejouer (core/idempotency.py,
+    stockage "database"). La clé primaire (empreinte du client et de la clé)
+    rend la réservation atomique : un seul INSERT réussit.
+    """
+
+    key = models.CharField(max_length=64, primary_key=True)
+    fingerprint = models.CharField(max_length=64)
+    # None tant que la première requête est en cours
+    status = models.PositiveSmallIntegerField(null=True)
+    headers = models.JSONField(default=list)
+    content = models.BinaryField(default=b"")
+    expires_time = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.key
@@ -0,0 +1,189 @@
+"""
+Profilage par échantillonnage des requêtes lentes (REQUEST_PROFILER dans settings.py).
+
+Un thread unique relève, toutes les INTERVAL secondes, la pile d'appels des
+threads qui traitent une requête HTTP (sys._current_frames) : le code de la
+vue n'est pas ralenti par un traceur. À la fin de la requête, le profil est
+conservé si elle a dépassé THRESHOLD_MS ou si elle fait partie de l'échantillon
+SAMPLE_RATE, puis écrit sur disque dans DIR.
+
+Stockage : un fichier JSON par profil, nommé "<route>__<horodatage>.json" ;
+seuls les MAX_PER_ROUTE plus récents sont gardés pour chaque route (tampon
+circulaire). Les piles sont au format « replié » ("a;b;c" -> nombre
+d'échantillons), lisible par les outils de flame graph.
+"""
+
+import json
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+
+from .querycount import view_label
+
+_UNSAFE = re.compile(r"[^\w.-]")
+PROFILE_ID = re.compile(r"^[\w.-]+__\d+$")
+MAX_DEPTH = 128
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})"
+
+
+class _Sampler(threading.Thread):
+    """Relève périodiquement la pile des threads enregistrés."""
+
+    def __init__(self, interval):
+        super().__init__(name="request-profiler", daemon=True)
+        self.interval = interval
+        # identifiant de thread -> Counter des piles relevées
+        self.active = {}
+        self.wakeup = threading.Event()
+        # Garantit qu'une pile n'est plus modifiée une fois l'échantillonnage arrêté
+        self.lock = threading.Lock()
+
+    def run(self):
+        while True:
+            if not self.active:
+                self.wakeup.wait()
+                self.wakeup.clear()
+            time.sleep(self.interval)
+            with self.lock:
+                frames = sys._current_frames()
+                for ident, stacks in self.active.items():
+                    frame = frames.get(ident)
+                    if frame is None:
+                        continue
+                    stack = []
+                    while frame is not None and len(stack) < MAX_DEPTH:
+                        stack.append(_frame_label(frame))
+                        frame = frame.f_back
+                    stacks[";".join(reversed(stack))] += 1
+                del frames
+
+    def start_sampling(self):
+        stacks = Counter()
+        with self.lock:
+            self.active[threading.get_ident()] = stacks
+        self.wakeup.set()
+        return stacks
+
+    def stop_sampling(self):
+        with self.lock:
+            self.active.pop(threading.get_ident(), None)
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def get_sampler():
+    global _sampler
+    with _sampler_lock:
+        if _sampler is None:
+            _sampler = _Sampler(settings.REQUEST_PROFILER["INTERVAL"])
+            _sampler.start()
+    return _sampler
+
+
+def profile_dir():
+    return Path(settings.REQUEST_PROFILER["DIR"])
+
+
+def save_profile(profile, max_per_route):
+    """Écrit un profil puis supprime les plus anciens de la même route."""
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    route = _UNSAFE.sub("_", profile["route"])
+    profile["id"] = f"{route}__{time.time_ns()}"
+    (directory / f"{profile['id']}.json").write_text(
+        json.dumps(profile), encoding="utf-8"
+    )
+    for old in sorted(directory.glob(f"{route}__*.json"))[:-max_per_route]:
+        old.unlink(missing_ok=True)
+    return profile["id"]
+
+
+def list_profiles(route=None):
+    """Résumés des profils enregistrés, du plus récent au plus ancien."""
+    directory = profile_dir()
+    if not directory.exists():
+        return []
+    pattern = f"{_UNSAFE.sub('_', route)}__*.json" if route else "*__*.json"
+    summaries = []
+    for path in directory.glob(pattern):
+        try:
+            profile = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            # Fichier supprimé ou en cours d'écriture
+            continue
+        profile.pop("stacks", None)
+        summaries.append(profile)
+    return sorted(summaries, key=lambda p: p["created"], reverse=True)
+
+
+def load_profile(profile_id):
+    """Profil complet, ou None si l'identifiant est invalide ou inconnu."""
+    if not PROFILE_ID.match(profile_id):
+        return None
+    path = profile_dir() / f"{profile_id}.json"
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+class RequestProfilerMiddleware:
+    """Échantillonne la pile des requêtes et conserve celles qui sont lentes."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        config = settings.REQUEST_PROFILER
+        if not config["ENABLED"]:
+            return self.get_response(request)
+
+        sampled = random.random() < config["SAMPLE_RATE"]
+        if not sampled and config["THRESHOLD_MS"] is None:
+            return self.get_response(request)
+
+        sampler = get_sampler()
+        request.profile_label = None
+        stacks = sampler.start_sampling()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            sampler.stop_sampling()
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        threshold = config["THRESHOLD_MS"]
+        slow = threshold is not None and duration_ms >= threshold
+        if (slow or sampled) and stacks:
+            save_profile(
+                {
+                    "route": request.profile_label or "unmatched",
+                    "method": request.method,
+                    "path": request.path,
+                    "status": response.status_code,
+                    "reason": "threshold" if slow else "sample",
+                    "duration_ms": round(duration_ms, 2),
+                    "created": time.time(),
+                    "interval_ms": config["INTERVAL"] * 1000,
+                    "samples": sum(stacks.values()),
+                    "stacks": stacks.most_common(),
+                },
+                config["MAX_PER_ROUTE"],
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if hasattr(request, "profile_label"):
+            request.profile_label = view_label(view_func, request.method)
@@ -0,0 +1,108 @@
+"""
+Instrumentation des requêtes SQL par requête HTTP (nombre, durée, motifs répétés).
+
+QueryBudgetMiddleware :
+- compte les requêtes SQL et leur durée totale pendant la vue
+- étiquette la requête HTTP avec l'action du viewset (ex. "IssueViewSet.list")
+- ajoute un en-tête Server-Timing lisible dans les outils de développement
+- journalise un avertissement quand le budget (QUERY_BUDGET) est dépassé,
+  avec les motifs répétés : signe typique d'un problème N+1
+"""
+
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger("softdesk.queries")
+
+_IN_LIST = re.compile(r"IN \((?:%s, )*%s\)")
+_NUMBERS = re.compile(r"\b\d+\b")
+
+
+def normalize_sql(sql):
+    """Réduit une requête à son motif (listes IN et nombres littéraux remplacés)."""
+    return _NUMBERS.sub("N", _IN_LIST.sub("IN (...)", sql))
+
+
+class QueryRecorder:
+    """execute_wrapper qui enregistre chaque requête exécutée sur une connexion."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.patterns = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.patterns[normalize_sql(sql)] += 1
+
+    def repeated(self, threshold):
+        """Motifs exécutés au moins threshold fois."""
+        return [(sql, n) for sql, n in self.patterns.most_common() if n >= threshold]
+
+
+def view_label(view_func, method):
+    """Étiquette d'une vue : "IssueViewSet.list", "UserProfileView.get"..."""
+    cls = getattr(view_func, "cls", None)
+    if cls is None:
+        return getattr(view_func, "__name__", "unknown")
+    actions = getattr(view_func, "actions", None) or {}
+    return f"{cls.__name__}.{actions.get(method.lower(), method.lower())}"
+
+
+class QueryBudgetMiddleware:
+    """Mesure les requêtes SQL de chaque requête HTTP (voir QUERY_BUDGET)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        config = settings.QUERY_BUDGET
+        if not config["ENABLED"]:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        request.query_recorder = recorder
+        request.view_label = None
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all(initialized_only=False):
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        label = request.view_label or request.path
+        response["Server-Timing"] = ", ".join(
+            [
+                f'db;dur={recorder.duration * 1000:.2f};desc="{recorder.count} queries"',
+                f"app;dur={elapsed * 1000:.2f}",
+            ]
+        )
+
+        budget = config["PER_VIEW"].get(label, config["DEFAULT"])
+        if recorder.count > budget:
+            repeated = recorder.repeated(config["REPEAT_THRESHOLD"])
+            logger.warning(
+                "%s %s : %d requêtes SQL (budget %d), %.1f ms%s",
+                label,
+                request.method,
+                recorder.count,
+                budget,
+                recorder.duration * 1000,
+                "".join(f"\n  {n} x {sql}" for sql, n in repeated),
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if hasattr(request, "query_recorder"):
+            request.view_label = view_label(view_func, request.method)
@@ -0,0 +1,43 @@
+"""
+Cache limité à une requête HTTP (ou à un lot de /api/batch/).
+
+Dans un bloc `with request_cache():`, memoize() ne calcule qu'une fois chaque
+clé : les vérifications répétées (appartenance au projet, par exemple) ne
+coûtent qu'une requête SQL. Hors d'un tel bloc, memoize() calcule toujours :
+aucun risque de servir une valeur d'une autre requête.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_cache = ContextVar("request_cache", default=None)
+
+
+@contextmanager
+def request_cache():
+    """Active le cache ; sans effet dans un bloc déjà actif (sous-requête d'un lot)."""
+    if _cache.get() is not None:
+        yield
+        return
+    token = _cache.set({})
+    try:
+        yield
+    finally:
+        _cache.reset(token)
+
+
+def memoize(key, compute):
+    """Valeur de compute() pour key, calculée une seule fois par requête."""
+    cache = _cache.get()
+    if cache is None:
+        return compute()
+    if key not in cache:
+        cache[key] = compute()
+    return cache[key]
+
+
+def invalidate():
+    """Vide le cache courant (après une écriture qui peut changer les valeurs)."""
+    cache = _cache.get()
+    if cache is not None:
+        cache.clear()
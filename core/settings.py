@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 
@@ -40,13 +41,22 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     "rest_framework",
     "corsheaders",
+    "core",
     "users",
     "projects",
     "issues",
+    "jobs",
+    "notifications",
 ]
 
 MIDDLEWARE = [
+    "core.metrics.MetricsMiddleware",
+    "core.throttling.ConcurrencyLimitMiddleware",
+    "core.compression.CompressionMiddleware",
+    "core.profiling.RequestProfilerMiddleware",
     "corsheaders.middleware.CorsMiddleware",
+    "core.db_routers.ReplicaStickinessMiddleware",
+    "core.idempotency.IdempotencyMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -54,6 +64,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "core.querycount.QueryBudgetMiddleware",
 ]
 
 ROOT_URLCONF = "core.urls"
@@ -86,6 +97,105 @@ DATABASES = {
     }
 }
 
+# Profil SQLite de production (SOFTDESK_DB_PROFILE=production) :
+# - WAL : les lecteurs ne sont plus bloqués par un écrivain (et inversement)
+# - synchronous=NORMAL : sûr en WAL, évite un fsync à chaque commit
+# - cache_size / mmap_size : pages gardées en mémoire (64 Mo) et lues par mmap (256 Mo)
+# - busy_timeout / timeout : attend un verrou au lieu d'échouer ("database is locked")
+# - transaction_mode IMMEDIATE : le verrou d'écriture est pris dès BEGIN, ce qui
+#   supprime les interblocages lors du passage lecture -> écriture
+# - CONN_MAX_AGE : connexion réutilisée d'une requête à l'autre
+DB_PROFILE = os.environ.get("SOFTDESK_DB_PROFILE", "development")
+
+SQLITE_PRODUCTION_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA busy_timeout=20000",
+    "PRAGMA temp_store=MEMORY",
+]
+
+if DB_PROFILE == "production":
+    DATABASES["default"].update(
+        {
+            "CONN_MAX_AGE": 600,
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {
+                "timeout": 20,
+                "transaction_mode": "IMMEDIATE",
+                "init_command": ";".join(SQLITE_PRODUCTION_PRAGMAS),
+            },
+        }
+    )
+
+# Réplicas en lecture (SOFTDESK_DB_REPLICAS=/chemin/replica_1.sqlite3,/chemin/replica_2.sqlite3)
+# Les GET des routes projets/issues/commentaires y sont envoyés par core.db_routers.
+# En local, python manage.py sync_replicas copie le primaire dans ces fichiers.
+DATABASE_REPLICAS = []
+for index, replica_name in enumerate(
+    filter(None, os.environ.get("SOFTDESK_DB_REPLICAS", "").split(","))
+):
+    alias = f"replica_{index}"
+    replica = {**DATABASES["default"], "NAME": replica_name, "TEST": {"MIRROR": "default"}}
+    # Un réplica refuse toute écriture
+    replica["OPTIONS"] = {
+        **replica.get("OPTIONS", {}),
+        "init_command": ";".join(
+            filter(None, [replica.get("OPTIONS", {}).get("init_command"), "PRAGMA query_only=ON"])
+        ),
+    }
+    DATABASES[alias] = replica
+    DATABASE_REPLICAS.append(alias)
+
+# Répartition des projets entre plusieurs fichiers SQLite (core/sharding.py) :
+# SOFTDESK_SHARD_COUNT=N stocke contributeurs, problèmes et commentaires d'un
+# projet dans shard_<id % N>.sqlite3, dans SOFTDESK_SHARD_DIR (par défaut
+# shards/, ignoré par git). Après un changement de N :
+# python manage.py migrate --database shard_<n>, puis python manage.py rebalance_shards
+SHARDING = {
+    "COUNT": int(os.environ.get("SOFTDESK_SHARD_COUNT", "0")),
+    "DIR": Path(os.environ.get("SOFTDESK_SHARD_DIR", BASE_DIR / "shards")),
+    # Identifiants réservés à la fois dans la base principale par chaque processus
+    "ID_BLOCK_SIZE": 100,
+}
+DATABASE_SHARDS = []
+if SHARDING["COUNT"]:
+    # SQLite crée les fichiers, pas leur dossier
+    SHARDING["DIR"].mkdir(parents=True, exist_ok=True)
+for index in range(SHARDING["COUNT"]):
+    alias = f"shard_{index}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        # Clés étrangères vers la base principale non vérifiées
+        "ENGINE": "core.backends.shard_sqlite",
+        "NAME": SHARDING["DIR"] / f"shard_{index}.sqlite3",
+    }
+    DATABASE_SHARDS.append(alias)
+
+DATABASE_ROUTERS = ["core.sharding.ShardRouter", "core.db_routers.ReplicaRouter"]
+
+# Durée (s) pendant laquelle un client lit sur le primaire après une écriture
+REPLICA_STICKINESS_SECONDS = 5
+
+# Cache Django. Par défaut, mémoire du processus ; SOFTDESK_CACHE_DIR=/chemin
+# le partage entre les processus de la machine (fichiers), ce qu'exigent les
+# réplicas (épinglage au primaire après une écriture, core/db_routers.py) et
+# le stockage "cache" de THROTTLING (voir core/checks.py)
+CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+if os.environ.get("SOFTDESK_CACHE_DIR"):
+    CACHES["default"] = {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.environ["SOFTDESK_CACHE_DIR"],
+        "OPTIONS": {
+            # Au-delà, Django supprime au hasard un tiers des entrées à chaque
+            # écriture (300 par défaut) : une entrée par client actif (seau de
+            # débit, épinglage au primaire), largement au-dessus du pic attendu
+            # (core.W001 en dessous de 10000)
+            "MAX_ENTRIES": int(os.environ.get("SOFTDESK_CACHE_MAX_ENTRIES", "100000")),
+        },
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -134,13 +244,66 @@ AUTH_USER_MODEL = "users.CustomUser"
 # REST Framework & JWT Configuration
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "core.authentication.InstrumentedJWTAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
+    # Seaux à jetons (core/throttling.py), taux définis dans THROTTLING
+    "DEFAULT_THROTTLE_CLASSES": [
+        "core.throttling.UserRateThrottle",
+        "core.throttling.AnonRateThrottle",
+    ],
+    # Nombre de proxys de confiance devant l'API : l'IP des seaux anonymes et
+    # du login est lue dans X-Forwarded-For à cette profondeur. 0 : REMOTE_ADDR
+    # seul, l'en-tête pouvant être forgé par le client
+    "NUM_PROXIES": int(os.environ.get("SOFTDESK_NUM_PROXIES", "0")),
+}
+
+# Limitation de débit et contrôle d'admission (core/throttling.py)
+THROTTLING = {
+    "ENABLED": True,
+    # "local" : mémoire du processus ; "cache" : cache Django partagé
+    "STORE": "local",
+    "SHARDS": 16,
+    # Nombre de seaux gardés par shard avant nettoyage
+    "MAX_KEYS": 10000,
+    # Capacité/période : rafale maximale et débit soutenu
+    "RATES": {
+        "user": "300/min",
+        "anon": "60/min",
+        # Par adresse IP et username visé (un tiers ne peut pas bloquer un
+        # compte depuis son adresse), puis par adresse IP seule
+        "login": "10/min",
+        "login_ip": "30/min",
+    },
+    # Requêtes simultanées par processus (0 : pas de limite), au-delà : 503
+    "MAX_CONCURRENT_REQUESTS": 64,
+    # Attente maximale d'une place avant le 503, en secondes
+    "QUEUE_TIMEOUT": 0.5,
+}
+
+# Requêtes idempotentes : en-tête Idempotency-Key (core/idempotency.py)
+IDEMPOTENCY = {
+    "ENABLED": True,
+    "METHODS": ("POST", "PATCH"),
+    # "database" : table IdempotencyKey, réservation atomique entre les processus ;
+    # "cache" : cache Django partagé à add() atomique (Redis, Memcached) ;
+    # "local" : mémoire du processus, développement seulement (check --deploy)
+    "STORE": "database",
+    # Nombre de clés gardées en mémoire (stockage "local") : au plus
+    # MAX_KEYS x MAX_RESPONSE_SIZE octets, soit 16 Mo
+    "MAX_KEYS": 1000,
+    # Durée (s) pendant laquelle une réponse peut être rejouée
+    "TTL": 24 * 3600,
+    # Durée (s) maximale de réservation d'une clé par la requête en cours
+    "LOCK_TIMEOUT": 60,
+    # Attente (s) d'un doublon simultané avant le 409
+    "WAIT_TIMEOUT": 5,
+    # Taille (octets) au-delà de laquelle une réponse n'est pas conservée
+    "MAX_RESPONSE_SIZE": 16 * 1024,
 }
 
 SIMPLE_JWT = {
@@ -150,3 +313,144 @@ SIMPLE_JWT = {
     "BLACKLIST_AFTER_ROTATION": True,
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
+
+# Opérations en masse (suppressions en cascade, exports...)
+# Nombre de lignes traitées par lot et par transaction
+BULK_BATCH_SIZE = 1000
+
+# Archivage des problèmes terminés (python manage.py archive_issues,
+# issues/archive.py) : âge minimal, en jours, depuis le passage à "finished"
+ISSUE_ARCHIVE = {
+    "AFTER_DAYS": 90,
+}
+
+# Historique des problèmes et des contributeurs (issues/history.py), compacté
+# par python manage.py compact_history : lignes supprimées après RETENTION_DAYS
+# jours, modifications fusionnées par jour après MERGE_AFTER_DAYS jours
+# (None : jamais)
+ISSUE_HISTORY = {
+    "ENABLED": True,
+    "RETENTION_DAYS": 365,
+    "MERGE_AFTER_DAYS": 30,
+}
+
+# Suppression d'un projet : masqué immédiatement puis supprimé par le worker.
+# Nécessite un worker (run_worker), sans quoi les données masquées restent en
+# base ; par défaut, suppression par lots pendant la requête
+BACKGROUND_PROJECT_DELETION = os.environ.get("SOFTDESK_BACKGROUND_DELETION") == "1"
+
+# File de tâches différées (python manage.py run_worker)
+JOBS = {
+    # Durée (s) de réservation d'une tâche par un worker avant qu'elle soit reprise
+    "VISIBILITY_TIMEOUT": 300,
+    "MAX_ATTEMPTS": 3,
+    # Délai (s) avant la 1re nouvelle tentative, doublé à chaque échec
+    "RETRY_BACKOFF": 30,
+    "CONCURRENCY": 2,
+    "POLL_INTERVAL": 1.0,
+    # Dossier des fichiers produits par les tâches d'export
+    "EXPORT_DIR": BASE_DIR / "exports",
+    # Âge (jours) des tâches terminées supprimées par prune_jobs
+    "RETENTION_DAYS": 7,
+}
+
+# Notifications (notifications/events.py) : assignation d'un problème et
+# nouveaux commentaires, regroupés en un résumé par destinataire envoyé par le
+# worker DIGEST_DELAY secondes après le premier événement. Nécessite un worker
+# (run_worker), sans quoi chaque événement laisse une tâche en attente ;
+# désactivées par défaut
+NOTIFICATIONS = {
+    "ENABLED": os.environ.get("SOFTDESK_NOTIFICATIONS") == "1",
+    # ConsoleBackend, FileBackend (fichier FILE_PATH) ou EmailBackend
+    "BACKEND": "notifications.backends.ConsoleBackend",
+    "FILE_PATH": BASE_DIR / "notifications.ndjson",
+    "DIGEST_DELAY": 300,
+    # Destinataires traités par lot (calcul des destinataires, envoi)
+    "BATCH_SIZE": 500,
+    # Événements détaillés par résumé, les suivants sont comptés
+    "MAX_EVENTS_PER_DIGEST": 20,
+}
+
+# Instrumentation SQL par requête (core/querycount.py) : en-tête Server-Timing
+# et avertissement "softdesk.queries" au-delà du budget de requêtes
+QUERY_BUDGET = {
+    "ENABLED": DEBUG,
+    # Nombre maximal de requêtes SQL par requête HTTP
+    "DEFAULT": 15,
+    # Budgets par action de viewset, ex. {"IssueViewSet.list": 5}
+    "PER_VIEW": {},
+    # Un même motif exécuté au moins autant de fois est signalé (N+1 probable)
+    "REPEAT_THRESHOLD": 3,
+}
+
+# Lecture des usernames dans les copies dénormalisées de Issue, Comment et
+# Contributor plutôt que par jointure (users/fields.py). À activer après
+# python manage.py backfill_usernames. Toujours actif avec les shards (pas de
+# jointure possible vers la table des utilisateurs). Les renommages sont
+# recopiés par le worker (tâche users.propagate_username) : sans run_worker,
+# les anciens usernames restent affichés.
+DENORMALIZED_USERNAMES = (
+    os.environ.get("SOFTDESK_DENORMALIZED_USERNAMES") == "1" or bool(DATABASE_SHARDS)
+)
+
+# Pages d'administration des grandes tables (core/admin.py) : nombre de
+# lignes au-delà duquel le comptage s'arrête
+ADMIN_COUNT_LIMIT = 10000
+
+# Requêtes groupées (POST /api/batch/, projects/batch.py)
+BATCH = {
+    "MAX_REQUESTS": 20,
+    # Threads pour les lots de lectures exécutés en parallèle ("concurrent": true)
+    "MAX_WORKERS": 4,
+}
+
+# Compression des réponses (core/compression.py) : zstd et brotli si les
+# paquets zstandard / brotli sont installés, gzip sinon
+COMPRESSION = {
+    "ENABLED": True,
+    # Taille minimale (octets) d'une réponse non streaming à compresser
+    "MIN_SIZE": 1024,
+    "GZIP_LEVEL": 6,
+    "BROTLI_QUALITY": 4,
+    "ZSTD_LEVEL": 3,
+    "CONTENT_TYPES": [
+        "application/json",
+        "application/x-ndjson",
+        "text/csv",
+        "text/html",
+        "text/plain",
+    ],
+    # Routes dont les réponses contiennent un secret (BREACH) : jamais compressées
+    "EXCLUDED_ROUTES": ["token_obtain_pair", "token_refresh"],
+}
+
+# Métriques Prometheus (core/metrics.py), exposées sur /metrics/
+METRICS = {
+    "ENABLED": True,
+    # Accès avec l'en-tête "Authorization: Bearer <jeton>" (refusé sans jeton)...
+    "TOKEN": os.environ.get("SOFTDESK_METRICS_TOKEN", ""),
+    # ... ou depuis ces adresses, séparées par des virgules (aucune par défaut).
+    # Comparées à REMOTE_ADDR : derrière un reverse proxy local, toutes les
+    # requêtes viennent de 127.0.0.1
+    "ALLOWED_IPS": list(
+        filter(None, os.environ.get("SOFTDESK_METRICS_ALLOWED_IPS", "").split(","))
+    ),
+    # Nombre de shards verrouillés indépendamment entre lesquels les threads
+    # sont répartis
+    "SHARDS": 16,
+}
+
+# Profilage par échantillonnage des requêtes lentes (core/profiling.py),
+# consultable par les administrateurs sur /api/profiles/
+REQUEST_PROFILER = {
+    "ENABLED": os.environ.get("SOFTDESK_PROFILER") == "1",
+    # Profil conservé au-delà de cette durée (None : échantillon seul)
+    "THRESHOLD_MS": 500,
+    # Part des requêtes profilées quelle que soit leur durée (0.01 = 1 %)
+    "SAMPLE_RATE": 0.0,
+    # Intervalle entre deux relevés de pile, en secondes
+    "INTERVAL": 0.005,
+    "DIR": BASE_DIR / "profiles",
+    # Taille du tampon circulaire, par route
+    "MAX_PER_ROUTE": 20,
+}
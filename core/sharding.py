@@ -0,0 +1,260 @@
+"""
+Répartition des données des projets entre plusieurs bases SQLite
+(SHARDING et DATABASE_SHARDS dans core/settings.py).
+
+Avec SOFTDESK_SHARD_COUNT=N, les contributeurs, problèmes et commentaires (et
+leurs archives, et l'historique) d'un projet sont stockés dans le fichier
+shard_<id % N>. Les
+projets et les utilisateurs restent dans la base principale. Chaque fichier a
+son propre verrou d'écriture : les écritures de projets différents ne se
+bloquent plus entre elles.
+
+- ShardRouter choisit le shard d'après l'instance liée (projet, problème...)
+  ou, à défaut, le shard actif (use_project_shard), posé par
+  ProjectShardMixin pour les routes /api/projects/{project_pk}/... Une
+  requête sur un modèle réparti sans shard connu lève ShardingError plutôt
+  que de lire les tables vides de la base principale.
+- Aucune jointure entre un shard et la base principale : select_related
+  limité à joinable(), usernames dénormalisés (DENORMALIZED_USERNAMES).
+- Requêtes centrées sur un utilisateur (ses projets, son export, sa
+  suppression) : each_shard() les exécute dans chaque shard.
+- Identifiants uniques entre les shards (IdSequence, réservés par blocs) :
+  un projet déplacé par rebalance_shards garde les ids de ses lignes.
+"""
+
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F, Max
+
+from .request_cache import request_cache
+
+# Modèles répartis -> modèles qui partagent leurs identifiants (archives)
+SHARDED_MODELS = {
+    "projects.contributor": [],
+    "issues.issue": ["issues.archivedissue"],
+    "issues.comment": ["issues.archivedcomment"],
+    "issues.archivedissue": [],
+    "issues.archivedcomment": [],
+    "issues.historyentry": [],
+}
+
+# Shard des requêtes sans instance liée (None : aucun)
+_current_shard = ContextVar("current_shard", default=None)
+
+
+class ShardingError(RuntimeError):
+    """Requête sur un modèle réparti dont le shard ne peut pas être déterminé."""
+
+
+def sharding_enabled():
+    return bool(settings.DATABASE_SHARDS)
+
+
+def is_sharded(model):
+    return model._meta.label_lower in SHARDED_MODELS
+
+
+def shard_for_project(project_id):
+    """Alias de la base qui stocke les données du projet project_id."""
+    shards = settings.DATABASE_SHARDS
+    return shards[int(project_id) % len(shards)]
+
+
+@contextmanager
+def use_shard(alias):
+    """Envoie les requêtes sans instance liée vers le shard alias."""
+    token = _current_shard.set(alias)
+    try:
+        yield alias
+    finally:
+        _current_shard.reset(token)
+
+
+@contextmanager
+def use_project_shard(project_id):
+    """use_shard() sur le shard du projet (sans effet sans sharding)."""
+    if not sharding_enabled() or project_id is None:
+        yield None
+        return
+    with use_shard(shard_for_project(project_id)) as alias:
+        yield alias
+
+
+def in_each_shard():
+    """Active chaque shard à son tour (une seule itération, None, sans sharding)."""
+    for alias in settings.DATABASE_SHARDS or [None]:
+        with use_shard(alias):
+            yield alias
+
+
+def on_project_shard(queryset, project_id):
+    """queryset lu dans le shard du projet (inchangé sans sharding)."""
+    if not sharding_enabled() or not is_sharded(queryset.model):
+        return queryset
+    return queryset.using(shard_for_project(project_id))
+
+
+def each_shard(queryset):
+    """Le queryset pour chaque shard ([queryset] sans sharding ou modèle non réparti)."""
+    if not sharding_enabled() or not is_sharded(queryset.model):
+        return [queryset]
+    return [queryset.using(alias) for alias in settings.DATABASE_SHARDS]
+
+
+def joinable(*relations):
+    """Relations à passer à select_related, sauf celles hors du shard (projet)."""
+    return [] if sharding_enabled() else list(relations)
+
+
+def _project_id(instance):
+    if instance._meta.label_lower == "projects.project":
+        return instance.pk
+    return getattr(instance, "project_id", None)
+
+
+class ShardRouter:
+    """Route les modèles répartis vers le shard de leur projet."""
+
+    def _db(self, model, hints, write=False):
+        if not sharding_enabled() or not is_sharded(model):
+            return None
+        instance = hints.get("instance")
+        if instance is not None:
+            if instance._state.db in settings.DATABASE_SHARDS:
+                return instance._state.db
+            project_id = _project_id(instance)
+            if project_id is not None:
+                return shard_for_project(project_id)
+        shard = _current_shard.get()
+        if shard is not None:
+            return shard
+        if write and instance is not None and not is_sharded(type(instance)):
+            # Base provisoire d'un nouvel objet (affectation user=...) : save()
+            # le route ensuite d'après lui-même, donc son project_id
+            return None
+        raise ShardingError(
+            f"Requête sur {model._meta.label} sans shard : passer par "
+            "use_project_shard(), on_project_shard() ou each_shard()."
+        )
+
+    def db_for_read(self, model, **hints):
+        return self._db(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self._db(model, hints, write=True)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Les clés étrangères d'un shard pointent vers la base principale
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_SHARDS:
+            return f"{app_label}.{model_name}" in SHARDED_MODELS
+        return None
+
+
+class ProjectShardMixin:
+    """
+    Viewset des routes /api/projects/{project_pk}/... : les requêtes sans
+    instance liée partent vers le shard du projet de l'URL, et memoize()
+    (core/request_cache.py) est actif pendant la requête.
+    """
+
+    shard_url_kwarg = "project_pk"
+
+    def dispatch(self, request, *args, **kwargs):
+        # Projets supprimés et appartenance lus une fois pour toute la requête
+        with use_project_shard(kwargs.get(self.shard_url_kwarg)), request_cache():
+            return super().dispatch(request, *args, **kwargs)
+
+
+def _max_id(model):
+    """Plus grand id de model (et des modèles qui partagent ses ids), toutes bases confondues."""
+    labels = [model._meta.label_lower, *SHARDED_MODELS[model._meta.label_lower]]
+    largest = 0
+    for label in labels:
+        related = apps.get_model(label)
+        for alias in ["default", *settings.DATABASE_SHARDS]:
+            value = related._base_manager.using(alias).aggregate(m=Max("pk"))["m"]
+            largest = max(largest, value or 0)
+    return largest
+
+
+def _reserve(model, size):
+    """Réserve size identifiants ; retourne le dernier."""
+    from .models import IdSequence
+
+    name = model._meta.label_lower
+    connection = connections["default"]
+    if connection.features.can_return_columns_from_insert:
+        # Séquence existante : une seule instruction, atomique sans transaction
+        table = connection.ops.quote_name(IdSequence._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET value = value + %s WHERE name = %s RETURNING value",
+                [size, name],
+            )
+            row = cursor.fetchone()
+        if row is not None:
+            return row[0]
+    with transaction.atomic(using="default"):
+        # L'UPDATE prend le verrou d'écriture : pas de réservation concurrente
+        if not IdSequence.objects.filter(name=name).update(value=F("value") + size):
+            IdSequence.objects.create(name=name, value=_max_id(model) + size)
+        return IdSequence.objects.get(name=name).value
+
+
+def sync_id_sequences():
+    """
+    Remonte les séquences existantes au-dessus du plus grand id de leur
+    modèle (lignes insérées sans sharding, par exemple par generate_data).
+    """
+    from .models import IdSequence
+
+    for name in SHARDED_MODELS:
+        largest = _max_id(apps.get_model(name))
+        IdSequence.objects.filter(name=name, value__lt=largest).update(value=largest)
+
+
+class IdAllocator:
+    """Identifiants réservés par blocs de SHARDING["ID_BLOCK_SIZE"], par processus."""
+
+    def __init__(self):
+        # label -> [prochain id, dernier id réservé]
+        self.blocks = {}
+        self.lock = threading.Lock()
+
+    def allocate(self, model, count):
+        ids = []
+        with self.lock:
+            block = self.blocks.setdefault(model._meta.label_lower, [1, 0])
+            while len(ids) < count:
+                if block[0] > block[1]:
+                    size = max(settings.SHARDING["ID_BLOCK_SIZE"], count - len(ids))
+                    block[1] = _reserve(model, size)
+                    block[0] = block[1] - size + 1
+                taken = min(count - len(ids), block[1] - block[0] + 1)
+                ids.extend(range(block[0], block[0] + taken))
+                block[0] += taken
+        return ids
+
+
+allocator = IdAllocator()
+
+
+def assign_ids(objs):
+    """
+    Renseigne l'id des nouveaux objets d'un modèle réparti, avant save() ou
+    bulk_create(). Retourne False sans sharding (la base attribue les ids).
+    """
+    objs = [obj for obj in objs if obj.pk is None]
+    if not sharding_enabled() or not objs:
+        return False
+    for obj, pk in zip(objs, allocator.allocate(type(objs[0]), len(objs))):
+        obj.pk = pk
+    return True
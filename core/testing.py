@@ -0,0 +1,102 @@
+"""
+Outils de test partagés par les applications.
+
+QueryBudgetTestMixin.assertMaxQueries vérifie le nombre de requêtes SQL d'un
+bloc de code (typiquement un appel à un endpoint) et, en cas d'échec, affiche
+les requêtes regroupées par motif pour repérer immédiatement un N+1 :
+
+    class IssueEndpointTests(QueryBudgetTestMixin, APITestCase):
+        def test_list(self):
+            with self.assertMaxQueries(5):
+                self.client.get(f"/api/projects/{self.project.pk}/issues/")
+
+ShardedTestMixin rend un TestCase exécutable avec SOFTDESK_SHARD_COUNT=N
+(voir core/sharding.py) :
+
+    SOFTDESK_SHARD_COUNT=2 python manage.py test
+"""
+
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from .querycount import normalize_sql
+from .sharding import use_project_shard, use_shard
+
+# Requête de plus par requête HTTP en mode shards : ids des projets supprimés,
+# exclus des contributions sans jointure (ContributorQuerySet.active)
+SHARD_QUERIES = 1 if settings.DATABASE_SHARDS else 0
+
+# Requêtes d'une lecture répétée dans chaque shard (each_shard), une sans shards
+PER_SHARD = max(len(settings.DATABASE_SHARDS), 1)
+
+
+class ShardFreeAPIClient(APIClient):
+    """Client de test dont les requêtes ne voient pas le shard actif du test."""
+
+    def request(self, **kwargs):
+        with use_shard(None):
+            return super().request(**kwargs)
+
+
+class ShardedTestMixin:
+    """
+    Mixin pour TestCase : toutes les bases (shards compris) sont ouvertes aux
+    tests, et les requêtes sans instance liée du test partent vers le shard
+    de self.project. Les fixtures de setUpTestData choisissent le leur avec
+    use_project_shard(). Les requêtes du client de test repartent sans shard
+    actif : une vue qui oublie de choisir le sien lève ShardingError, comme
+    en production.
+    """
+
+    databases = "__all__"
+    client_class = ShardFreeAPIClient
+
+    def setUp(self):
+        super().setUp()
+        project = getattr(self, "project", None)
+        if project is not None:
+            self.enterContext(use_project_shard(project.pk))
+
+    @classmethod
+    @contextmanager
+    def captureOnCommitCallbacks(cls, *, using=None, execute=False):
+        """Sans using : callbacks de toutes les bases (un problème valide dans son shard)."""
+        aliases = [using] if using else ["default", *settings.DATABASE_SHARDS]
+        capture = super().captureOnCommitCallbacks
+        callbacks = []
+        with ExitStack() as stack:
+            captured = [
+                stack.enter_context(capture(using=alias, execute=execute))
+                for alias in aliases
+            ]
+            yield callbacks
+        for alias_callbacks in captured:
+            callbacks.extend(alias_callbacks)
+
+
+class QueryBudgetTestMixin:
+    """Mixin pour TestCase : assertions sur le nombre de requêtes SQL."""
+
+    @contextmanager
+    def assertMaxQueries(self, max_queries):
+        """Requêtes de toutes les bases (principale et shards) additionnées."""
+        with ExitStack() as stack:
+            contexts = [
+                stack.enter_context(CaptureQueriesContext(connections[alias]))
+                for alias in ["default", *settings.DATABASE_SHARDS]
+            ]
+            yield
+
+        queries = [q for context in contexts for q in context.captured_queries]
+        executed = len(queries)
+        if executed > max_queries:
+            patterns = Counter(normalize_sql(q["sql"]) for q in queries)
+            details = "\n".join(f"  {n} x {sql}" for sql, n in patterns.most_common())
+            self.fail(
+                f"{executed} requêtes SQL exécutées, {max_queries} au maximum :\n{details}"
+            )
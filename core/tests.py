@@ -0,0 +1,816 @@
+import gzip
+import importlib
+import json
+import os
+import tempfile
+import threading
+import time
+from io import StringIO
+from pathlib import Path
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.state import token_backend
+from rest_framework_simplejwt.tokens import AccessToken
+
+from issues.models import Comment, Issue
+from projects.models import Contributor, Project
+from projects.views import ProjectViewSet
+from users.models import CustomUser
+from .authentication import InstrumentedJWTAuthentication
+from .checks import (
+    check_cache_size,
+    check_idempotency_store,
+    check_replica_cache,
+    check_shared_stores,
+)
+from .compression import CompressionMiddleware, Gzip, Zstd, negotiate
+from .db_routers import ReplicaRouter, ReplicaStickinessMiddleware
+from .idempotency import (
+    CacheIdempotencyStore,
+    DatabaseIdempotencyStore,
+    IdempotencyMiddleware,
+    LocalIdempotencyStore,
+)
+from .management.commands.profile_startup import parse_importtime
+from .metrics import MetricsRegistry, registry
+from .models import IdempotencyKey, IdSequence
+from .profiling import RequestProfilerMiddleware, list_profiles, load_profile
+from .sharding import (
+    IdAllocator,
+    ShardingError,
+    each_shard,
+    shard_for_project,
+    use_project_shard,
+    use_shard,
+)
+from .testing import ShardedTestMixin
+from .throttling import ConcurrencyLimitMiddleware, LocalBucketStore
+from .warmup import STEPS, warm_up
+
+
+@override_settings(DATABASE_REPLICAS=["replica_0"], REPLICA_STICKINESS_SECONDS=5)
+class ReplicaRoutingTests(SimpleTestCase):
+    """Lectures des GET sur réplica, sauf pour un client qui vient d'écrire."""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def call(self, method, user_id=1, status=200):
+        """Passe une requête dans le middleware ; retourne les bases choisies par le routeur."""
+        routed = {}
+
+        def view(request):
+            router = ReplicaRouter()
+            routed["issue"] = router.db_for_read(Issue)
+            routed["project"] = router.db_for_read(Project)
+            routed["user"] = router.db_for_read(CustomUser)
+            routed["write"] = router.db_for_write(Issue)
+            return HttpResponse(status=status)
+
+        # Nouveau jeton à chaque requête (jti différent), comme après un rafraîchissement
+        token = AccessToken.for_user(CustomUser(pk=user_id))
+        request = getattr(self.factory, method)("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        ReplicaStickinessMiddleware(view)(request)
+        return routed
+
+    def test_safe_reads_go_to_a_replica(self):
+        self.assertEqual(
+            self.call("get"),
+            {
+                "issue": "replica_0",
+                "project": "replica_0",
+                "user": "default",
+                "write": "default",
+            },
+        )
+        self.assertEqual(self.call("post")["issue"], "default")
+        # Hors requête : worker, commandes
+        self.assertEqual(ReplicaRouter().db_for_read(Issue), "default")
+
+    @override_settings(DATABASE_REPLICAS=[f"replica_{i}" for i in range(8)])
+    def test_one_replica_per_request(self):
+        for _ in range(10):
+            routed = self.call("get")
+            self.assertEqual(routed["issue"], routed["project"])
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        self.assertEqual(self.call("get")["issue"], "default")
+
+    def test_client_is_pinned_after_a_write(self):
+        self.call("patch")
+        # Épinglé par utilisateur : un autre jeton du même utilisateur aussi
+        self.assertEqual(self.call("get")["issue"], "default")
+        # Les autres clients ne sont pas concernés
+        self.assertEqual(self.call("get", user_id=2)["issue"], "replica_0")
+
+        with mock.patch("core.db_routers.time.time", return_value=time.time() + 6):
+            self.assertEqual(self.call("get")["issue"], "replica_0")
+
+    def test_failed_write_does_not_pin(self):
+        self.call("post", status=400)
+        self.assertEqual(self.call("get")["issue"], "replica_0")
+
+    def test_check_requires_a_shared_cache(self):
+        self.assertEqual([e.id for e in check_replica_cache(None)], ["core.E001"])
+        backend = "django.core.cache.backends.filebased.FileBasedCache"
+        with override_settings(CACHES={"default": {"BACKEND": backend}}):
+            self.assertEqual(check_replica_cache(None), [])
+        with override_settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(check_replica_cache(None), [])
+
+    def test_check_cache_size(self):
+        backend = "django.core.cache.backends.filebased.FileBasedCache"
+        with override_settings(CACHES={"default": {"BACKEND": backend}}):
+            self.assertEqual([e.id for e in check_cache_size(None)], ["core.W001"])
+        sized = {"BACKEND": backend, "OPTIONS": {"MAX_ENTRIES": 100000}}
+        with override_settings(CACHES={"default": sized}):
+            self.assertEqual(check_cache_size(None), [])
+
+
+class MetricsTests(SimpleTestCase):
+    def test_labels_are_escaped(self):
+        metrics = MetricsRegistry(shards=2)
+        metrics.inc("softdesk_cache_requests_total", ('a"b\\c\nd', "hit"))
+        self.assertIn(
+            'softdesk_cache_requests_total{cache="a\\"b\\\\c\\nd",result="hit"} 1',
+            metrics.render(),
+        )
+
+    def test_threads_share_a_fixed_number_of_shards(self):
+        metrics = MetricsRegistry(shards=4)
+
+        def work():
+            for _ in range(100):
+                metrics.inc("softdesk_requests_rejected_total", ("rate_limit",))
+            metrics.observe("softdesk_auth_duration_seconds", ("decode",), 60.0)
+
+        threads = [threading.Thread(target=work) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        values, histograms = metrics.collect()
+        self.assertEqual(len(metrics._shards), 4)
+        self.assertEqual(
+            values[("softdesk_requests_rejected_total", ("rate_limit",))], 2000
+        )
+        # Au-delà du dernier bucket : compté seulement dans +Inf
+        data = histograms[("softdesk_auth_duration_seconds", ("decode",))]
+        self.assertEqual((sum(data[:-2]), data[-2], data[-1]), (0, 1200.0, 20))
+
+    def test_unknown_methods_are_grouped(self):
+        def requests_total(method):
+            values, _ = registry.collect()
+            return sum(
+                value
+                for (name, labels), value in values.items()
+                if name == "softdesk_http_requests_total" and labels[1] == method
+            )
+
+        before = requests_total("other")
+        self.client.generic("BREW", "/api/projects/")
+        self.client.generic("PROPFIND", "/api/projects/")
+        self.assertEqual(requests_total("other"), before + 2)
+        self.assertEqual(requests_total("BREW"), 0)
+
+    def test_metrics_view_access(self):
+        # Sans jeton ni adresse autorisée : refusé, même en local (reverse proxy)
+        with override_settings(METRICS={**settings.METRICS, "TOKEN": "", "ALLOWED_IPS": []}):
+            self.assertEqual(self.client.get("/metrics/").status_code, 403)
+        with override_settings(METRICS={**settings.METRICS, "TOKEN": "secret"}):
+            response = self.client.get("/metrics/", HTTP_AUTHORIZATION="Bearer secret")
+            self.assertEqual(response.status_code, 200)
+            response = self.client.get("/metrics/", HTTP_AUTHORIZATION="Bearer autre")
+            self.assertEqual(response.status_code, 403)
+        with override_settings(METRICS={**settings.METRICS, "ALLOWED_IPS": ["10.0.0.5"]}):
+            self.assertEqual(
+                self.client.get("/metrics/", REMOTE_ADDR="10.0.0.5").status_code, 200
+            )
+            response = self.client.get("/metrics/", REMOTE_ADDR="203.0.113.1")
+            self.assertEqual(response.status_code, 403)
+
+
+class RequestProfilerTests(APITestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        overrides = override_settings(
+            REQUEST_PROFILER={
+                "ENABLED": True,
+                "THRESHOLD_MS": 20,
+                "SAMPLE_RATE": 0.0,
+                "INTERVAL": 0.001,
+                "DIR": Path(directory.name),
+                "MAX_PER_ROUTE": 2,
+            }
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def profile_request(self, delay):
+        """Requête traitée en delay secondes par la vue ProjectViewSet.list."""
+
+        def view(request):
+            time.sleep(delay)
+            return HttpResponse()
+
+        view.cls, view.actions = ProjectViewSet, {"get": "list"}
+        middleware = RequestProfilerMiddleware(view)
+        request = RequestFactory().get("/api/projects/")
+
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            return view(request)
+
+        middleware.get_response = get_response
+        middleware(request)
+
+    def test_slow_requests_are_kept_per_route(self):
+        self.profile_request(0)
+        self.assertEqual(list_profiles(), [])
+
+        for _ in range(3):
+            self.profile_request(0.05)
+        profiles = list_profiles()
+        # Tampon circulaire : MAX_PER_ROUTE profils gardés par route
+        self.assertEqual(len(profiles), 2)
+        self.assertEqual(profiles[0]["route"], "ProjectViewSet.list")
+        self.assertEqual(profiles[0]["reason"], "threshold")
+        self.assertGreater(profiles[0]["samples"], 0)
+        self.assertNotIn("stacks", profiles[0])
+
+        stacks = load_profile(profiles[0]["id"])["stacks"]
+        self.assertTrue(any("view (tests.py:" in stack for stack, _ in stacks))
+
+    def test_disabled(self):
+        with override_settings(REQUEST_PROFILER={"ENABLED": False}):
+            self.profile_request(0.05)
+        self.assertEqual(list_profiles(), [])
+
+    def test_views_are_staff_only(self):
+        self.profile_request(0.05)
+        profile_id = list_profiles()[0]["id"]
+        user = CustomUser.objects.create_user("user", password="x")
+        admin = CustomUser.objects.create_user("admin", password="x", is_staff=True)
+
+        self.client.force_authenticate(user)
+        self.assertEqual(self.client.get("/api/profiles/").status_code, 403)
+        response = self.client.get(f"/api/profiles/{profile_id}/")
+        self.assertEqual(response.status_code, 403)
+
+        self.client.force_authenticate(admin)
+        response = self.client.get("/api/profiles/", {"route": "ProjectViewSet.list"})
+        self.assertEqual([p["id"] for p in response.data], [profile_id])
+        response = self.client.get(f"/api/profiles/{profile_id}/")
+        self.assertIn("stacks", response.data)
+        # Identifiant inconnu ou hors du dossier des profils
+        for unknown in ("inconnu__1", "..__1", "route"):
+            response = self.client.get(f"/api/profiles/{unknown}/")
+            self.assertEqual(response.status_code, 404, unknown)
+
+
+class TokenBucketTests(SimpleTestCase):
+    def test_bucket_refills_continuously(self):
+        store = LocalBucketStore(shards=2, max_keys=100)
+        with mock.patch("core.throttling.time.monotonic", return_value=100.0) as now:
+            # Capacité 2, un jeton par seconde
+            self.assertEqual(store.consume("k", 2, 1.0), 0)
+            self.assertEqual(store.consume("k", 2, 1.0), 0)
+            self.assertAlmostEqual(store.consume("k", 2, 1.0), 1.0)
+            self.assertEqual(store.consume("autre", 2, 1.0), 0)
+            now.return_value = 100.5
+            self.assertAlmostEqual(store.consume("k", 2, 1.0), 0.5)
+            now.return_value = 101.0
+            self.assertEqual(store.consume("k", 2, 1.0), 0)
+
+    def test_prune_keeps_the_number_of_buckets_bounded(self):
+        store = LocalBucketStore(shards=1, max_keys=10)
+        for i in range(50):
+            store.consume(f"k{i}", 5, 1.0)
+        self.assertLessEqual(len(store.shards[0][0]), 10)
+
+
+class ThrottlingTests(APITestCase):
+    def setUp(self):
+        overrides = override_settings(
+            THROTTLING={
+                **settings.THROTTLING,
+                "RATES": {
+                    "user": "100/min",
+                    "anon": "2/min",
+                    "login": "2/min",
+                    "login_ip": "4/min",
+                },
+            }
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        # Seaux neufs pour chaque test
+        patcher = mock.patch("core.throttling._store", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def login(self, username, address):
+        return self.client.post(
+            "/api/token/",
+            {"username": username, "password": "faux"},
+            format="json",
+            REMOTE_ADDR=address,
+        ).status_code
+
+    def test_forwarded_for_is_ignored_without_trusted_proxies(self):
+        # Vue publique (405 sur GET) : la limite anonyme s'applique avant
+        statuses = [
+            self.client.get(
+                "/api/auth/register/", HTTP_X_FORWARDED_FOR=f"198.51.100.{i}"
+            ).status_code
+            for i in range(3)
+        ]
+        self.assertEqual(statuses, [405, 405, 429])
+
+    def test_login_attempts_do_not_lock_the_account_for_others(self):
+        attacker, owner = "203.0.113.1", "198.51.100.7"
+        self.assertEqual(
+            [self.login("victime", attacker) for _ in range(3)], [401, 401, 429]
+        )
+        self.assertEqual(self.login("victime", owner), 401)
+        # L'adresse de l'attaquant reste limitée, tous usernames confondus
+        self.assertEqual(self.login("autre", attacker), 401)
+        self.assertEqual(self.login("encore", attacker), 429)
+
+
+class ConcurrencyLimitTests(SimpleTestCase):
+    @override_settings(
+        THROTTLING={
+            **settings.THROTTLING,
+            "MAX_CONCURRENT_REQUESTS": 1,
+            "QUEUE_TIMEOUT": 0.01,
+        }
+    )
+    def test_requests_over_the_limit_are_shed(self):
+        started, release = threading.Event(), threading.Event()
+
+        def view(request):
+            if request.path == "/lent/":
+                started.set()
+                release.wait(5)
+            return HttpResponse()
+
+        middleware = ConcurrencyLimitMiddleware(view)
+        factory = RequestFactory()
+        slow = threading.Thread(target=middleware, args=(factory.get("/lent/"),))
+        slow.start()
+        started.wait(5)
+        try:
+            response = middleware(factory.get("/api/projects/"))
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response["Retry-After"], "1")
+            # /metrics/ reste accessible pendant la surcharge
+            self.assertEqual(middleware(factory.get("/metrics/")).status_code, 200)
+        finally:
+            release.set()
+            slow.join()
+        self.assertEqual(middleware(factory.get("/api/projects/")).status_code, 200)
+
+    @override_settings(
+        THROTTLING={
+            **settings.THROTTLING,
+            "MAX_CONCURRENT_REQUESTS": 1,
+            "QUEUE_TIMEOUT": 0.01,
+        }
+    )
+    def test_streaming_response_keeps_its_slot_until_sent(self):
+        middleware = ConcurrencyLimitMiddleware(
+            lambda request: StreamingHttpResponse(iter([b"a", b"b"]))
+        )
+        factory = RequestFactory()
+
+        response = middleware(factory.get("/export/"))
+        self.assertEqual(middleware(factory.get("/api/projects/")).status_code, 503)
+        self.assertEqual(b"".join(response.streaming_content), b"ab")
+        response.close()
+
+        # Client déconnecté : la fermeture de la réponse libère la place
+        response = middleware(factory.get("/export/"))
+        response.close()
+        self.assertEqual(middleware(factory.get("/export/")).status_code, 200)
+
+
+@override_settings(COMPRESSION={**settings.COMPRESSION, "MIN_SIZE": 0})
+class CompressionTests(APITestCase):
+    def middleware(self, response):
+        middleware = CompressionMiddleware(lambda request: response)
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip")
+        return middleware(request)
+
+    def test_negotiate(self):
+        codecs = [Zstd(3), Gzip(6)]
+        self.assertEqual(negotiate("gzip, zstd", codecs).name, "zstd")
+        self.assertEqual(negotiate("zstd;q=0.5, gzip", codecs).name, "gzip")
+        self.assertEqual(negotiate("*", codecs).name, "zstd")
+        self.assertIsNone(negotiate("gzip;q=0, br", codecs))
+        self.assertIsNone(negotiate("", codecs))
+
+    def test_json_response_is_compressed(self):
+        body = json.dumps({"items": ["x" * 10] * 100}).encode()
+        response = self.middleware(HttpResponse(body, content_type="application/json"))
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(gzip.decompress(response.content), body)
+
+    def test_streaming_response_is_compressed(self):
+        lines = [b'{"id": %d}\n' % i for i in range(100)]
+        response = self.middleware(
+            StreamingHttpResponse(iter(lines), content_type="application/x-ndjson")
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        content = b"".join(response.streaming_content)
+        self.assertEqual(gzip.decompress(content), b"".join(lines))
+
+    def test_responses_with_secrets_are_not_compressed(self):
+        # Cookie posé (session, CSRF)
+        response = HttpResponse("x" * 2000, content_type="text/html")
+        response.set_cookie("sessionid", "secret")
+        self.assertFalse(self.middleware(response).has_header("Content-Encoding"))
+
+        # Jetons JWT du login
+        CustomUser.objects.create_user("alice", password="x")
+        response = self.client.post(
+            "/api/token/",
+            {"username": "alice", "password": "x"},
+            format="json",
+            HTTP_ACCEPT_ENCODING="gzip",
+        )
+        self.assertIn("access", response.json())
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+
+class WarmupTests(SimpleTestCase):
+    """Préchauffage des workers (core/warmup.py) et sa mesure (profile_startup)."""
+
+    # warm_databases ouvre aussi les shards (SOFTDESK_SHARD_COUNT)
+    databases = "__all__"
+
+    def test_warm_up_runs_every_step(self):
+        timings = warm_up()
+        self.assertEqual(list(timings), [name for name, _ in STEPS])
+        for name, (duration, count) in timings.items():
+            self.assertGreaterEqual(duration, 0, name)
+            self.assertGreater(count, 0, name)
+        # Caches gardés par le processus
+        self.assertTrue(Issue._meta._get_fields_cache)
+        self.assertIn("prepared_signing_key", token_backend.__dict__)
+
+    def test_wsgi_hook(self):
+        import core.wsgi
+
+        for value, calls in (("0", 0), ("1", 1)):
+            with (
+                mock.patch.dict(os.environ, {"SOFTDESK_WARMUP": value}),
+                mock.patch("core.warmup.warm_up") as warm_up_mock,
+            ):
+                importlib.reload(core.wsgi)
+            self.assertEqual(warm_up_mock.call_count, calls)
+
+    def test_parse_importtime(self):
+        output = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        300 |   django.urls\n"
+            "autre ligne\n"
+        )
+        self.assertEqual(parse_importtime(output), [("django.urls", 120, 300)])
+
+    def test_profile_startup(self):
+        out = StringIO()
+        call_command("profile_startup", top=3, stdout=out)
+        output = out.getvalue()
+        self.assertIn("django.setup()", output)
+        self.assertIn("import core.urls", output)
+        for name, _ in STEPS:
+            self.assertIn(f"warm_up : {name}", output)
+        self.assertIn("modules importés", output)
+
+
+class IdempotencyTests(ShardedTestMixin, APITestCase):
+    """Idempotency-Key : réservation, attente, rejeu, 422 et 409."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        # Stockage neuf pour chaque test
+        patcher = mock.patch("core.idempotency._store", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create_project(self, user, key, name="Projet"):
+        return self.client.post(
+            "/api/projects/",
+            {
+                "name": name,
+                "description": "Détail",
+                "type": Project.TYPE_CHOICES[0][0],
+            },
+            format="json",
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}",
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_replay_is_scoped_by_user(self):
+        alice = CustomUser.objects.create_user("alice", password="x")
+        bob = CustomUser.objects.create_user("bob", password="x")
+        first = self.create_project(alice, "k1")
+        self.assertEqual(first.status_code, 201)
+
+        # Autre jeton du même utilisateur : rejoué, sans nouveau projet
+        replay = self.create_project(alice, "k1")
+        self.assertEqual(replay.status_code, 201)
+        self.assertEqual(replay["Idempotent-Replayed"], "true")
+        self.assertEqual(replay.json(), first.json())
+        self.assertEqual(Project.objects.count(), 1)
+
+        # Même clé, autre utilisateur : exécutée
+        other = self.create_project(bob, "k1")
+        self.assertEqual(other.status_code, 201)
+        self.assertFalse(other.has_header("Idempotent-Replayed"))
+        self.assertEqual(Project.objects.count(), 2)
+
+    def test_token_is_decoded_once(self):
+        alice = CustomUser.objects.create_user("alice", password="x")
+        decode = InstrumentedJWTAuthentication.get_validated_token
+        with mock.patch.object(
+            InstrumentedJWTAuthentication,
+            "get_validated_token",
+            autospec=True,
+            side_effect=decode,
+        ) as patched:
+            self.assertEqual(self.create_project(alice, "k1").status_code, 201)
+        # Middleware puis authentification DRF : même jeton validé
+        self.assertEqual(patched.call_count, 1)
+
+    def test_key_reused_for_another_request(self):
+        alice = CustomUser.objects.create_user("alice", password="x")
+        self.create_project(alice, "k1")
+        response = self.create_project(alice, "k1", name="Autre")
+        self.assertEqual(response.status_code, 422)
+
+    def middleware(self, view):
+        return IdempotencyMiddleware(view)
+
+    def post(self, middleware, key="k"):
+        request = RequestFactory().post(
+            "/", b"{}", content_type="application/json", HTTP_IDEMPOTENCY_KEY=key
+        )
+        return middleware(request)
+
+    # Requêtes simultanées dans des threads : stockage en mémoire, la
+    # transaction du test n'étant pas visible des autres connexions
+    @override_settings(
+        IDEMPOTENCY={**settings.IDEMPOTENCY, "STORE": "local", "WAIT_TIMEOUT": 0.05}
+    )
+    def test_conflict_while_first_request_runs(self):
+        started, release = threading.Event(), threading.Event()
+
+        def view(request):
+            started.set()
+            release.wait(5)
+            return HttpResponse("ok", status=201)
+
+        middleware = self.middleware(view)
+        first = threading.Thread(target=self.post, args=(middleware,))
+        first.start()
+        started.wait(5)
+        response = self.post(middleware)
+        release.set()
+        first.join()
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response["Retry-After"], "1")
+
+    @override_settings(IDEMPOTENCY={**settings.IDEMPOTENCY, "STORE": "local"})
+    def test_concurrent_duplicates_run_once(self):
+        calls = []
+        started, release = threading.Event(), threading.Event()
+
+        def view(request):
+            calls.append(request)
+            started.set()
+            release.wait(5)
+            return HttpResponse("ok", status=201)
+
+        middleware = self.middleware(view)
+        responses = []
+        threads = [
+            threading.Thread(target=lambda: responses.append(self.post(middleware)))
+            for _ in range(2)
+        ]
+        threads[0].start()
+        started.wait(5)
+        threads[1].start()
+        # Le doublon attend la réponse de la première requête
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([r.status_code for r in responses], [201, 201])
+        self.assertEqual(
+            sorted(r.get("Idempotent-Replayed", "") for r in responses), ["", "true"]
+        )
+
+    def test_server_errors_release_the_key(self):
+        statuses = iter([503, 201])
+        middleware = self.middleware(
+            lambda request: HttpResponse(status=next(statuses))
+        )
+        self.assertEqual(self.post(middleware).status_code, 503)
+        self.assertEqual(self.post(middleware).status_code, 201)
+
+    def test_stores(self):
+        for store in (LocalIdempotencyStore(max_keys=1), CacheIdempotencyStore()):
+            with self.subTest(store=type(store).__name__):
+                owner, record = store.begin("a", "f", 60)
+                self.assertTrue(owner)
+                self.assertEqual(store.begin("a", "f", 60), (False, record))
+                # Réservation en cours : l'attente expire
+                self.assertIsNone(store.wait("a", 0.01)["response"])
+
+                waiter = threading.Thread(
+                    target=lambda: record.update(waited=store.wait("a", 5))
+                )
+                waiter.start()
+                store.finish("a", record, {"status": 201}, 60)
+                waiter.join()
+                self.assertEqual(record["waited"]["response"], {"status": 201})
+
+                store.abandon("a", store.begin("a", "f", 60)[1])
+                self.assertTrue(store.begin("a", "f", 60)[0])
+
+        # LRU : la clé la plus ancienne est oubliée
+        store = LocalIdempotencyStore(max_keys=1)
+        store.begin("a", "f", 60)
+        store.begin("b", "f", 60)
+        self.assertTrue(store.begin("a", "f", 60)[0])
+
+    def test_database_store(self):
+        store = DatabaseIdempotencyStore()
+        owner, record = store.begin("a", "f", 60)
+        self.assertTrue(owner)
+        # Un seul INSERT réussit, même d'un autre processus
+        self.assertEqual(store.begin("a", "g", 60), (False, record))
+        self.assertIsNone(store.wait("a", 0.01)["response"])
+
+        response = {"status": 201, "headers": [("X-A", "1")], "content": b"ok"}
+        store.finish("a", record, response, 60)
+        self.assertEqual(store.wait("a", 0)["response"], response)
+        # Réponse définitive : abandon sans effet
+        store.abandon("a", record)
+        self.assertFalse(store.begin("a", "f", 60)[0])
+
+        store.abandon("b", store.begin("b", "f", 60)[1])
+        self.assertTrue(store.begin("b", "f", 60)[0])
+
+        # Clé expirée : libérée à sa réutilisation, supprimée par la purge
+        IdempotencyKey.objects.update(expires_time=timezone.now())
+        self.assertTrue(store.begin("a", "f", 60)[0])
+        call_command("prune_idempotency_keys", stdout=StringIO())
+        self.assertEqual(
+            list(IdempotencyKey.objects.values_list("key", flat=True)), ["a"]
+        )
+
+    def test_checks(self):
+        file_cache = {
+            "default": {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": tempfile.gettempdir(),
+            }
+        }
+        cache_store = {**settings.IDEMPOTENCY, "STORE": "cache"}
+        throttling = {**settings.THROTTLING, "STORE": "cache"}
+        with override_settings(IDEMPOTENCY=cache_store, THROTTLING=throttling):
+            self.assertEqual(
+                [error.id for error in check_shared_stores(None)],
+                ["core.E002", "core.E003"],
+            )
+            self.assertEqual(check_idempotency_store(None), [])
+            # Cache partagé, mais add() non atomique
+            with override_settings(CACHES=file_cache):
+                self.assertEqual(
+                    [error.id for error in check_shared_stores(None)], ["core.E005"]
+                )
+        with override_settings(THROTTLING=throttling, CACHES=file_cache):
+            self.assertEqual(check_shared_stores(None), [])
+        with override_settings(IDEMPOTENCY={**settings.IDEMPOTENCY, "STORE": "local"}):
+            self.assertEqual(
+                [error.id for error in check_idempotency_store(None)], ["core.E004"]
+            )
+
+
+@skipUnless(settings.DATABASE_SHARDS, "mode shards (SOFTDESK_SHARD_COUNT=N)")
+class ShardingTests(ShardedTestMixin, TestCase):
+    """Routage, identifiants et déplacement des données entre shards (core/sharding.py)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUser.objects.create_user("author", password="x")
+        # Ids consécutifs : deux shards différents
+        cls.projects = [
+            Project.objects.create(
+                name=f"Projet {i}",
+                description="",
+                type=Project.TYPE_CHOICES[0][0],
+                author=cls.author,
+            )
+            for i in range(2)
+        ]
+        cls.issues = []
+        for project in cls.projects:
+            with use_project_shard(project.pk):
+                cls.issues.append(
+                    Issue.objects.create(
+                        title="Problème",
+                        description="",
+                        project=project,
+                        author=cls.author,
+                    )
+                )
+
+    def test_router(self):
+        with use_shard(None), self.assertRaises(ShardingError):
+            list(Issue.objects.all())
+
+        for project, issue in zip(self.projects, self.issues):
+            shard = shard_for_project(project.pk)
+            self.assertEqual(issue._state.db, shard)
+            # Un nouvel objet suit son problème, sans shard actif
+            comment = Comment(description="x", issue=issue, author=self.author)
+            with use_shard(None):
+                comment.save()
+            self.assertEqual(comment._state.db, shard)
+            others = [alias for alias in settings.DATABASE_SHARDS if alias != shard]
+            for alias in ["default", *others]:
+                self.assertFalse(Issue.objects.using(alias).filter(pk=issue.pk).exists())
+
+    def test_ids_are_unique_across_shards(self):
+        self.assertNotEqual(*(shard_for_project(p.pk) for p in self.projects))
+        self.assertNotEqual(self.issues[0].pk, self.issues[1].pk)
+
+        allocator = IdAllocator()
+        sharding = {**settings.SHARDING, "ID_BLOCK_SIZE": 2}
+        with (
+            override_settings(SHARDING=sharding),
+            CaptureQueriesContext(connections["default"]) as queries,
+        ):
+            ids = allocator.allocate(Issue, 3)
+        # Un seul bloc (au moins 3 ids), réservé en une instruction
+        self.assertEqual(len(queries), 1)
+        self.assertIn("RETURNING", queries[0]["sql"])
+        self.assertEqual(ids, list(range(ids[0], ids[0] + 3)))
+        self.assertGreater(ids[0], max(issue.pk for issue in self.issues))
+
+    def test_each_shard(self):
+        querysets = each_shard(Issue.objects.all())
+        self.assertEqual(
+            [queryset.db for queryset in querysets], settings.DATABASE_SHARDS
+        )
+        self.assertEqual(
+            sorted(pk for qs in querysets for pk in qs.values_list("pk", flat=True)),
+            sorted(issue.pk for issue in self.issues),
+        )
+        # Modèle non réparti : le queryset tel quel
+        self.assertEqual(len(each_shard(Project.objects.all())), 1)
+
+    def test_rebalance_shards(self):
+        project = self.projects[0]
+        shard = shard_for_project(project.pk)
+        # Données d'avant le sharding : dans la base principale, ids explicites
+        Contributor.objects.using("default").create(
+            id=10_000, project=project, user=self.author, role=Contributor.ROLE_AUTHOR
+        )
+        issue = Issue.objects.using("default").create(
+            id=10_000, title="Ancien", description="", project=project, author=self.author
+        )
+        Comment.objects.using("default").create(
+            id=10_000, description="x", issue=issue, author=self.author
+        )
+
+        output = StringIO()
+        call_command("rebalance_shards", batch_size=1, stdout=output)
+
+        self.assertIn("1 projets déplacés", output.getvalue())
+        for model in (Contributor, Issue, Comment):
+            self.assertFalse(model.objects.using("default").exists())
+            self.assertTrue(model.objects.using(shard).filter(pk=10_000).exists())
+        # Séquences remontées au-dessus des ids déplacés
+        self.assertGreaterEqual(IdSequence.objects.get(name="issues.issue").value, 10_000)
@@ -0,0 +1,239 @@
+"""
+Limitation de débit et contrôle d'admission (THROTTLING dans settings.py).
+
+- Seaux à jetons (token bucket) : chaque client dispose de N jetons qui se
+  rechargent en continu (taux "N/période") ; une requête consomme un jeton.
+  Les rafales courtes passent, un débit soutenu trop élevé reçoit un 429.
+- Stockage "local" : compteurs en mémoire du processus, répartis en shards
+  ayant chacun leur verrou (pas de contention globale, aucune requête réseau).
+  Stockage "cache" : cache Django partagé entre processus (lecture puis
+  écriture non atomiques : limite approximative sous forte concurrence).
+- Adresse IP des clients : REMOTE_ADDR, ou X-Forwarded-For derrière
+  REST_FRAMEWORK["NUM_PROXIES"] proxys de confiance (BaseThrottle.get_ident).
+- ConcurrencyLimitMiddleware : au-delà de MAX_CONCURRENT_REQUESTS requêtes
+  simultanées dans le processus, les suivantes attendent au plus
+  QUEUE_TIMEOUT secondes puis reçoivent un 503 : la charge est délestée
+  avant que la base de données ne sature. Une réponse en flux (exports,
+  fichiers) garde sa place jusqu'à la fin de son envoi.
+"""
+
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+from rest_framework.throttling import BaseThrottle
+
+from .metrics import registry
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """Convertit "120/min" en (capacité 120, recharge de 2 jetons par seconde)."""
+    count, period = rate.split("/")
+    capacity = int(count)
+    return capacity, capacity / PERIODS[period[0]]
+
+
+class LocalBucketStore:
+    """Seaux en mémoire, répartis en shards verrouillés indépendamment."""
+
+    def __init__(self, shards=16, max_keys=10000):
+        self.shards = [({}, threading.Lock()) for _ in range(shards)]
+        self.max_keys = max_keys
+
+    def consume(self, key, capacity, refill_rate):
+        """Consomme un jeton ; retourne 0 si accepté, sinon l'attente en secondes."""
+        buckets, lock = self.shards[hash(key) % len(self.shards)]
+        now = time.monotonic()
+        with lock:
+            tokens, last = buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - last) * refill_rate)
+            if tokens >= 1:
+                buckets[key] = (tokens - 1, now)
+                wait = 0.0
+            else:
+                buckets[key] = (tokens, now)
+                wait = (1 - tokens) / refill_rate
+            if len(buckets) > self.max_keys:
+                self._prune(buckets, now, capacity / refill_rate)
+        return wait
+
+    def _prune(self, buckets, now, full_after):
+        """Oublie les seaux pleins (équivalents à un seau neuf), puis les plus anciens."""
+        for key in [k for k, (_, last) in buckets.items() if now - last > full_after]:
+            del buckets[key]
+        if len(buckets) > self.max_keys:
+            oldest = sorted(buckets, key=lambda k: buckets[k][1])
+            for key in oldest[: len(buckets) // 2]:
+                del buckets[key]
+
+
+class CacheBucketStore:
+    """Seaux dans le cache Django, partagés entre les processus."""
+
+    def consume(self, key, capacity, refill_rate):
+        now = time.time()
+        cache_key = f"throttle:{key}"
+        tokens, last = cache.get(cache_key, (capacity, now))
+        tokens = min(capacity, tokens + (now - last) * refill_rate)
+        wait = 0.0 if tokens >= 1 else (1 - tokens) / refill_rate
+        if not wait:
+            tokens -= 1
+        cache.set(cache_key, (tokens, now), math.ceil(capacity / refill_rate))
+        return wait
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            config = settings.THROTTLING
+            if config["STORE"] == "cache":
+                _store = CacheBucketStore()
+            else:
+                _store = LocalBucketStore(config["SHARDS"], config["MAX_KEYS"])
+    return _store
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Throttle DRF à seau à jetons ; le taux vient de THROTTLING["RATES"][scope]."""
+
+    scope = None
+
+    def get_keys(self, request, view):
+        """Clés des seaux à consommer (aucune : requête non limitée)."""
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        config = settings.THROTTLING
+        if not config["ENABLED"]:
+            return True
+        capacity, refill_rate = parse_rate(config["RATES"][self.scope])
+        store = get_store()
+        self.wait_time = 0.0
+        for key in self.get_keys(request, view):
+            wait = store.consume(f"{self.scope}:{key}", capacity, refill_rate)
+            self.wait_time = max(self.wait_time, wait)
+        if self.wait_time:
+            registry.inc("softdesk_requests_rejected_total", (self.scope,))
+        return not self.wait_time
+
+    def wait(self):
+        return self.wait_time
+
+
+class UserRateThrottle(TokenBucketThrottle):
+    """Par utilisateur authentifié."""
+
+    scope = "user"
+
+    def get_keys(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return [request.user.pk]
+        return []
+
+
+class AnonRateThrottle(TokenBucketThrottle):
+    """Par adresse IP, pour les requêtes anonymes."""
+
+    scope = "anon"
+
+    def get_keys(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return []
+        return [self.get_ident(request)]
+
+
+class LoginRateThrottle(TokenBucketThrottle):
+    """
+    Connexion (/api/token/) : par adresse IP et username visé. Les essais
+    répétés sur un compte sont freinés sans que d'autres adresses puissent
+    le bloquer pour son propriétaire.
+    """
+
+    scope = "login"
+
+    def get_keys(self, request, view):
+        username = (
+            request.data.get("username") if hasattr(request.data, "get") else None
+        )
+        return [f"{self.get_ident(request)}:{str(username or '').lower()}"]
+
+
+class LoginIPRateThrottle(TokenBucketThrottle):
+    """Connexion : par adresse IP, tous usernames confondus (bourrage d'identifiants)."""
+
+    scope = "login_ip"
+
+    def get_keys(self, request, view):
+        return [self.get_ident(request)]
+
+
+class _ReleaseWhenSent:
+    """
+    Contenu d'une réponse en flux qui appelle release() une seule fois, à la
+    fin de son itération ou à la fermeture de la réponse (client déconnecté).
+    """
+
+    def __init__(self, content, release):
+        self.content = content
+        self.release = release
+        self.released = False
+
+    def __iter__(self):
+        try:
+            yield from self.content
+        finally:
+            self.close()
+
+    def close(self):
+        if not self.released:
+            self.released = True
+            self.release()
+
+
+class ConcurrencyLimitMiddleware:
+    """Limite le nombre de requêtes traitées simultanément par le processus."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = settings.THROTTLING
+        self.limit = config["MAX_CONCURRENT_REQUESTS"]
+        self.timeout = config["QUEUE_TIMEOUT"]
+        self.slots = threading.BoundedSemaphore(self.limit) if self.limit else None
+
+    def __call__(self, request):
+        # /metrics/ reste accessible pour observer la surcharge
+        if self.slots is None or request.path == "/metrics/":
+            return self.get_response(request)
+
+        if not self.slots.acquire(timeout=self.timeout):
+            registry.inc("softdesk_requests_rejected_total", ("concurrency",))
+            response = JsonResponse(
+                {"detail": "Service temporairement surchargé, réessayez plus tard."},
+                status=503,
+            )
+            response["Retry-After"] = "1"
+            return response
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            self.slots.release()
+            raise
+        # Réponse en flux : le corps est produit après le retour de la vue,
+        # la place n'est libérée qu'une fois envoyé (WSGI)
+        if response.streaming and not response.is_async:
+            response.streaming_content = _ReleaseWhenSent(
+                response.streaming_content, self.slots.release
+            )
+        else:
+            self.slots.release()
+        return response
@@ -17,20 +17,31 @@ Including another URLconf
 
 from django.contrib import admin
 from django.urls import path, include
-from rest_framework_simplejwt.views import (
-    TokenObtainPairView,
-    TokenRefreshView,
-)
+from core.metrics import metrics_view
+from core.views import RequestProfileListView, RequestProfileDetailView
+from rest_framework_simplejwt.views import TokenRefreshView
+from users.views import LoginView
 
 urlpatterns = [
     # Admin Django
     path("admin/", admin.site.urls),
+    # Métriques Prometheus (accès restreint, voir METRICS dans settings.py)
+    path("metrics/", metrics_view, name="metrics"),
+    # Profils des requêtes lentes (administrateurs)
+    path(
+        "api/profiles/", RequestProfileListView.as_view(), name="request-profile-list"
+    ),
+    path(
+        "api/profiles/<str:profile_id>/",
+        RequestProfileDetailView.as_view(),
+        name="request-profile-detail",
+    ),
     # Authentification et gestion utilisateur
     # Inclut: /api/auth/register/, /api/auth/profile/, /api/auth/profile/delete/
     path("api/auth/", include("users.urls")),
     # JWT - Login et refresh token
     path(
-        "api/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"
+        "api/token/", LoginView.as_view(), name="token_obtain_pair"
     ),  # Login
     path(
         "api/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"
@@ -39,4 +50,6 @@ urlpatterns = [
     # Inclut: /api/projects/, /api/projects/{id}/contributors/, /api/projects/{id}/issues/
     # /api/projects/{id}/issues/{id}/comments/
     path("api/", include("projects.urls")),
+    # Suivi des tâches différées : /api/jobs/, /api/jobs/{id}/, /api/jobs/{id}/download/
+    path("api/", include("jobs.urls")),
 ]
@@ -0,0 +1,33 @@
+from django.http import Http404
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .profiling import list_profiles, load_profile
+
+
+class RequestProfileListView(APIView):
+    """
+    Profils des requêtes lentes (voir core/profiling.py), réservés aux administrateurs.
+
+    GET: Résumés des profils, du plus récent au plus ancien (?route=IssueViewSet.list)
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(list_profiles(request.query_params.get("route")))
+
+
+class RequestProfileDetailView(APIView):
+    """
+    GET: Profil complet, piles d'appels repliées comprises
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, profile_id):
+        profile = load_profile(profile_id)
+        if profile is None:
+            raise Http404("Profil introuvable.")
+        return Response(profile)
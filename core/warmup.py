@@ -0,0 +1,103 @@
+"""
+Préchauffage d'un worker avant sa première requête.
+
+Sans préchauffage, la première requête d'un worker paie : la construction des
+résolveurs d'URL (routers imbriqués), celle des caches de champs et de
+relations des modèles (utilisés par les serializers), le chargement de la
+liste des mots de passe courants (CommonPasswordValidator) et l'ouverture des
+connexions à la base.
+
+core/wsgi.py appelle warm_up() au démarrage du worker si SOFTDESK_WARMUP=1.
+Le préchauffage doit avoir lieu après le fork (pas de gunicorn --preload) :
+une connexion ouverte avant le fork serait partagée entre les workers.
+
+Mesure : python manage.py profile_startup
+"""
+
+import logging
+import time
+
+from django.apps import apps
+from django.contrib.auth.password_validation import get_default_password_validators
+from django.db import connections
+from django.urls import URLPattern, URLResolver, get_resolver
+
+logger = logging.getLogger("softdesk.warmup")
+
+
+def _compile_patterns(resolver):
+    """Compile les expressions régulières de toutes les routes (paresseuses)."""
+    count = 0
+    for pattern in resolver.url_patterns:
+        pattern.pattern.regex
+        if isinstance(pattern, URLResolver):
+            count += _compile_patterns(pattern)
+        elif isinstance(pattern, URLPattern):
+            count += 1
+    return count
+
+
+def warm_urls():
+    resolver = get_resolver()
+    # Remplit les tables de reverse() et de resolve()
+    resolver.reverse_dict
+    return _compile_patterns(resolver)
+
+
+def warm_models():
+    """
+    Remplit les caches des _meta des modèles (champs, relations inverses),
+    gardés pour la vie du processus. Les champs d'un serializer sont, eux,
+    reconstruits à chaque instance : les construire ici ne servirait à rien.
+    """
+    models = apps.get_models()
+    for model in models:
+        opts = model._meta
+        opts.get_fields()
+        opts.fields_map
+        opts._forward_fields_map
+    return len(models)
+
+
+def warm_authentication():
+    """
+    Prépare la clé de vérification des JWT (mise en cache par le backend) et
+    charge les validateurs de mot de passe (liste des mots courants).
+    """
+    from rest_framework_simplejwt.state import token_backend
+
+    # Une clé JWKS dépend du jeton : elle ne peut pas être préparée d'avance
+    if token_backend.jwks_client is None:
+        token_backend.get_verifying_key(None)
+    return len(get_default_password_validators())
+
+
+def warm_databases():
+    """Ouvre les connexions (pragmas compris) de ce thread et les vérifie."""
+    for connection in connections.all():
+        connection.ensure_connection()
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+    return len(connections.all())
+
+
+STEPS = [
+    ("urls", warm_urls),
+    ("models", warm_models),
+    ("authentication", warm_authentication),
+    ("databases", warm_databases),
+]
+
+
+def warm_up():
+    """Exécute chaque étape et retourne {étape: (durée en secondes, éléments)}."""
+    timings = {}
+    for name, step in STEPS:
+        start = time.perf_counter()
+        count = step()
+        timings[name] = (time.perf_counter() - start, count)
+    logger.info(
+        "Préchauffage : %s",
+        ", ".join(f"{name} {d * 1000:.1f} ms" for name, (d, _) in timings.items()),
+    )
+    return timings
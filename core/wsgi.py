@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+# Préchauffage du worker avant sa première requête (voir core/warmup.py)
+if os.environ.get('SOFTDESK_WARMUP') == '1':
+    from core.warmup import warm_up
+
+    warm_up()
@@ -1,22 +1,60 @@
 from django.contrib import admin
-from .models import Issue, Comment
+from core.admin import LargeTableAdmin
+from .models import ArchivedComment, ArchivedIssue, Issue, Comment
 
 
 @admin.register(Issue)
-class IssueAdmin(admin.ModelAdmin):
+class IssueAdmin(LargeTableAdmin):
     """Interface d'administration pour les Issues."""
 
     list_display = ["id", "title", "project", "status", "priority", "tag", "author", "assignee", "created_time"]
     list_filter = ["status", "priority", "tag", "created_time"]
-    search_fields = ["title", "description", "project__name"]
+    # Recherche par préfixe (index) : pas de LIKE '%...%' sur description
+    search_fields = ["^title", "^project__name"]
+    # project : Issue.__str__ affiche le nom du projet
+    list_select_related = ["project", "author", "assignee"]
+    autocomplete_fields = ["project", "author", "assignee"]
     readonly_fields = ["created_time"]
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdmin):
     """Interface d'administration pour les Comments."""
 
     list_display = ["id", "issue", "author", "created_time"]
     list_filter = ["created_time"]
-    search_fields = ["description", "issue__title"]
+    search_fields = ["^issue__title", "=author__username"]
+    # issue__project : la colonne issue affiche Issue.__str__ (titre et projet)
+    list_select_related = ["issue__project", "author"]
+    autocomplete_fields = ["issue", "author"]
     readonly_fields = ["created_time"]
+
+
+@admin.register(ArchivedIssue)
+class ArchivedIssueAdmin(LargeTableAdmin):
+    """Problèmes archivés (lecture seule : restauration par archive_issues --restore)."""
+
+    list_display = ["id", "title", "project", "status", "author_username", "finished_time", "archived_time"]
+    list_filter = ["archived_time"]
+    search_fields = ["^title", "^project__name"]
+    list_select_related = ["project"]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ArchivedComment)
+class ArchivedCommentAdmin(LargeTableAdmin):
+    """Commentaires des problèmes archivés (lecture seule)."""
+
+    list_display = ["id", "issue_id", "author_username", "created_time"]
+    search_fields = ["=author_username"]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
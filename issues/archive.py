@@ -0,0 +1,167 @@
+"""
+Archivage des problèmes terminés (ISSUE_ARCHIVE dans settings.py).
+
+Les problèmes "finished" depuis plus de AFTER_DAYS jours, et leurs
+commentaires, sont déplacés dans ArchivedIssue / ArchivedComment : les tables
+Issue et Comment (et leurs index) ne contiennent plus que le volume actif.
+
+Chaque lot est déplacé dans une transaction courte par INSERT ... SELECT puis
+DELETE : les lignes ne transitent pas par Python et gardent leurs
+identifiants. La restauration (réouverture d'un problème archivé) fait le
+chemin inverse.
+
+API : les archives ne sont lues qu'avec ?include_archived=1 ; toute écriture
+sur un problème archivé le restaure d'abord (voir issues/views.py).
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ArchivedComment, ArchivedIssue, Comment, Issue
+
+
+def _copy_rows(connection, source, target, column, ids, extra=None):
+    """
+    INSERT INTO target SELECT ... FROM source WHERE column IN ids, sur les
+    colonnes communes aux deux modèles ; extra : {colonne: valeur} ajoutées.
+    Retourne le nombre de lignes copiées.
+    """
+    target_columns = {field.column for field in target._meta.concrete_fields}
+    columns = [
+        field.column
+        for field in source._meta.concrete_fields
+        if field.column in target_columns
+    ]
+    extra = extra or {}
+    qn = connection.ops.quote_name
+    insert = ", ".join(qn(c) for c in [*columns, *extra])
+    select = ", ".join([*(qn(c) for c in columns), *(["%s"] * len(extra))])
+    placeholders = ", ".join(["%s"] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {qn(target._meta.db_table)} ({insert}) "
+            f"SELECT {select} FROM {qn(source._meta.db_table)} "
+            f"WHERE {qn(column)} IN ({placeholders})",
+            [*extra.values(), *ids],
+        )
+        return cursor.rowcount
+
+
+def archivable_issues(before):
+    """Problèmes terminés avant before (created_time pour ceux sans finished_time)."""
+    return Issue.objects.filter(status="finished").filter(
+        Q(finished_time__lt=before)
+        | Q(finished_time__isnull=True, created_time__lt=before)
+    )
+
+
+def archive_issues(before=None, batch_size=None, progress=None):
+    """
+    Archive les problèmes terminés avant before (par défaut, il y a
+    ISSUE_ARCHIVE["AFTER_DAYS"] jours), par lots de batch_size problèmes.
+
+    progress(libellé, total) est appelé après chaque lot.
+    Retourne {"issues": nombre, "comments": nombre}.
+    """
+    batch_size = batch_size or settings.BULK_BATCH_SIZE
+    if before is None:
+        before = timezone.now() - timedelta(days=settings.ISSUE_ARCHIVE["AFTER_DAYS"])
+    db = router.db_for_write(Issue)
+    connection = connections[db]
+    ids_query = (
+        archivable_issues(before)
+        .using(db)
+        .order_by()
+        .select_for_update()
+        .values_list("pk", flat=True)
+    )
+
+    counts = {"issues": 0, "comments": 0}
+    while True:
+        with transaction.atomic(using=db):
+            # Relu dans la transaction : un problème rouvert entre-temps est ignoré
+            ids = list(ids_query[:batch_size])
+            if not ids:
+                break
+            archived_time = timezone.now()
+            _copy_rows(
+                connection,
+                Issue,
+                ArchivedIssue,
+                "id",
+                ids,
+                {"archived_time": archived_time},
+            )
+            counts["comments"] += _copy_rows(
+                connection, Comment, ArchivedComment, "issue_id", ids
+            )
+            Comment.objects.using(db).filter(issue_id__in=ids).delete()
+            Issue.objects.using(db).filter(pk__in=ids).delete()
+        counts["issues"] += len(ids)
+        if progress:
+            progress("issues", counts["issues"])
+    return counts
+
+
+def restore_issues(ids):
+    """
+    Remet les problèmes archivés ids (et leurs commentaires) dans Issue et
+    Comment. Les ids absents de l'archive sont ignorés.
+    Retourne le nombre de problèmes restaurés.
+    """
+    db = router.db_for_write(Issue)
+    connection = connections[db]
+    with transaction.atomic(using=db):
+        ids = list(
+            ArchivedIssue.objects.using(db)
+            .select_for_update()
+            .filter(pk__in=ids)
+            .values_list("pk", flat=True)
+        )
+        if not ids:
+            return 0
+        _copy_rows(connection, ArchivedIssue, Issue, "id", ids)
+        _copy_rows(connection, ArchivedComment, Comment, "issue_id", ids)
+        ArchivedComment.objects.using(db).filter(issue_id__in=ids).delete()
+        ArchivedIssue.objects.using(db).filter(pk__in=ids).delete()
+    return len(ids)
+
+
+class ChainedQuerySets:
+    """
+    Plusieurs querysets paginés comme un seul, l'un après l'autre
+    (?include_archived=1 : les problèmes actifs, puis les archivés).
+    Chaque page ne lit que les lignes dont elle a besoin.
+    """
+
+    def __init__(self, *querysets):
+        self.querysets = querysets
+        self._counts = None
+
+    def count(self):
+        if self._counts is None:
+            self._counts = [queryset.count() for queryset in self.querysets]
+        return sum(self._counts)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            raise TypeError("ChainedQuerySets ne se lit que par tranches.")
+        start, stop = index.start or 0, index.stop
+        self.count()
+        rows = []
+        for queryset, size in zip(self.querysets, self._counts):
+            if stop is not None and stop <= 0:
+                break
+            if start < size:
+                rows.extend(queryset[start : size if stop is None else min(stop, size)])
+            start = max(start - size, 0)
+            if stop is not None:
+                stop -= size
+        return rows
@@ -0,0 +1,168 @@
+"""
+Export en streaming de tous les problèmes d'un projet (NDJSON ou CSV).
+
+Les problèmes sont lus par lots de EXPORT_CHUNK_SIZE, par id croissant
+(pagination par clé : WHERE id > dernier_id), sans instancier de modèles.
+Avec les commentaires, ceux de chaque lot sont lus par pages de même taille,
+par clé (issue_id, id). La mémoire reste bornée par la taille d'un lot et le
+premier octet part dès le premier lot, quel que soit le nombre de problèmes
+ou de commentaires.
+"""
+
+import csv
+import io
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+from core.sharding import on_project_shard
+from users.fields import username_expression
+from .models import Issue, Comment
+
+# Nombre de problèmes lus par aller-retour avec la base
+EXPORT_CHUNK_SIZE = 2000
+
+ISSUE_COLUMNS = [
+    "id",
+    "title",
+    "description",
+    "priority",
+    "status",
+    "tag",
+    "author_username",
+    "assignee_username",
+    "created_time",
+]
+COMMENT_COLUMNS = ["id", "issue_id", "description", "author_username", "created_time"]
+# Colonnes CSV : "type" distingue les lignes de problème et de commentaire
+CSV_COLUMNS = ["type", "id", "issue_id", *ISSUE_COLUMNS[1:]]
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def iter_export_rows(project_id, with_comments=False, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Génère des lots de lignes (type, données), type valant "issue" ou
+    "comment" : chaque problème, par id croissant, suivi de ses commentaires.
+    Un lot compte au plus chunk_size problèmes et chunk_size commentaires.
+    """
+    # Lu après la fin de la vue (streaming) : shard désigné explicitement
+    issues = (
+        on_project_shard(Issue.objects.all(), project_id)
+        .filter(project_id=project_id)
+        .annotate(
+            export_author=username_expression("author", "author_username"),
+            export_assignee=username_expression("assignee", "assignee_username"),
+        )
+        .order_by("id")
+        .values(
+            "id",
+            "title",
+            "description",
+            "priority",
+            "status",
+            "tag",
+            "export_author",
+            "export_assignee",
+            "created_time",
+        )
+    )
+    last_id = 0
+    while True:
+        chunk = list(issues.filter(id__gt=last_id)[:chunk_size])
+        if not chunk:
+            return
+        last_id = chunk[-1]["id"]
+        for issue in chunk:
+            issue["author_username"] = issue.pop("export_author")
+            issue["assignee_username"] = issue.pop("export_assignee")
+        if not with_comments:
+            yield [("issue", issue) for issue in chunk]
+            continue
+
+        # Commentaires du lot par pages de chunk_size, par clé (issue_id, id) :
+        # un problème très commenté ne charge pas tous ses commentaires d'un coup
+        comments = (
+            on_project_shard(Comment.objects.all(), project_id)
+            .filter(issue_id__in=[issue["id"] for issue in chunk])
+            .annotate(export_author=username_expression("author", "author_username"))
+            .order_by("issue_id", "id")
+            .values("id", "issue_id", "description", "export_author", "created_time")
+        )
+        emitted = 0
+        rows = []
+        last_key = (0, 0)
+        while True:
+            page = list(
+                comments.filter(
+                    Q(issue_id__gt=last_key[0])
+                    | Q(issue_id=last_key[0], id__gt=last_key[1])
+                )[:chunk_size]
+            )
+            for comment in page:
+                comment["author_username"] = comment.pop("export_author")
+                # Problèmes (sans commentaire ou non) jusqu'à celui du commentaire
+                while not emitted or chunk[emitted - 1]["id"] != comment["issue_id"]:
+                    rows.append(("issue", chunk[emitted]))
+                    emitted += 1
+                rows.append(("comment", comment))
+            if len(page) < chunk_size:
+                break
+            last_key = (page[-1]["issue_id"], page[-1]["id"])
+            yield rows
+            rows = []
+        rows.extend(("issue", issue) for issue in chunk[emitted:])
+        if rows:
+            yield rows
+
+
+def iter_issues_ndjson(project_id, with_comments=False):
+    """
+    Une ligne JSON par problème (avec ses commentaires si demandé), un morceau
+    par lot : la ligne d'un problème est écrite au fil des pages de ses
+    commentaires.
+    """
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    # Ligne de problème ouverte ("comments" pas encore fermé), premier commentaire
+    open_line = first = False
+    for rows in iter_export_rows(project_id, with_comments):
+        parts = []
+        for kind, row in rows:
+            if kind == "comment":
+                parts.append(("" if first else ",") + encoder.encode(row))
+                first = False
+            elif with_comments:
+                if open_line:
+                    parts.append("]}\n")
+                parts.append(encoder.encode(row)[:-1] + ',"comments":[')
+                open_line = first = True
+            else:
+                parts.append(encoder.encode(row) + "\n")
+        yield "".join(parts)
+    if open_line:
+        yield "]}\n"
+
+
+def iter_issues_csv(project_id, with_comments=False):
+    """CSV : une ligne par problème, suivie des lignes de ses commentaires si demandé."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    for rows in iter_export_rows(project_id, with_comments):
+        for kind, row in rows:
+            if kind == "issue":
+                writer.writerow({"type": "issue", "issue_id": row["id"], **row})
+            else:
+                writer.writerow({"type": "comment", **row})
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # En-tête seul si le projet n'a aucun problème
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+EXPORTERS = {"ndjson": iter_issues_ndjson, "csv": iter_issues_csv}
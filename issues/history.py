@@ -0,0 +1,282 @@
+"""
+Historique des problèmes et des contributeurs (ISSUE_HISTORY dans settings.py).
+
+Chaque création, modification ou suppression faite par l'API ajoute une ligne
+HistoryEntry, sans jamais modifier les précédentes :
+- seuls les champs modifiés sont enregistrés, en JSON compact
+  ({"status": ["to_do", "finished"], "assignee": [null, 12]}) ; les textes
+  longs (description) sont notés comme modifiés, sans leur contenu ;
+- les valeurs précédentes viennent de l'instance déjà chargée par la vue
+  (snapshot) : aucune lecture supplémentaire ;
+- dans un bloc history_batch(), les lignes sont regroupées et insérées en un
+  seul bulk_create à la fin du bloc, dans sa transaction : elles sont
+  validées (ou annulées) avec l'écriture. Les vues y font leurs écritures :
+  une seule transaction par requête, et un bloc qui modifie cent problèmes
+  n'ajoute qu'un INSERT. Hors d'un tel bloc, chaque ligne est insérée à la
+  validation de la transaction (transaction.on_commit) ; une transaction
+  annulée n'écrit rien.
+
+Les mises à jour en masse (QuerySet.update(), imports, suppression d'un
+compte) ne passent pas par ici et ne sont pas historisées.
+
+compact_history applique la rétention (RETENTION_DAYS) et fusionne les
+modifications anciennes d'un même problème, par le même utilisateur, le même
+jour (MERGE_AFTER_DAYS).
+"""
+
+import json
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from core.bulk import delete_in_batches
+from core.sharding import assign_ids
+from .models import HistoryEntry
+
+# Champ affiché -> attribut de Issue dont la valeur est enregistrée
+ISSUE_FIELDS = {
+    "title": "title",
+    "priority": "priority",
+    "status": "status",
+    "tag": "tag",
+    "assignee": "assignee_id",
+}
+# Champs enregistrés comme modifiés, sans leur valeur
+TEXT_FIELDS = ["description"]
+CONTRIBUTOR_FIELDS = {"role": "role"}
+
+_local = threading.local()
+
+
+def encode_changes(changes):
+    return json.dumps(changes, ensure_ascii=False, separators=(",", ":"))
+
+
+def decode_changes(text):
+    """Champs modifiés : [{"field": ..., "old": ..., "new": ...}, ...]."""
+    changes = json.loads(text) if text else {}
+    return [
+        (
+            {"field": field}
+            if values is None
+            else {"field": field, "old": values[0], "new": values[1]}
+        )
+        for field, values in changes.items()
+    ]
+
+
+def snapshot(instance, fields=ISSUE_FIELDS, text_fields=TEXT_FIELDS):
+    """Valeurs suivies de instance, à prendre avant sa modification."""
+    values = {name: getattr(instance, attr) for name, attr in fields.items()}
+    values.update({name: getattr(instance, name) for name in text_fields})
+    return values
+
+
+def diff(before, after, text_fields=TEXT_FIELDS):
+    """Champs dont la valeur diffère entre deux snapshots (before : {} à la création)."""
+    changes = {}
+    for name, value in after.items():
+        previous = before.get(name)
+        if previous == value:
+            continue
+        changes[name] = None if name in text_fields else [previous, value]
+    return changes
+
+
+def _insert(alias, entries):
+    assign_ids(entries)
+    HistoryEntry.objects.using(alias).bulk_create(
+        entries, batch_size=settings.BULK_BATCH_SIZE
+    )
+
+
+def _open_batch(alias):
+    """Lot du bloc history_batch() le plus interne sur la base alias (None : aucun)."""
+    for batch_alias, entries in reversed(getattr(_local, "batches", [])):
+        if batch_alias == alias:
+            return entries
+    return None
+
+
+@contextmanager
+def history_batch(using=None):
+    """
+    Bloc atomique (transaction.atomic) dont les lignes d'historique sont
+    insérées en un seul bulk_create à sa fin, dans sa transaction. Le lot est
+    annulé avec le bloc (exception, set_rollback) ; un bloc imbriqué a son
+    propre lot, à utiliser pour un savepoint qui peut être annulé seul.
+
+    Sans using : base de l'historique d'après le shard actif (celui du projet
+    de l'URL dans les vues), soit la base de l'objet modifié.
+    """
+    alias = using or router.db_for_write(HistoryEntry)
+    entries = []
+    batches = _local.__dict__.setdefault("batches", [])
+    with transaction.atomic(using=alias):
+        batches.append((alias, entries))
+        try:
+            yield
+        finally:
+            batches.pop()
+        if entries and not transaction.get_rollback(using=alias):
+            # Avant la validation : l'historique est validé avec l'écriture
+            _insert(alias, entries)
+
+
+def record(action, project_id, object_id, actor=None, changes=None):
+    """Met en attente une ligne d'historique jusqu'à la validation de la transaction."""
+    if not settings.ISSUE_HISTORY["ENABLED"]:
+        return
+    entry = HistoryEntry(
+        project_id=project_id,
+        action=action,
+        object_id=object_id,
+        actor=actor,
+        actor_username=actor.username if actor else None,
+        changes=encode_changes(changes) if changes else "",
+    )
+    # Mode shards : la ligne va dans le shard du projet (core/sharding.py)
+    alias = router.db_for_write(HistoryEntry, instance=entry)
+    entries = _open_batch(alias)
+    if entries is not None:
+        entries.append(entry)
+    else:
+        # Hors transaction, on_commit insère immédiatement
+        transaction.on_commit(partial(_insert, alias, [entry]), using=alias)
+
+
+def record_issue(action, issue, actor, before=None):
+    """
+    Historise un problème : before est son snapshot d'avant modification
+    (None à la création et à la suppression). Une modification sans
+    changement des champs suivis n'est pas enregistrée.
+    """
+    changes = None
+    if action == HistoryEntry.ISSUE_UPDATED:
+        changes = diff(before, snapshot(issue))
+        if not changes:
+            return
+    elif action == HistoryEntry.ISSUE_CREATED:
+        changes = diff({}, snapshot(issue, text_fields=[]))
+    record(action, issue.project_id, issue.pk, actor, changes)
+
+
+def record_contributor(action, contributor, actor, before=None):
+    """Historise l'ajout, la modification (rôle) ou le retrait d'un contributeur."""
+    current = snapshot(contributor, CONTRIBUTOR_FIELDS, [])
+    if action == HistoryEntry.CONTRIBUTOR_REMOVED:
+        changes = {name: [value, None] for name, value in current.items()}
+    else:
+        changes = diff(before or {}, current, [])
+        if not changes:
+            return
+    record(action, contributor.project_id, contributor.user_id, actor, changes)
+
+
+def merge_changes(changes_list):
+    """Fusionne des modifications successives ; un champ revenu à sa valeur disparaît."""
+    merged = {}
+    for changes in changes_list:
+        for field, values in changes.items():
+            if values is None:
+                merged[field] = None
+            elif merged.get(field) is not None:
+                merged[field] = [merged[field][0], values[1]]
+            else:
+                merged[field] = values
+    return {
+        field: values
+        for field, values in merged.items()
+        if values is None or values[0] != values[1]
+    }
+
+
+def delete_expired(before, batch_size=None, progress=None):
+    """Supprime les lignes antérieures à before, par lots."""
+    return delete_in_batches(
+        HistoryEntry.objects.filter(created_time__lt=before),
+        batch_size=batch_size,
+        progress=progress,
+        label="supprimées",
+    )
+
+
+def merge_entries(before, after=None, batch_size=None, progress=None):
+    """
+    Fusionne les modifications de problèmes antérieures à before (et
+    postérieures à after) : une ligne par problème, utilisateur et jour, qui
+    garde la date de la dernière modification fusionnée.
+    Retourne le nombre de lignes supprimées par la fusion.
+    """
+    batch_size = batch_size or settings.BULK_BATCH_SIZE
+    db = router.db_for_write(HistoryEntry)
+    entries = HistoryEntry.objects.using(db).filter(
+        action=HistoryEntry.ISSUE_UPDATED, created_time__lt=before
+    )
+    if after is not None:
+        entries = entries.filter(created_time__gte=after)
+    groups = (
+        entries.annotate(day=TruncDate("created_time"))
+        .order_by()
+        .values("object_id", "actor_id", "day")
+        .annotate(count=Count("pk"))
+        .filter(count__gt=1)
+        .values_list("object_id", "actor_id", "day")
+    )
+
+    removed = 0
+    groups = list(groups)
+    for start in range(0, len(groups), batch_size):
+        with transaction.atomic(using=db):
+            for object_id, actor_id, day in groups[start : start + batch_size]:
+                rows = list(
+                    entries.filter(
+                        object_id=object_id, actor_id=actor_id, created_time__date=day
+                    ).order_by("created_time", "pk")
+                )
+                merged = merge_changes(json.loads(row.changes or "{}") for row in rows)
+                last = rows[-1]
+                stale = [row.pk for row in rows[:-1]]
+                if merged:
+                    last.changes = encode_changes(merged)
+                    last.save(update_fields=["changes"])
+                else:
+                    stale.append(last.pk)
+                HistoryEntry.objects.using(db).filter(pk__in=stale).delete()
+                removed += len(stale)
+        if progress:
+            progress("fusionnées", removed)
+    return removed
+
+
+def compact_history(
+    retention_days=None, merge_after_days=None, batch_size=None, progress=None
+):
+    """
+    Rétention puis fusion (valeurs par défaut : ISSUE_HISTORY).
+    Retourne {"deleted": nombre, "merged": nombre}.
+    """
+    config = settings.ISSUE_HISTORY
+    if retention_days is None:
+        retention_days = config["RETENTION_DAYS"]
+    if merge_after_days is None:
+        merge_after_days = config["MERGE_AFTER_DAYS"]
+    now = timezone.now()
+
+    counts = {"deleted": 0, "merged": 0}
+    expiry = None
+    if retention_days is not None:
+        expiry = now - timedelta(days=retention_days)
+        counts["deleted"] = delete_expired(expiry, batch_size, progress)
+    if merge_after_days is not None:
+        counts["merged"] = merge_entries(
+            now - timedelta(days=merge_after_days), expiry, batch_size, progress
+        )
+    return counts
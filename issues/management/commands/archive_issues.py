@@ -0,0 +1,69 @@
+"""
+Archive les problèmes terminés : python manage.py archive_issues [--days 90]
+
+À planifier (cron) : sans danger à relancer, chaque exécution ne déplace que
+les problèmes devenus archivables depuis la précédente. En mode shards, chaque
+shard est archivé à son tour.
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.sharding import in_each_shard
+from issues.archive import archive_issues, restore_issues
+
+
+class Command(BaseCommand):
+    help = "Déplace les problèmes terminés anciens et leurs commentaires dans les tables d'archive."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=None,
+            help='Âge minimal depuis la fin du problème (ISSUE_ARCHIVE["AFTER_DAYS"] par défaut).',
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Nombre de problèmes par lot (BULK_BATCH_SIZE par défaut).",
+        )
+        parser.add_argument(
+            "--restore",
+            type=int,
+            nargs="+",
+            metavar="ISSUE_ID",
+            help="Restaure ces problèmes archivés au lieu d'archiver.",
+        )
+
+    def handle(self, *args, **options):
+        if options["restore"]:
+            # Mode shards : ids uniques entre les shards, absents ignorés ailleurs
+            count = sum(restore_issues(options["restore"]) for _ in in_each_shard())
+            self.stdout.write(self.style.SUCCESS(f"{count} problèmes restaurés."))
+            return
+
+        before = None
+        if options["days"] is not None:
+            before = timezone.now() - timedelta(days=options["days"])
+
+        def progress(label, total):
+            self.stdout.write(f"{label} : {total}")
+
+        counts = {"issues": 0, "comments": 0}
+        for shard in in_each_shard():
+            if shard:
+                self.stdout.write(shard)
+            shard_counts = archive_issues(
+                before=before, batch_size=options["batch_size"], progress=progress
+            )
+            for label, count in shard_counts.items():
+                counts[label] += count
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{counts['issues']} problèmes et {counts['comments']} commentaires archivés."
+            )
+        )
@@ -0,0 +1,60 @@
+"""
+Compacte l'historique des problèmes : python manage.py compact_history
+
+À planifier (cron) : supprime les lignes plus anciennes que
+ISSUE_HISTORY["RETENTION_DAYS"] jours, puis fusionne les modifications d'un
+même problème faites par le même utilisateur le même jour, au-delà de
+ISSUE_HISTORY["MERGE_AFTER_DAYS"] jours (issues/history.py). Sans danger à
+relancer. En mode shards, chaque shard est compacté à son tour.
+"""
+
+from django.core.management.base import BaseCommand
+
+from core.sharding import in_each_shard
+from issues.history import compact_history
+
+
+class Command(BaseCommand):
+    help = "Supprime l'historique expiré et fusionne les modifications anciennes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retention-days",
+            type=int,
+            default=None,
+            help='Âge de suppression (ISSUE_HISTORY["RETENTION_DAYS"] par défaut).',
+        )
+        parser.add_argument(
+            "--merge-after-days",
+            type=int,
+            default=None,
+            help='Âge de fusion (ISSUE_HISTORY["MERGE_AFTER_DAYS"] par défaut).',
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Nombre de lignes par lot (BULK_BATCH_SIZE par défaut).",
+        )
+
+    def handle(self, *args, **options):
+        def progress(label, total):
+            self.stdout.write(f"{label} : {total}")
+
+        counts = {"deleted": 0, "merged": 0}
+        for shard in in_each_shard():
+            if shard:
+                self.stdout.write(shard)
+            shard_counts = compact_history(
+                retention_days=options["retention_days"],
+                merge_after_days=options["merge_after_days"],
+                batch_size=options["batch_size"],
+                progress=progress,
+            )
+            for label, count in shard_counts.items():
+                counts[label] += count
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{counts['deleted']} lignes supprimées, {counts['merged']} fusionnées."
+            )
+        )
@@ -0,0 +1,32 @@
+# Generated by Django 6.0 on 2026-10-19 14:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("issues", "0001_initial"),
+        ("projects", "0003_project_deleted_time_alter_contributor_role"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["issue", "-created_time"], name="comment_issue_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="issue",
+            index=models.Index(
+                fields=["project", "-created_time"], name="issue_project_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="issue",
+            index=models.Index(fields=["title"], name="issue_title_idx"),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-19 14:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("issues", "0002_comment_comment_issue_created_idx_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comment",
+            name="author_username",
+            field=models.CharField(blank=True, editable=False, max_length=150),
+        ),
+        migrations.AddField(
+            model_name="issue",
+            name="assignee_username",
+            field=models.CharField(
+                blank=True, editable=False, max_length=150, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="issue",
+            name="author_username",
+            field=models.CharField(blank=True, editable=False, max_length=150),
+        ),
+    ]
@@ -0,0 +1,154 @@
+# Generated by Django 6.0 on 2026-10-19 10:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("issues", "0003_comment_author_username_issue_assignee_username_and_more"),
+        ("projects", "0004_contributor_username"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedComment",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("description", models.TextField()),
+                ("created_time", models.DateTimeField()),
+                ("author_username", models.CharField(blank=True, max_length=150)),
+            ],
+            options={
+                "ordering": ["-created_time"],
+            },
+        ),
+        migrations.CreateModel(
+            name="ArchivedIssue",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("title", models.CharField(max_length=255)),
+                ("description", models.TextField()),
+                (
+                    "priority",
+                    models.CharField(
+                        choices=[
+                            ("low", "Faible"),
+                            ("medium", "Moyenne"),
+                            ("high", "Élevée"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("to_do", "À faire"),
+                            ("in_progress", "En cours"),
+                            ("finished", "Terminé"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "tag",
+                    models.CharField(
+                        choices=[
+                            ("bug", "Bug"),
+                            ("feature", "Fonctionnalité"),
+                            ("task", "Tâche"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("created_time", models.DateTimeField()),
+                ("finished_time", models.DateTimeField(blank=True, null=True)),
+                ("author_username", models.CharField(blank=True, max_length=150)),
+                (
+                    "assignee_username",
+                    models.CharField(blank=True, max_length=150, null=True),
+                ),
+                ("archived_time", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "ordering": ["-created_time"],
+            },
+        ),
+        migrations.AddField(
+            model_name="issue",
+            name="finished_time",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="issue",
+            index=models.Index(
+                condition=models.Q(("status", "finished")),
+                fields=["finished_time"],
+                name="issue_finished_idx",
+            ),
+        ),
+        migrations.AddField(
+            model_name="archivedcomment",
+            name="author",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="archivedissue",
+            name="assignee",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="archivedissue",
+            name="author",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="archivedissue",
+            name="project",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="projects.project",
+            ),
+        ),
+        migrations.AddField(
+            model_name="archivedcomment",
+            name="issue",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="comments",
+                to="issues.archivedissue",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="archivedissue",
+            index=models.Index(
+                fields=["project", "-created_time"],
+                name="archissue_project_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="archivedcomment",
+            index=models.Index(
+                fields=["issue", "-created_time"], name="archcomment_issue_created_idx"
+            ),
+        ),
+    ]
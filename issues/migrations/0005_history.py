@@ -0,0 +1,84 @@
+# Generated by Django 6.0 on 2026-10-19 12:37
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("issues", "0004_issue_archive"),
+        ("projects", "0004_contributor_username"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HistoryEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "action",
+                    models.CharField(
+                        choices=[
+                            ("issue_created", "Problème créé"),
+                            ("issue_updated", "Problème modifié"),
+                            ("issue_deleted", "Problème supprimé"),
+                            ("contributor_added", "Contributeur ajouté"),
+                            ("contributor_updated", "Contributeur modifié"),
+                            ("contributor_removed", "Contributeur retiré"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("object_id", models.BigIntegerField()),
+                (
+                    "actor_username",
+                    models.CharField(blank=True, max_length=150, null=True),
+                ),
+                (
+                    "created_time",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("changes", models.TextField(blank=True)),
+                (
+                    "actor",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "project",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="projects.project",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_time", "-id"],
+                "indexes": [
+                    models.Index(
+                        fields=["object_id", "-created_time"],
+                        name="history_object_created_idx",
+                    ),
+                    models.Index(fields=["created_time"], name="history_created_idx"),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-19 12:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("issues", "0005_history"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="archivedissue",
+            index=models.Index(fields=["title"], name="archissue_title_idx"),
+        ),
+    ]
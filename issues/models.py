@@ -1,7 +1,11 @@
 from django.db import models
+from django.utils import timezone
 
+from core.sharding import assign_ids
+from users.fields import UsernameCopiesMixin
 
-class Issue(models.Model):
+
+class Issue(UsernameCopiesMixin, models.Model):
     """Représente un problème/ticket dans un projet."""
 
     PRIORITY_CHOICES = [
@@ -41,15 +45,56 @@ class Issue(models.Model):
         related_name="assigned_issues",
     )
     created_time = models.DateTimeField(auto_now_add=True)
+    # Passage au statut "finished" (renseigné par save()) : âge pris en compte
+    # pour l'archivage (issues/archive.py)
+    finished_time = models.DateTimeField(null=True, blank=True, editable=False)
+    # Copies dénormalisées de author.username et assignee.username : les listes
+    # n'ont pas besoin de jointure sur la table des utilisateurs.
+    # Renseignées par save() (UsernameCopiesMixin), puis corrigées par
+    # users/usernames.py : renommage propagé par la file de tâches (run_worker),
+    # suppression de l'assignee.
+    author_username = models.CharField(max_length=150, blank=True, editable=False)
+    assignee_username = models.CharField(
+        max_length=150, null=True, blank=True, editable=False
+    )
+
+    USERNAME_COPIES = {"author": "author_username", "assignee": "assignee_username"}
 
     class Meta:
         ordering = ["-created_time"]
+        indexes = [
+            # Liste des problèmes d'un projet, du plus récent au plus ancien
+            models.Index(fields=["project", "-created_time"], name="issue_project_created_idx"),
+            # Recherche par préfixe dans l'admin (core/admin.py)
+            models.Index(fields=["title"], name="issue_title_idx"),
+            # Problèmes terminés à archiver
+            models.Index(
+                fields=["finished_time"],
+                condition=models.Q(status="finished"),
+                name="issue_finished_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.project.name})"
 
+    def fill_finished_time(self):
+        """Date de fin posée au passage à "finished", effacée à la réouverture."""
+        if self.status != "finished":
+            self.finished_time = None
+        elif self.finished_time is None:
+            self.finished_time = timezone.now()
+
+    def save(self, *args, **kwargs):
+        self.fill_usernames()
+        self.fill_finished_time()
+        # Identifiant unique entre les shards (core/sharding.py)
+        if assign_ids([self]):
+            kwargs["force_insert"] = True
+        super().save(*args, **kwargs)
 
-class Comment(models.Model):
+
+class Comment(UsernameCopiesMixin, models.Model):
     """Représente un commentaire sur un problème/ticket."""
 
     description = models.TextField()
@@ -60,9 +105,161 @@ class Comment(models.Model):
         "users.CustomUser", on_delete=models.CASCADE, related_name="authored_comments"
     )
     created_time = models.DateTimeField(auto_now_add=True)
+    # Copie dénormalisée de author.username (voir Issue.author_username)
+    author_username = models.CharField(max_length=150, blank=True, editable=False)
+
+    USERNAME_COPIES = {"author": "author_username"}
 
     class Meta:
         ordering = ["-created_time"]
+        indexes = [
+            # Commentaires d'un problème, du plus récent au plus ancien
+            models.Index(fields=["issue", "-created_time"], name="comment_issue_created_idx"),
+        ]
 
     def __str__(self):
         return f"Comment by {self.author.username} on {self.issue.title}"
+
+    def save(self, *args, **kwargs):
+        self.fill_usernames()
+        # Identifiant unique entre les shards (core/sharding.py)
+        if assign_ids([self]):
+            kwargs["force_insert"] = True
+        super().save(*args, **kwargs)
+
+
+class ArchivedIssue(models.Model):
+    """
+    Problème terminé déplacé hors de la table Issue (issues/archive.py).
+
+    Mêmes colonnes que Issue, identifiant compris : les URL restent valides
+    et la restauration remet la ligne telle quelle dans Issue.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=255)
+    description = models.TextField()
+    priority = models.CharField(max_length=20, choices=Issue.PRIORITY_CHOICES)
+    status = models.CharField(max_length=20, choices=Issue.STATUS_CHOICES)
+    tag = models.CharField(max_length=20, choices=Issue.TAG_CHOICES)
+    project = models.ForeignKey(
+        "projects.Project", on_delete=models.CASCADE, related_name="+"
+    )
+    author = models.ForeignKey(
+        "users.CustomUser", on_delete=models.CASCADE, related_name="+"
+    )
+    assignee = models.ForeignKey(
+        "users.CustomUser",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    created_time = models.DateTimeField()
+    finished_time = models.DateTimeField(null=True, blank=True)
+    author_username = models.CharField(max_length=150, blank=True)
+    assignee_username = models.CharField(max_length=150, null=True, blank=True)
+    archived_time = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_time"]
+        indexes = [
+            models.Index(
+                fields=["project", "-created_time"],
+                name="archissue_project_created_idx",
+            ),
+            # Recherche par préfixe dans l'admin (core/admin.py)
+            models.Index(fields=["title"], name="archissue_title_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.title} (archivé)"
+
+
+class ArchivedComment(models.Model):
+    """Commentaire d'un problème archivé (mêmes colonnes que Comment)."""
+
+    id = models.BigIntegerField(primary_key=True)
+    description = models.TextField()
+    issue = models.ForeignKey(
+        "ArchivedIssue", on_delete=models.CASCADE, related_name="comments"
+    )
+    author = models.ForeignKey(
+        "users.CustomUser", on_delete=models.CASCADE, related_name="+"
+    )
+    created_time = models.DateTimeField()
+    author_username = models.CharField(max_length=150, blank=True)
+
+    class Meta:
+        ordering = ["-created_time"]
+        indexes = [
+            models.Index(
+                fields=["issue", "-created_time"],
+                name="archcomment_issue_created_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Comment by {self.author_username} on archived issue {self.issue_id}"
+
+
+class HistoryEntry(models.Model):
+    """
+    Historique en ajout seul des problèmes et des contributeurs d'un projet
+    (issues/history.py) : une ligne par modification, limitée aux champs
+    modifiés. Les lignes sont insérées par lots à la validation de la
+    transaction.
+    """
+
+    ISSUE_CREATED = "issue_created"
+    ISSUE_UPDATED = "issue_updated"
+    ISSUE_DELETED = "issue_deleted"
+    CONTRIBUTOR_ADDED = "contributor_added"
+    CONTRIBUTOR_UPDATED = "contributor_updated"
+    CONTRIBUTOR_REMOVED = "contributor_removed"
+
+    ACTION_CHOICES = [
+        (ISSUE_CREATED, "Problème créé"),
+        (ISSUE_UPDATED, "Problème modifié"),
+        (ISSUE_DELETED, "Problème supprimé"),
+        (CONTRIBUTOR_ADDED, "Contributeur ajouté"),
+        (CONTRIBUTOR_UPDATED, "Contributeur modifié"),
+        (CONTRIBUTOR_REMOVED, "Contributeur retiré"),
+    ]
+    ISSUE_ACTIONS = [ISSUE_CREATED, ISSUE_UPDATED, ISSUE_DELETED]
+
+    project = models.ForeignKey(
+        "projects.Project", on_delete=models.CASCADE, related_name="+"
+    )
+    action = models.CharField(max_length=20, choices=ACTION_CHOICES)
+    # Identifiant du problème, ou de l'utilisateur pour un contributeur : pas de
+    # clé étrangère, l'historique survit à la suppression et à l'archivage
+    object_id = models.BigIntegerField()
+    actor = models.ForeignKey(
+        "users.CustomUser",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    # Copie dénormalisée de actor.username (voir Issue.author_username)
+    actor_username = models.CharField(max_length=150, null=True, blank=True)
+    # Posé à l'enregistrement de la modification, pas à l'insertion du lot
+    created_time = models.DateTimeField(default=timezone.now)
+    # Champs modifiés, en JSON compact : {"status": ["to_do", "finished"], ...}
+    changes = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["-created_time", "-id"]
+        indexes = [
+            # Historique d'un problème, du plus récent au plus ancien
+            models.Index(
+                fields=["object_id", "-created_time"],
+                name="history_object_created_idx",
+            ),
+            # Rétention et compactage (compact_history)
+            models.Index(fields=["created_time"], name="history_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_action_display()} {self.object_id} ({self.created_time})"
@@ -1,5 +1,10 @@
 """
 Classes de permissions personnalisées pour l'application issues.
+
+Lecture : l'appartenance au projet de l'URL est vérifiée une fois par
+has_permission ; les objets eux-mêmes ne sont lus qu'à travers la règle de
+projects/policies.py (get_queryset des viewsets), has_object_permission n'a
+donc rien à revérifier pour les méthodes sûres.
 """
 
 from rest_framework import permissions
@@ -21,9 +26,7 @@ class IsIssueAuthorOrReadOnly(permissions.BasePermission):
         # Vérifie que l'utilisateur est contributeur du projet
         project_pk = view.kwargs.get("project_pk")
         if project_pk:
-            return Contributor.objects.filter(
-                project_id=project_pk, user=request.user
-            ).exists()
+            return Contributor.objects.is_member(request.user, project_pk)
         return False
 
     # S'execute apres reception de l'objet
@@ -32,15 +35,13 @@ class IsIssueAuthorOrReadOnly(permissions.BasePermission):
         Vérifie si l'utilisateur peut effectuer l'action sur l'issue.
         obj est une instance d'Issue.
         """
-        # Les méthodes de lecture (GET, HEAD, OPTIONS) sont autorisées pour tous les contributeurs
+        # Les méthodes de lecture (GET, HEAD, OPTIONS) sont autorisées pour tous les contributeurs :
+        # obj provient d'un queryset filtré par readable_by (projects/policies.py)
         if request.method in permissions.SAFE_METHODS:
-            # Vérifie que l'utilisateur est contributeur du projet de l'issue
-            return Contributor.objects.filter(
-                project=obj.project, user=request.user
-            ).exists()
+            return True
 
         # Les méthodes d'écriture (PUT, PATCH, DELETE) sont autorisées uniquement pour l'auteur
-        return obj.author == request.user
+        return obj.author_id == request.user.id
 
 
 class IsCommentAuthorOrReadOnly(permissions.BasePermission):
@@ -54,19 +55,11 @@ class IsCommentAuthorOrReadOnly(permissions.BasePermission):
         """
         Vérifie au niveau de la vue si l'utilisateur peut accéder aux commentaires.
         """
-        # Récupère le projet via l'issue
-        issue_pk = view.kwargs.get("issue_pk")
-        if issue_pk:
-            from .models import Issue
-
-            try:
-                issue = Issue.objects.get(pk=issue_pk)
-                # Vérifie que l'utilisateur est contributeur du projet
-                return Contributor.objects.filter(
-                    project=issue.project, user=request.user
-                ).exists()
-            except Issue.DoesNotExist:
-                return False
+        # Projet de l'URL : le viewset ne sert que les problèmes de ce projet
+        project_pk = view.kwargs.get("project_pk")
+        if project_pk and view.kwargs.get("issue_pk"):
+            # Vérifie que l'utilisateur est contributeur du projet
+            return Contributor.objects.is_member(request.user, project_pk)
         return False
 
     def has_object_permission(self, request, view, obj):
@@ -74,12 +67,10 @@ class IsCommentAuthorOrReadOnly(permissions.BasePermission):
         Vérifie si l'utilisateur peut effectuer l'action sur le commentaire.
         obj est une instance de Comment.
         """
-        # Les méthodes de lecture (GET, HEAD, OPTIONS) sont autorisées pour tous les contributeurs
+        # Les méthodes de lecture (GET, HEAD, OPTIONS) sont autorisées pour tous les contributeurs :
+        # obj provient d'un queryset filtré par readable_by (projects/policies.py)
         if request.method in permissions.SAFE_METHODS:
-            # Vérifie que l'utilisateur est contributeur du projet du commentaire
-            return Contributor.objects.filter(
-                project=obj.issue.project, user=request.user
-            ).exists()
+            return True
 
         # Les méthodes d'écriture (PUT, PATCH, DELETE) sont autorisées uniquement pour l'auteur
-        return obj.author == request.user
+        return obj.author_id == request.user.id
@@ -0,0 +1,61 @@
+"""
+Aperçu des derniers commentaires de plusieurs problèmes, en une seule requête.
+
+Une fonction de fenêtre (ROW_NUMBER() OVER (PARTITION BY issue_id ...)) ne
+garde que les PREVIEW_COUNT commentaires les plus récents de chaque problème,
+et le texte est tronqué par la base (SUBSTR) : ni les commentaires plus anciens
+ni les descriptions complètes ne sont chargés, quel que soit leur nombre.
+"""
+
+from django.db.models import F, Window
+from django.db.models.functions import Length, RowNumber, Substr
+
+from users.fields import username_expression
+from .models import Comment
+
+PREVIEW_COUNT = 5
+PREVIEW_LENGTH = 100
+
+
+def comment_previews(
+    issue_ids, count=PREVIEW_COUNT, length=PREVIEW_LENGTH, model=Comment
+):
+    """
+    Retourne {issue_id: [aperçus des commentaires, du plus récent au plus ancien]}.
+    model : ArchivedComment pour des problèmes archivés.
+    """
+    if not issue_ids:
+        return {}
+    rows = (
+        model.objects.filter(issue_id__in=issue_ids)
+        .annotate(
+            row=Window(
+                RowNumber(),
+                partition_by=F("issue_id"),
+                order_by=[F("created_time").desc(), F("id").desc()],
+            ),
+            excerpt=Substr("description", 1, length),
+            full_length=Length("description"),
+            author_name=username_expression("author", "author_username"),
+        )
+        .filter(row__lte=count)
+        .order_by("issue_id", "row")
+        .values(
+            "id", "issue_id", "excerpt", "full_length", "author_name", "created_time"
+        )
+    )
+
+    previews = {}
+    for row in rows:
+        excerpt = row["excerpt"]
+        previews.setdefault(row["issue_id"], []).append(
+            {
+                "id": row["id"],
+                "author_username": row["author_name"],
+                "description": (
+                    excerpt + "..." if row["full_length"] > length else excerpt
+                ),
+                "created_time": row["created_time"],
+            }
+        )
+    return previews
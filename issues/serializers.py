@@ -1,12 +1,15 @@
 from rest_framework import serializers
-from .models import Issue, Comment
+from .history import decode_changes
+from .models import ArchivedComment, ArchivedIssue, HistoryEntry, Issue, Comment
+from users.fields import UsernameField
+from .previews import comment_previews
 from users.models import CustomUser
 
 
 class CommentSerializer(serializers.ModelSerializer):
     """Serializer pour les commentaires d'un problème."""
 
-    author_username = serializers.CharField(source="author.username", read_only=True)
+    author_username = UsernameField("author", "author_username")
 
     class Meta:
         model = Comment
@@ -17,11 +20,14 @@ class CommentSerializer(serializers.ModelSerializer):
 class IssueListSerializer(serializers.ModelSerializer):
     """Serializer pour la liste des problèmes (vue allégée)."""
 
-    author_username = serializers.CharField(source="author.username", read_only=True)
-    assignee_username = serializers.CharField(
-        source="assignee.username", read_only=True, allow_null=True
-    )
-    comments_count = serializers.SerializerMethodField()
+    author_username = UsernameField("author", "author_username")
+    assignee_username = UsernameField("assignee", "assignee_username", allow_null=True)
+    # Annoté par IssueViewSet.get_queryset (Count) : aucune requête par ligne
+    comments_count = serializers.IntegerField(read_only=True)
+    # Sur demande (?comments_preview=1) : aperçus chargés par IssueViewSet en une requête
+    comments_preview = serializers.SerializerMethodField()
+    # Avec ?include_archived=1 uniquement
+    archived = serializers.SerializerMethodField()
 
     class Meta:
         model = Issue
@@ -35,27 +41,40 @@ class IssueListSerializer(serializers.ModelSerializer):
             "author_username",
             "assignee_username",
             "comments_count",
+            "comments_preview",
+            "archived",
             "created_time",
         ]
         read_only_fields = ["id", "created_time"]
 
-    def get_comments_count(self, obj):
-        """Retourne le nombre de commentaires du problème."""
-        return obj.comments.count()
+    def get_fields(self):
+        """comments_preview et archived n'apparaissent que sur demande."""
+        fields = super().get_fields()
+        if "comment_previews" not in self.context:
+            fields.pop("comments_preview")
+        if "include_archived" not in self.context:
+            fields.pop("archived")
+        return fields
+
+    def get_archived(self, obj):
+        return isinstance(obj, ArchivedIssue)
+
+    def get_comments_preview(self, obj):
+        return self.context["comment_previews"].get(obj.pk, [])
 
 
 class IssueDetailSerializer(serializers.ModelSerializer):
     """Serializer pour le détail d'un problème - imbrication limitée (1 niveau)."""
 
-    author_username = serializers.CharField(source="author.username", read_only=True)
-    assignee_username = serializers.CharField(
-        source="assignee.username", read_only=True, allow_null=True
-    )
+    author_username = UsernameField("author", "author_username")
+    assignee_username = UsernameField("assignee", "assignee_username", allow_null=True)
     assignee_id = serializers.PrimaryKeyRelatedField(
         queryset=CustomUser.objects.all(), source="assignee", required=False, allow_null=True
     )
     # Liste simplifiée des commentaires au lieu d'objets complets
     comments_list = serializers.SerializerMethodField()
+    # Avec ?include_archived=1 uniquement
+    archived = serializers.SerializerMethodField()
 
     class Meta:
         model = Issue
@@ -70,26 +89,34 @@ class IssueDetailSerializer(serializers.ModelSerializer):
             "assignee_username",
             "assignee_id",
             "comments_list",
+            "archived",
             "project",
             "created_time",
         ]
         read_only_fields = ["id", "created_time", "project"]
 
+    def get_fields(self):
+        """archived n'apparaît qu'avec ?include_archived=1."""
+        fields = super().get_fields()
+        if "include_archived" not in self.context:
+            fields.pop("archived")
+        return fields
+
+    def get_archived(self, obj):
+        return isinstance(obj, ArchivedIssue)
+
     def get_comments_list(self, obj):
-        """Retourne une liste simplifiée des commentaires (1 niveau d'imbrication)."""
-        return [
-            {
-                "id": comment.id,
-                "author_username": comment.author.username,
-                "description": (
-                    comment.description[:100] + "..."
-                    if len(comment.description) > 100
-                    else comment.description
-                ),
-                "created_time": comment.created_time,
-            }
-            for comment in obj.comments.all()[:5]  # Limite à 5 commentaires
-        ]
+        """
+        Retourne les 5 derniers commentaires, tronqués (1 niveau d'imbrication).
+        Utilise context["comment_previews"] s'il est fourni, sinon une seule requête.
+        """
+        previews = self.context.get("comment_previews")
+        if previews is None:
+            archived = isinstance(obj, ArchivedIssue)
+            previews = comment_previews(
+                [obj.pk], model=ArchivedComment if archived else Comment
+            )
+        return previews.get(obj.pk, [])
 
     def validate_assignee_id(self, value):
         """Valide que l'assignee est un contributeur du projet."""
@@ -105,3 +132,19 @@ class IssueDetailSerializer(serializers.ModelSerializer):
                         "L'assignee doit être un contributeur du projet."
                     )
         return value
+
+
+class HistoryEntrySerializer(serializers.ModelSerializer):
+    """Serializer pour l'historique d'un problème (lecture seule)."""
+
+    actor_username = UsernameField("actor", "actor_username", allow_null=True)
+    # JSON compact décodé : [{"field": "status", "old": "to_do", "new": "finished"}]
+    changes = serializers.SerializerMethodField()
+
+    class Meta:
+        model = HistoryEntry
+        fields = ["id", "action", "actor_username", "changes", "created_time"]
+        read_only_fields = fields
+
+    def get_changes(self, obj):
+        return decode_changes(obj.changes)
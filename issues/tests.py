@@ -1,3 +1,612 @@
-from django.test import TestCase
+import csv
+import io
+import json
+from datetime import timedelta
+from unittest import skipIf
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib import admin
+from django.db import connections, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from core.sharding import use_project_shard
+from core.testing import SHARD_QUERIES, QueryBudgetTestMixin, ShardedTestMixin
+from projects.models import Contributor, Project
+from users.models import CustomUser
+from .admin import IssueAdmin
+from .archive import ChainedQuerySets, archive_issues, restore_issues
+from .exports import iter_export_rows
+from .history import compact_history, history_batch, record_issue, snapshot
+from .models import ArchivedComment, ArchivedIssue, Comment, HistoryEntry, Issue
+from .previews import PREVIEW_COUNT, comment_previews
+
+
+class IssueAccessTestCase(ShardedTestMixin, QueryBudgetTestMixin, APITestCase):
+    """
+    Projet avec son auteur, un contributeur, et un utilisateur extérieur ;
+    un problème de l'auteur commenté par l'auteur et par le contributeur.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUser.objects.create_user("author", password="x")
+        cls.contributor = CustomUser.objects.create_user("contributor", password="x")
+        cls.outsider = CustomUser.objects.create_user("outsider", password="x")
+
+        cls.project = Project.objects.create(
+            name="Projet",
+            description="",
+            type=Project.TYPE_CHOICES[0][0],
+            author=cls.author,
+        )
+        with use_project_shard(cls.project.pk):
+            Contributor.objects.create(
+                project=cls.project, user=cls.author, role=Contributor.ROLE_AUTHOR
+            )
+            Contributor.objects.create(
+                project=cls.project,
+                user=cls.contributor,
+                role=Contributor.ROLE_CONTRIBUTOR,
+            )
+            cls.issue = Issue.objects.create(
+                title="Problème", description="", project=cls.project, author=cls.author
+            )
+            cls.author_comment = Comment.objects.create(
+                description="Commentaire", issue=cls.issue, author=cls.author
+            )
+            cls.contributor_comment = Comment.objects.create(
+                description="Commentaire", issue=cls.issue, author=cls.contributor
+            )
+
+        # Autre projet dont seul l'utilisateur extérieur est contributeur
+        cls.other_project = Project.objects.create(
+            name="Autre",
+            description="",
+            type=Project.TYPE_CHOICES[0][0],
+            author=cls.outsider,
+        )
+        with use_project_shard(cls.other_project.pk):
+            Contributor.objects.create(
+                project=cls.other_project,
+                user=cls.outsider,
+                role=Contributor.ROLE_AUTHOR,
+            )
+
+    def issues_url(self, project=None):
+        return f"/api/projects/{(project or self.project).pk}/issues/"
+
+    def issue_url(self, project=None):
+        return f"{self.issues_url(project)}{self.issue.pk}/"
+
+    def comments_url(self, project=None):
+        return f"{self.issue_url(project)}comments/"
+
+    def comment_url(self, comment, project=None):
+        return f"{self.comments_url(project)}{comment.pk}/"
+
+
+class IssueAccessMatrixTests(IssueAccessTestCase):
+    """Statuts HTTP attendus pour chaque rôle sur chaque route imbriquée."""
+
+    def assertStatus(self, user, method, url, expected, data=None):
+        self.client.force_authenticate(user)
+        response = getattr(self.client, method)(url, data, format="json")
+        self.assertEqual(
+            response.status_code,
+            expected,
+            f"{user.username} {method.upper()} {url} : {response.status_code}",
+        )
+
+    def test_reads(self):
+        reads = [
+            self.issues_url(),
+            self.issue_url(),
+            self.comments_url(),
+            self.comment_url(self.author_comment),
+        ]
+        for user, expected in [
+            (self.author, 200),
+            (self.contributor, 200),
+            (self.outsider, 403),
+        ]:
+            for url in reads:
+                self.assertStatus(user, "get", url, expected)
+
+    def test_anonymous(self):
+        response = self.client.get(self.issues_url())
+        self.assertEqual(response.status_code, 401)
+
+    def test_issue_writes(self):
+        self.assertStatus(self.outsider, "patch", self.issue_url(), 403, {"title": "x"})
+        self.assertStatus(
+            self.contributor, "patch", self.issue_url(), 403, {"title": "x"}
+        )
+        self.assertStatus(self.author, "patch", self.issue_url(), 200, {"title": "x"})
+        self.assertStatus(
+            self.outsider,
+            "post",
+            self.issues_url(),
+            403,
+            {"title": "x", "description": "x"},
+        )
+        self.assertStatus(
+            self.contributor,
+            "post",
+            self.issues_url(),
+            201,
+            {"title": "x", "description": "x"},
+        )
+        self.assertStatus(self.contributor, "delete", self.issue_url(), 403)
+        self.assertStatus(self.author, "delete", self.issue_url(), 204)
+
+    def test_comment_writes(self):
+        author_comment = self.comment_url(self.author_comment)
+        contributor_comment = self.comment_url(self.contributor_comment)
+        self.assertStatus(
+            self.outsider, "post", self.comments_url(), 403, {"description": "x"}
+        )
+        self.assertStatus(
+            self.contributor, "post", self.comments_url(), 201, {"description": "x"}
+        )
+        self.assertStatus(
+            self.outsider, "patch", contributor_comment, 403, {"description": "x"}
+        )
+        self.assertStatus(
+            self.contributor, "patch", author_comment, 403, {"description": "x"}
+        )
+        self.assertStatus(
+            self.contributor, "patch", contributor_comment, 200, {"description": "x"}
+        )
+        self.assertStatus(self.author, "delete", contributor_comment, 403)
+        self.assertStatus(self.contributor, "delete", contributor_comment, 204)
+
+    def test_other_project_url(self):
+        """Le problème n'est pas accessible par l'URL d'un projet auquel il n'appartient pas."""
+        details = [
+            self.issue_url(self.other_project),
+            self.comment_url(self.author_comment, self.other_project),
+        ]
+        for url in details:
+            self.client.force_authenticate(self.outsider)
+            self.assertEqual(self.client.get(url).status_code, 404, url)
+            self.client.force_authenticate(self.contributor)
+            self.assertEqual(self.client.get(url).status_code, 403, url)
+
+        url = self.comments_url(self.other_project)
+        self.client.force_authenticate(self.outsider)
+        self.assertEqual(self.client.get(url).json()["count"], 0)
+        self.assertStatus(self.outsider, "post", url, 404, {"description": "x"})
+        self.assertStatus(self.contributor, "get", url, 403)
+
+
+class IssueQueryCountTests(IssueAccessTestCase):
+    """
+    Lecture : une requête d'appartenance au projet (has_permission), puis la
+    requête principale filtrée par la règle de lecture (projects/policies.py),
+    sans vérification supplémentaire par objet.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.contributor)
+
+    def test_issue_list(self):
+        # appartenance, COUNT, page
+        with self.assertMaxQueries(3 + SHARD_QUERIES):
+            self.assertEqual(self.client.get(self.issues_url()).status_code, 200)
+
+    def test_issue_retrieve(self):
+        # appartenance, problème, aperçus des commentaires
+        with self.assertMaxQueries(3 + SHARD_QUERIES):
+            self.assertEqual(self.client.get(self.issue_url()).status_code, 200)
+
+    def test_comment_list(self):
+        # appartenance, COUNT, page
+        with self.assertMaxQueries(3 + SHARD_QUERIES):
+            self.assertEqual(self.client.get(self.comments_url()).status_code, 200)
+
+    def test_comment_retrieve(self):
+        # appartenance, commentaire
+        with self.assertMaxQueries(2 + SHARD_QUERIES):
+            response = self.client.get(self.comment_url(self.author_comment))
+            self.assertEqual(response.status_code, 200)
+
+    def test_issue_create(self):
+        data = {"title": "Nouveau", "description": "Détail", "assignee_id": self.author.pk}
+
+        def create():
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(self.issues_url(), data, format="json")
+            self.assertEqual(response.status_code, 201, response.data)
+
+        # Identifiants réservés par blocs en mode shards : hors de la mesure
+        create()
+        # appartenance, utilisateur et appartenance de l'assignee, projet,
+        # transaction (SAVEPOINT et RELEASE en test) avec l'INSERT, aperçus des
+        # commentaires ; à la validation : historique, notification
+        with self.assertMaxQueries(10 + SHARD_QUERIES):
+            create()
+
+
+class IssueHistoryTests(IssueAccessTestCase):
+    """Historique des problèmes : enregistrement à la validation, lecture, compactage."""
+
+    def history_url(self):
+        return f"{self.issue_url()}history/"
+
+    def patch_issue(self, data):
+        self.client.force_authenticate(self.author)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(self.issue_url(), data, format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_update_is_recorded(self):
+        self.patch_issue(
+            {"status": "finished", "assignee_id": self.contributor.pk, "title": "Problème"}
+        )
+        self.patch_issue({"description": "Nouvelle description"})
+
+        self.client.force_authenticate(self.contributor)
+        response = self.client.get(self.history_url())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 2)
+        latest, first = response.data["results"]
+        self.assertEqual(latest["changes"], [{"field": "description"}])
+        self.assertEqual(first["action"], HistoryEntry.ISSUE_UPDATED)
+        self.assertEqual(first["actor_username"], "author")
+        self.assertEqual(
+            first["changes"],
+            [
+                {"field": "status", "old": "to_do", "new": "finished"},
+                {"field": "assignee", "old": None, "new": self.contributor.pk},
+            ],
+        )
+
+        self.client.force_authenticate(self.outsider)
+        self.assertEqual(self.client.get(self.history_url()).status_code, 403)
+
+    def test_batched_in_the_write_transaction(self):
+        actor = self.author
+        # Base du problème (son shard en mode shards)
+        db = self.issue._state.db
+
+        def update(status):
+            before = snapshot(self.issue)
+            self.issue.status = status
+            self.issue.save()
+            record_issue(HistoryEntry.ISSUE_UPDATED, self.issue, actor, before)
+
+        with (
+            CaptureQueriesContext(connections[db]) as queries,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            with history_batch(using=db):
+                update("in_progress")
+                update("finished")
+                # Lot imbriqué annulé seul
+                with history_batch(using=db):
+                    update("to_do")
+                    transaction.set_rollback(True, using=db)
+                self.assertFalse(HistoryEntry.objects.exists())
+            # Insérées à la fin du lot, dans sa transaction
+            self.assertEqual(HistoryEntry.objects.count(), 2)
+            # Hors lot : une ligne par on_commit, annulée avec son savepoint
+            with transaction.atomic(using=db):
+                update("in_progress")
+                transaction.set_rollback(True, using=db)
+
+        self.assertEqual(HistoryEntry.objects.count(), 2)
+        # Un seul INSERT : rien pour le lot imbriqué annulé
+        inserts = [q for q in queries if q["sql"].startswith('INSERT INTO "issues_hist')]
+        self.assertEqual(len(inserts), 1)
+
+    def test_compact_merges_old_changes(self):
+        old = timezone.now() - timedelta(days=60)
+        expired = timezone.now() - timedelta(days=400)
+        for changes, created_time in [
+            ('{"status":["to_do","in_progress"]}', old),
+            ('{"status":["in_progress","to_do"],"priority":["medium","high"]}', old),
+            ('{"status":["to_do","finished"]}', expired),
+        ]:
+            HistoryEntry.objects.create(
+                project=self.project,
+                action=HistoryEntry.ISSUE_UPDATED,
+                object_id=self.issue.pk,
+                actor=self.author,
+                created_time=created_time,
+                changes=changes,
+            )
+
+        counts = compact_history(retention_days=365, merge_after_days=30)
+
+        self.assertEqual(counts, {"deleted": 1, "merged": 1})
+        self.assertEqual(
+            list(HistoryEntry.objects.values_list("changes", flat=True)),
+            ['{"priority":["medium","high"]}'],
+        )
+
+
+@skipIf(settings.DATABASE_SHARDS, "admin des modèles répartis non disponible en mode shards")
+class IssueAdminSearchTests(IssueAccessTestCase):
+    """Recherche de l'admin par intervalle sur les colonnes indexées (core/admin.py)."""
+
+    def search(self, term):
+        model_admin = IssueAdmin(Issue, admin.site)
+        request = RequestFactory().get("/admin/issues/issue/", {"q": term})
+        request.user = self.author
+        queryset, _ = model_admin.get_search_results(request, Issue.objects.all(), term)
+        return queryset
+
+    def test_prefix_search(self):
+        for title in ("Problèmes d'affichage", "problème en minuscules"):
+            other = Issue.objects.create(
+                title=title, description="", project=self.project, author=self.author
+            )
+        titles = sorted(self.search("Problème").values_list("title", flat=True))
+        self.assertEqual(titles, ["Problème", "Problèmes d'affichage"])
+        # Par nom de projet, ou par identifiant
+        self.assertEqual(self.search("Proj").count(), 3)
+        self.assertEqual(list(self.search(str(other.pk))), [other])
+        self.assertEqual(self.search("").count(), 3)
+
+    def test_prefix_search_uses_the_title_index(self):
+        plan = self.search("Problème").explain()
+        self.assertIn("issue_title_idx", plan)
+        self.assertIn("project_name_idx", plan)
+
+
+class CommentPreviewTests(IssueAccessTestCase):
+    """Derniers commentaires de chaque problème (ROW_NUMBER() par problème)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        with use_project_shard(cls.project.pk):
+            cls.second = Issue.objects.create(
+                title="Second", description="", project=cls.project, author=cls.author
+            )
+            cls.latest = [
+                Comment.objects.create(
+                    description=f"{i} " + "x" * 150,
+                    issue=cls.issue,
+                    author=cls.contributor,
+                )
+                for i in range(6)
+            ]
+            Comment.objects.create(
+                description="Seul", issue=cls.second, author=cls.author
+            )
+
+    def test_window_keeps_the_latest_comments_of_each_issue(self):
+        previews = comment_previews([self.issue.pk, self.second.pk], count=3, length=10)
+
+        self.assertEqual(
+            [p["id"] for p in previews[self.issue.pk]],
+            [c.pk for c in reversed(self.latest[-3:])],
+        )
+        self.assertEqual(previews[self.issue.pk][0]["description"], "5 xxxxxxxx...")
+        self.assertEqual(previews[self.issue.pk][0]["author_username"], "contributor")
+        self.assertEqual([p["description"] for p in previews[self.second.pk]], ["Seul"])
+        self.assertEqual(comment_previews([]), {})
+
+    def test_list_with_comments_preview(self):
+        self.client.force_authenticate(self.contributor)
+        # appartenance, COUNT, page, aperçus de toute la page
+        with self.assertMaxQueries(4 + SHARD_QUERIES):
+            response = self.client.get(self.issues_url(), {"comments_preview": "1"})
+        issues = {issue["id"]: issue for issue in response.data["results"]}
+        self.assertEqual(len(issues[self.issue.pk]["comments_preview"]), PREVIEW_COUNT)
+        self.assertEqual(len(issues[self.second.pk]["comments_preview"]), 1)
+
+        response = self.client.get(self.issues_url())
+        self.assertNotIn("comments_preview", response.data["results"][0])
+
+
+class IssueExportTests(IssueAccessTestCase):
+    """Export en streaming : formats, commentaires, pages bornées."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        with use_project_shard(cls.project.pk):
+            # Problème sans commentaire, puis un problème très commenté
+            cls.quiet = Issue.objects.create(
+                title="Calme", description="", project=cls.project, author=cls.author
+            )
+            cls.busy = Issue.objects.create(
+                title="Chargé", description="", project=cls.project, author=cls.author
+            )
+            for index in range(3):
+                Comment.objects.create(
+                    description=f"c{index}", issue=cls.busy, author=cls.contributor
+                )
+
+    def export(self, **params):
+        self.client.force_authenticate(self.contributor)
+        response = self.client.get(f"{self.issues_url()}export/", params)
+        self.assertEqual(response.status_code, 200)
+        return response, b"".join(response.streaming_content).decode()
+
+    def expected_comments(self):
+        return {
+            issue.pk: list(
+                issue.comments.order_by("id").values_list("description", flat=True)
+            )
+            for issue in (self.issue, self.quiet, self.busy)
+        }
+
+    def test_ndjson(self):
+        response, content = self.export()
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(
+            [line["id"] for line in lines], [self.issue.pk, self.quiet.pk, self.busy.pk]
+        )
+        self.assertEqual(lines[0]["author_username"], "author")
+        self.assertNotIn("comments", lines[0])
+
+    def test_ndjson_with_comments(self):
+        _, content = self.export(comments=1)
+        lines = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(
+            {line["id"]: [c["description"] for c in line["comments"]] for line in lines},
+            self.expected_comments(),
+        )
+        self.assertEqual(lines[2]["comments"][0]["author_username"], "contributor")
+
+    def test_csv_with_comments(self):
+        response, content = self.export(output="csv", comments="true")
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(
+            [(row["type"], int(row["issue_id"])) for row in rows],
+            [("issue", self.issue.pk)]
+            + [("comment", self.issue.pk)] * 2
+            + [("issue", self.quiet.pk), ("issue", self.busy.pk)]
+            + [("comment", self.busy.pk)] * 3,
+        )
+
+    def test_unknown_format(self):
+        self.client.force_authenticate(self.contributor)
+        response = self.client.get(f"{self.issues_url()}export/", {"output": "xml"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_outsider_cannot_export(self):
+        self.client.force_authenticate(self.outsider)
+        response = self.client.get(f"{self.issues_url()}export/")
+        self.assertEqual(response.status_code, 403)
+
+    def test_comment_pages_are_bounded(self):
+        batches = list(iter_export_rows(self.project.pk, True, chunk_size=2))
+        for rows in batches:
+            kinds = [kind for kind, _ in rows]
+            self.assertLessEqual(kinds.count("issue"), 2)
+            self.assertLessEqual(kinds.count("comment"), 2)
+
+        # Chaque problème suivi de ses commentaires, dans l'ordre
+        comments = {}
+        for kind, row in (row for rows in batches for row in rows):
+            if kind == "issue":
+                current = comments.setdefault(row["id"], [])
+            else:
+                current.append(row["description"])
+        self.assertEqual(comments, self.expected_comments())
+
+
+class IssueArchiveTests(IssueAccessTestCase):
+    """Archivage des problèmes terminés, lecture et restauration par l'API."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        with use_project_shard(cls.project.pk):
+            cls.active = Issue.objects.create(
+                title="Actif", description="", project=cls.project, author=cls.author
+            )
+            # Terminé aujourd'hui : pas encore archivable
+            cls.recent = Issue.objects.create(
+                title="Récent",
+                description="",
+                project=cls.project,
+                author=cls.author,
+                status="finished",
+            )
+            Issue.objects.filter(pk=cls.issue.pk).update(
+                status="finished", finished_time=timezone.now() - timedelta(days=100)
+            )
+            cls.counts = archive_issues()
+
+    def test_archive_issues(self):
+        self.assertEqual(self.counts, {"issues": 1, "comments": 2})
+        self.assertFalse(Issue.objects.filter(pk=self.issue.pk).exists())
+        self.assertEqual(
+            set(ArchivedComment.objects.values_list("pk", flat=True)),
+            {self.author_comment.pk, self.contributor_comment.pk},
+        )
+        self.assertEqual(ArchivedIssue.objects.get().title, "Problème")
+        self.assertEqual(
+            set(Issue.objects.values_list("pk", flat=True)),
+            {self.active.pk, self.recent.pk},
+        )
+
+    def test_restore_issues(self):
+        self.assertEqual(restore_issues([self.issue.pk, 999_999]), 1)
+        self.assertEqual(Issue.objects.get(pk=self.issue.pk).title, "Problème")
+        self.assertEqual(Comment.objects.filter(issue=self.issue).count(), 2)
+        self.assertFalse(ArchivedIssue.objects.exists())
+        self.assertFalse(ArchivedComment.objects.exists())
+        self.assertEqual(restore_issues([self.issue.pk]), 0)
+
+    def test_list_include_archived(self):
+        self.client.force_authenticate(self.contributor)
+        response = self.client.get(self.issues_url())
+        self.assertEqual(response.data["count"], 2)
+
+        response = self.client.get(self.issues_url(), {"include_archived": 1})
+        self.assertEqual(response.data["count"], 3)
+        # Les actifs d'abord, puis les archivés
+        self.assertEqual(response.data["results"][-1]["id"], self.issue.pk)
+        self.assertEqual(response.data["results"][-1]["comments_count"], 2)
+
+    def test_detail_and_comments_include_archived(self):
+        self.client.force_authenticate(self.contributor)
+        self.assertEqual(self.client.get(self.issue_url()).status_code, 404)
+        response = self.client.get(self.issue_url(), {"include_archived": 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["title"], "Problème")
+
+        response = self.client.get(self.comments_url(), {"include_archived": 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 2)
+
+        self.client.force_authenticate(self.outsider)
+        response = self.client.get(self.issues_url(), {"include_archived": 1})
+        self.assertEqual(response.status_code, 403)
+
+    def test_forbidden_comment_update_does_not_restore(self):
+        self.client.force_authenticate(self.contributor)
+        response = self.client.patch(
+            self.comment_url(self.author_comment), {"description": "x"}, format="json"
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Issue.objects.filter(pk=self.issue.pk).exists())
+
+    def test_comment_update_restores_issue(self):
+        self.client.force_authenticate(self.contributor)
+        response = self.client.patch(
+            self.comment_url(self.contributor_comment),
+            {"description": "Modifié"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            Comment.objects.get(pk=self.contributor_comment.pk).description, "Modifié"
+        )
+        self.assertFalse(ArchivedIssue.objects.exists())
+
+    def test_comment_create_restores_issue(self):
+        self.client.force_authenticate(self.contributor)
+        response = self.client.post(
+            self.comments_url(), {"description": "Nouveau"}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Comment.objects.filter(issue_id=self.issue.pk).count(), 3)
+
+    def test_chained_querysets_slicing(self):
+        restore_issues([self.issue.pk])
+        first = Issue.objects.filter(pk__in=[self.issue.pk, self.active.pk])
+        first = first.order_by("id")
+        second = Issue.objects.filter(pk=self.recent.pk)
+        chained = ChainedQuerySets(first, second)
+        pks = [self.issue.pk, self.active.pk, self.recent.pk]
+
+        self.assertEqual(len(chained), 3)
+        for start, stop in [(0, 1), (1, 3), (2, 10), (0, None), (3, 5)]:
+            self.assertEqual(
+                [issue.pk for issue in chained[start:stop]], pks[start:stop]
+            )
+        with self.assertRaises(TypeError):
+            chained[0]
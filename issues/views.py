@@ -1,13 +1,48 @@
 from rest_framework import viewsets
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from .models import Issue, Comment
-from .serializers import IssueListSerializer, IssueDetailSerializer, CommentSerializer
+from .archive import ChainedQuerySets, restore_issues
+from .exports import EXPORT_FORMATS, EXPORTERS
+from .history import history_batch, record_issue, snapshot
+from .models import ArchivedComment, ArchivedIssue, HistoryEntry, Issue, Comment
+from .previews import comment_previews
+from .serializers import (
+    IssueListSerializer,
+    IssueDetailSerializer,
+    CommentSerializer,
+    HistoryEntrySerializer,
+)
 from .permissions import IsIssueAuthorOrReadOnly, IsCommentAuthorOrReadOnly
+from core.sharding import ProjectShardMixin, joinable
+from notifications.events import notify_comment_created, notify_issue_assigned
 from projects.models import Project
+from projects.policies import readable_by
+from users.fields import user_relations
 
 
-class IssueViewSet(viewsets.ModelViewSet):
+def include_archived(request):
+    """?include_archived=1 : les problèmes archivés sont lisibles."""
+    return request.query_params.get("include_archived") in ("1", "true")
+
+
+def comments_count(comment_model):
+    """Nombre de commentaires par une sous-requête, sans charger les commentaires."""
+    counts = (
+        comment_model.objects.filter(issue=OuterRef("pk"))
+        .order_by()
+        .values("issue")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+class IssueViewSet(ProjectShardMixin, viewsets.ModelViewSet):
     """
     ViewSet pour gérer les problèmes/tickets d'un projet.
 
@@ -16,6 +51,11 @@ class IssueViewSet(viewsets.ModelViewSet):
     - create: Crée un nouveau problème (contributeurs)
     - update/partial_update: Modifie un problème (auteur uniquement)
     - destroy: Supprime un problème (auteur uniquement)
+    - export: Exporte tous les problèmes en NDJSON/CSV, en streaming (contributeurs)
+    - history: Historique paginé des modifications d'un problème (contributeurs)
+
+    Problèmes archivés (issues/archive.py) : list et retrieve les incluent avec
+    ?include_archived=1 ; une écriture sur un problème archivé le restaure.
 
     Permissions :
     - IsAuthenticated : utilisateur authentifié requis
@@ -25,15 +65,94 @@ class IssueViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated, IsIssueAuthorOrReadOnly]
 
     def get_queryset(self):
-        """Retourne les problèmes du projet spécifié.
-        Optimisé avec select_related et prefetch_related.
+        """Retourne les problèmes du projet spécifié, lisibles par l'utilisateur.
+        Optimisé avec select_related ; les commentaires ne sont jamais tous chargés.
         """
         project_pk = self.kwargs.get("project_pk")
-        return (
-            Issue.objects.filter(project_id=project_pk)
-            .select_related("author", "assignee", "project")  # Charge en une requête
-            .prefetch_related("comments")  # Charge les commentaires si nécessaire
+        queryset = readable_by(
+            Issue.objects.filter(project_id=project_pk), self.request.user
         )
+        # Charge en une requête (sans les utilisateurs si leurs usernames sont dénormalisés)
+        relations = [*joinable("project"), *user_relations("author", "assignee")]
+        if relations:
+            # select_related() sans argument suivrait toutes les relations
+            queryset = queryset.select_related(*relations)
+        if self.action == "list":
+            return queryset.annotate(comments_count=comments_count(Comment))
+        # comments_list du détail : aperçus chargés à part (issues/previews.py)
+        return queryset
+
+    def get_archived_queryset(self):
+        """Problèmes archivés du projet, chargés comme ceux de get_queryset."""
+        queryset = readable_by(
+            ArchivedIssue.objects.filter(project_id=self.kwargs.get("project_pk")),
+            self.request.user,
+        )
+        relations = [*joinable("project"), *user_relations("author", "assignee")]
+        if relations:
+            queryset = queryset.select_related(*relations)
+        if self.action == "list":
+            return queryset.annotate(comments_count=comments_count(ArchivedComment))
+        return queryset
+
+    def filter_queryset(self, queryset):
+        """Liste avec ?include_archived=1 : les problèmes actifs, puis les archivés."""
+        queryset = super().filter_queryset(queryset)
+        if self.action == "list" and include_archived(self.request):
+            return ChainedQuerySets(queryset, self.get_archived_queryset())
+        return queryset
+
+    def get_object(self):
+        """
+        Problème absent de Issue mais archivé : retourné tel quel en lecture
+        (?include_archived=1), restauré avant une écriture (réouverture,
+        modification, suppression), après vérification des permissions.
+        """
+        try:
+            return super().get_object()
+        except Http404:
+            safe = self.request.method in SAFE_METHODS
+            if safe and not include_archived(self.request):
+                raise
+            archived = (
+                self.get_archived_queryset().filter(pk=self.kwargs.get("pk")).first()
+            )
+            if archived is None:
+                raise
+            self.check_object_permissions(self.request, archived)
+            if safe:
+                return archived
+            restore_issues([archived.pk])
+            return super().get_object()
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if include_archived(self.request):
+            context["include_archived"] = True
+        return context
+
+    def get_serializer(self, *args, **kwargs):
+        """
+        Liste avec ?comments_preview=1 : les aperçus des commentaires de toute
+        la page sont chargés en une seule requête et passés au serializer.
+        """
+        if (
+            self.action == "list"
+            and args
+            and self.request.query_params.get("comments_preview") in ("1", "true")
+        ):
+            kwargs["context"] = self.get_serializer_context()
+            previews = comment_previews(
+                [issue.pk for issue in args[0] if not isinstance(issue, ArchivedIssue)]
+            )
+            previews.update(
+                comment_previews(
+                    [issue.pk for issue in args[0] if isinstance(issue, ArchivedIssue)],
+                    model=ArchivedComment,
+                )
+            )
+            kwargs["context"]["comment_previews"] = previews
+        return super().get_serializer(*args, **kwargs)
 
     def get_serializer_class(self):
         """Utilise un serializer différent selon l'action."""
@@ -41,6 +160,30 @@ class IssueViewSet(viewsets.ModelViewSet):
             return IssueDetailSerializer
         return IssueListSerializer
 
+    @action(detail=False, methods=["get"])
+    def export(self, request, project_pk=None):
+        """
+        GET: Exporte tous les problèmes du projet en streaming, sans pagination.
+        ?output=ndjson (défaut) ou csv ; ?comments=1 inclut les commentaires.
+        Mêmes permissions que la liste (contributeurs du projet).
+        """
+        output = request.query_params.get("output", "ndjson")
+        if output not in EXPORTERS:
+            raise ValidationError(
+                {"output": f"Format inconnu, valeurs possibles : {', '.join(EXPORTERS)}."}
+            )
+        with_comments = request.query_params.get("comments") in ("1", "true")
+        get_object_or_404(Project.objects.alive(), pk=project_pk)
+
+        response = StreamingHttpResponse(
+            EXPORTERS[output](project_pk, with_comments),
+            content_type=EXPORT_FORMATS[output],
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="project-{project_pk}-issues.{output}"'
+        )
+        return response
+
     def perform_create(self, serializer):
         """
         L'auteur est automatiquement l'utilisateur connecté.
@@ -48,14 +191,48 @@ class IssueViewSet(viewsets.ModelViewSet):
         Les permissions sont vérifiées par IsIssueAuthorOrReadOnly.
         """
         project_pk = self.kwargs.get("project_pk")
-        project = get_object_or_404(Project, pk=project_pk)
+        project = get_object_or_404(Project.objects.alive(), pk=project_pk)
+
+        # Écriture et historique dans une seule transaction
+        with history_batch():
+            issue = serializer.save(author=self.request.user, project=project)
+            record_issue(HistoryEntry.ISSUE_CREATED, issue, self.request.user)
+            notify_issue_assigned(issue, self.request.user)
 
-        serializer.save(author=self.request.user, project=project)
+    def perform_update(self, serializer):
+        """Historise les champs modifiés (valeurs précédentes lues sur l'instance chargée)."""
+        before = snapshot(serializer.instance)
+        with history_batch():
+            issue = serializer.save()
+            record_issue(HistoryEntry.ISSUE_UPDATED, issue, self.request.user, before)
+            if issue.assignee_id != before["assignee"]:
+                notify_issue_assigned(issue, self.request.user)
+
+    def perform_destroy(self, instance):
+        with history_batch():
+            record_issue(HistoryEntry.ISSUE_DELETED, instance, self.request.user)
+            instance.delete()
+
+    @action(detail=True, methods=["get"])
+    def history(self, request, project_pk=None, pk=None):
+        """
+        GET: Historique du problème, du plus récent au plus ancien, paginé.
+        Mêmes permissions que le détail (problème archivé : ?include_archived=1).
+        """
+        issue = self.get_object()
+        queryset = HistoryEntry.objects.filter(
+            object_id=issue.pk, action__in=HistoryEntry.ISSUE_ACTIONS
+        )
+        if user_relations("actor"):
+            queryset = queryset.select_related(*user_relations("actor"))
+        page = self.paginate_queryset(queryset)
+        serializer = HistoryEntrySerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     # Les permissions update et destroy sont gérées automatiquement par IsIssueAuthorOrReadOnly
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ProjectShardMixin, viewsets.ModelViewSet):
     """
     ViewSet pour gérer les commentaires d'un problème.
 
@@ -65,6 +242,9 @@ class CommentViewSet(viewsets.ModelViewSet):
     - update/partial_update: Modifie un commentaire (auteur uniquement)
     - destroy: Supprime un commentaire (auteur uniquement)
 
+    Problème archivé : commentaires lisibles avec ?include_archived=1 ; une
+    écriture restaure d'abord le problème et ses commentaires.
+
     Permissions :
     - IsAuthenticated : utilisateur authentifié requis
     - IsCommentAuthorOrReadOnly : contributeur peut lire, auteur peut modifier/supprimer
@@ -74,24 +254,85 @@ class CommentViewSet(viewsets.ModelViewSet):
     serializer_class = CommentSerializer
 
     def get_queryset(self):
-        """Retourne les commentaires du problème spécifié.
-        Optimisé avec select_related.
+        """Retourne les commentaires du problème spécifié, lisibles par l'utilisateur.
+        Le problème doit appartenir au projet de l'URL.
         """
         issue_pk = self.kwargs.get("issue_pk")
-        return (
-            Comment.objects.filter(issue_id=issue_pk)
-            .select_related("author", "issue")  # Charge en une requête
+        project_pk = self.kwargs.get("project_pk")
+        model = Comment
+        if (
+            self.request.method in SAFE_METHODS
+            and include_archived(self.request)
+            and not Issue.objects.filter(pk=issue_pk).exists()
+        ):
+            model = ArchivedComment
+        queryset = readable_by(
+            model.objects.filter(issue_id=issue_pk, issue__project_id=project_pk),
+            self.request.user,
+            "issue__project",
+        )
+        if user_relations("author"):
+            queryset = queryset.select_related(*user_relations("author"))
+        return queryset
+
+    def _restore_archived_issue(self):
+        restore_issues(
+            ArchivedIssue.objects.filter(
+                pk=self.kwargs.get("issue_pk"), project_id=self.kwargs.get("project_pk")
+            ).values_list("pk", flat=True)
         )
 
+    def initial(self, request, *args, **kwargs):
+        """Création sur un problème archivé : restauration après les permissions."""
+        super().initial(request, *args, **kwargs)
+        if (
+            self.action == "create"
+            and not Issue.objects.filter(
+                pk=self.kwargs.get("issue_pk"), project_id=self.kwargs.get("project_pk")
+            ).exists()
+        ):
+            self._restore_archived_issue()
+
+    def get_object(self):
+        """
+        Modification ou suppression d'un commentaire d'un problème archivé :
+        le problème n'est restauré qu'une fois les permissions de l'objet
+        vérifiées sur le commentaire archivé.
+        """
+        try:
+            return super().get_object()
+        except Http404:
+            if self.request.method in SAFE_METHODS:
+                raise
+            archived = (
+                readable_by(
+                    ArchivedComment.objects.filter(
+                        issue_id=self.kwargs.get("issue_pk"),
+                        issue__project_id=self.kwargs.get("project_pk"),
+                    ),
+                    self.request.user,
+                    "issue__project",
+                )
+                .filter(pk=self.kwargs.get("pk"))
+                .first()
+            )
+            if archived is None:
+                raise
+            self.check_object_permissions(self.request, archived)
+            self._restore_archived_issue()
+            return super().get_object()
+
     def perform_create(self, serializer):
         """
         L'auteur est automatiquement l'utilisateur connecté.
         Le problème est automatiquement celui de l'URL.
         Les permissions sont vérifiées par IsCommentAuthorOrReadOnly.
         """
-        issue_pk = self.kwargs.get("issue_pk")
-        issue = Issue.objects.get(pk=issue_pk)
+        issue = get_object_or_404(
+            Issue, pk=self.kwargs.get("issue_pk"), project_id=self.kwargs.get("project_pk")
+        )
 
-        serializer.save(author=self.request.user, issue=issue)
+        comment = serializer.save(author=self.request.user, issue=issue)
+        notify_comment_created(comment, self.request.user)
 
     # Les permissions update et destroy sont gérées automatiquement par IsCommentAuthorOrReadOnly
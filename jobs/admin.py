@@ -0,0 +1,12 @@
+from django.contrib import admin
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """Interface d'administration pour les tâches différées."""
+
+    list_display = ["id", "name", "status", "attempts", "user", "run_after", "created_time"]
+    list_filter = ["status", "name"]
+    search_fields = ["name"]
+    readonly_fields = ["created_time", "finished_time", "locked_by", "locked_until"]
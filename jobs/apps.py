@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class JobsConfig(AppConfig):
+    name = 'jobs'
+
+    def ready(self):
+        """Importe les modules tasks.py de chaque application pour enregistrer leurs tâches."""
+        autodiscover_modules("tasks")
@@ -0,0 +1,28 @@
+"""
+Purge les tâches terminées : python manage.py prune_jobs
+
+À planifier (cron) : chaque tâche (notifications, exports, suppressions...)
+laisse une ligne dans la file, supprimée ici JOBS["RETENTION_DAYS"] jours
+après sa fin. Les tâches en attente ou en cours sont conservées. Sans danger
+à relancer.
+"""
+
+from django.core.management.base import BaseCommand
+
+from jobs.queue import prune_finished_jobs
+
+
+class Command(BaseCommand):
+    help = "Supprime les tâches terminées depuis plus de RETENTION_DAYS jours."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retention-days",
+            type=int,
+            default=None,
+            help='Âge de suppression (JOBS["RETENTION_DAYS"] par défaut).',
+        )
+
+    def handle(self, *args, **options):
+        deleted = prune_finished_jobs(options["retention_days"])
+        self.stdout.write(self.style.SUCCESS(f"{deleted} tâches supprimées."))
@@ -0,0 +1,50 @@
+"""
+Worker de la file de tâches : python manage.py run_worker --concurrency 4
+"""
+
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    help = "Exécute les tâches différées (suppressions, exports...) en arrière-plan."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=settings.JOBS["CONCURRENCY"],
+            help="Nombre de tâches exécutées en parallèle (threads).",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=settings.JOBS["POLL_INTERVAL"],
+            help="Délai en secondes entre deux interrogations d'une file vide.",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="S'arrête dès que la file est vide.",
+        )
+
+    def handle(self, *args, **options):
+        worker = Worker(
+            concurrency=options["concurrency"],
+            poll_interval=options["poll_interval"],
+            burst=options["burst"],
+        )
+
+        # Arrêt propre : les tâches en cours se terminent
+        def shutdown(signum, frame):
+            self.stdout.write("Arrêt demandé, fin des tâches en cours...")
+            worker.stop()
+
+        signal.signal(signal.SIGINT, shutdown)
+        signal.signal(signal.SIGTERM, shutdown)
+
+        worker.run()
@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """
+    Tâche différée exécutée par un worker (python manage.py run_worker).
+
+    Un worker « réserve » une tâche en posant locked_until (délai de visibilité) :
+    si le worker meurt sans la terminer, elle redevient disponible à l'expiration
+    du délai et est retentée tant que max_attempts n'est pas atteint.
+    """
+
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_SUCCEEDED = "succeeded"
+    STATUS_FAILED = "failed"
+
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "En attente"),
+        (STATUS_RUNNING, "En cours"),
+        (STATUS_SUCCEEDED, "Terminée"),
+        (STATUS_FAILED, "Échouée"),
+    ]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    user = models.ForeignKey(
+        "users.CustomUser",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="jobs",
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    progress = models.JSONField(default=dict, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_time = models.DateTimeField(auto_now_add=True)
+    finished_time = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_time"]
+        indexes = [models.Index(fields=["status", "run_after"])]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+    def report_progress(self, **progress):
+        """
+        Enregistre l'avancement de la tâche et prolonge sa réservation.
+        À appeler régulièrement par les tâches longues (ex. après chaque lot).
+        """
+        self.progress.update(progress)
+        self.locked_until = timezone.now() + timedelta(
+            seconds=settings.JOBS["VISIBILITY_TIMEOUT"]
+        )
+        Job.objects.filter(pk=self.pk, locked_by=self.locked_by).update(
+            progress=self.progress, locked_until=self.locked_until
+        )
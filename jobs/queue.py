@@ -0,0 +1,161 @@
+"""
+File de tâches en base de données.
+
+- task() : enregistre une fonction comme tâche, sous un nom stable
+- enqueue() : ajoute une tâche à la file (dans la transaction courante)
+- claim_next() / run_job() : utilisés par le worker (jobs/worker.py)
+- prune_finished_jobs() : purge des tâches terminées (prune_jobs)
+
+Une tâche est une fonction fun(job, **payload) : le payload doit être
+sérialisable en JSON (des ids plutôt que des instances), et la valeur
+retournée (JSON elle aussi) est stockée dans job.result.
+
+Chaque application déclare ses tâches dans un module tasks.py, importé
+automatiquement au démarrage (voir JobsConfig.ready).
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Tâches enregistrées : nom -> fonction
+TASKS = {}
+
+
+def task(name):
+    """Décorateur qui enregistre une fonction comme tâche différée."""
+
+    def decorator(func):
+        if name in TASKS and TASKS[name] is not func:
+            raise ValueError(f"Tâche déjà enregistrée : {name}")
+        TASKS[name] = func
+        func.task_name = name
+        return func
+
+    return decorator
+
+
+def enqueue(name, payload=None, user=None, run_after=None, max_attempts=None, unique=False):
+    """
+    Ajoute une tâche à la file et retourne le Job créé.
+
+    unique : si une tâche identique (même nom, même payload) est déjà en
+    attente, elle est retournée au lieu d'en créer une nouvelle.
+    """
+    if name not in TASKS:
+        raise ValueError(f"Tâche inconnue : {name}")
+
+    payload = payload or {}
+    if unique:
+        existing = Job.objects.filter(
+            name=name, payload=payload, status=Job.STATUS_QUEUED
+        ).first()
+        if existing:
+            return existing
+
+    return Job.objects.create(
+        name=name,
+        payload=payload,
+        user=user,
+        run_after=run_after or timezone.now(),
+        max_attempts=max_attempts or settings.JOBS["MAX_ATTEMPTS"],
+    )
+
+
+def _available(now):
+    """Tâches prêtes : en attente, ou en cours mais dont la réservation a expiré."""
+    return Q(status=Job.STATUS_QUEUED, run_after__lte=now) | Q(
+        status=Job.STATUS_RUNNING, locked_until__lt=now
+    )
+
+
+def claim_next(worker_id):
+    """
+    Réserve la prochaine tâche disponible pour worker_id et la retourne (ou None).
+
+    La réservation est un UPDATE conditionnel : si deux workers visent la même
+    tâche, un seul voit sa mise à jour aboutir. Pas besoin de SELECT FOR UPDATE
+    (non supporté par SQLite).
+    """
+    now = timezone.now()
+    candidates = list(
+        Job.objects.filter(_available(now))
+        .order_by("run_after", "id")
+        .values_list("pk", flat=True)[:10]
+    )
+    for pk in candidates:
+        claimed = (
+            Job.objects.filter(_available(now), pk=pk).update(
+                status=Job.STATUS_RUNNING,
+                locked_by=worker_id,
+                locked_until=now + timedelta(seconds=settings.JOBS["VISIBILITY_TIMEOUT"]),
+                attempts=F("attempts") + 1,
+            )
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def _finish(job, **fields):
+    """Met à jour la tâche, uniquement si ce worker en détient encore la réservation."""
+    updated = Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(
+        locked_until=None, **fields
+    )
+    if not updated:
+        logger.warning("Réservation perdue pour %s, résultat ignoré.", job)
+
+
+def run_job(job):
+    """Exécute une tâche réservée et enregistre son résultat ou son échec."""
+    func = TASKS.get(job.name)
+
+    if func is None or job.attempts > job.max_attempts:
+        reason = "Tâche inconnue" if func is None else "Nombre maximal de tentatives atteint"
+        _finish(job, status=Job.STATUS_FAILED, error=reason, finished_time=timezone.now())
+        return
+
+    try:
+        result = func(job, **job.payload)
+    except Exception as exc:
+        logger.exception("Échec de la tâche %s (tentative %s)", job, job.attempts)
+        error = f"{type(exc).__name__}: {exc}"
+        if job.attempts >= job.max_attempts:
+            _finish(job, status=Job.STATUS_FAILED, error=error, finished_time=timezone.now())
+        else:
+            # Nouvel essai avec un délai croissant (backoff exponentiel)
+            delay = settings.JOBS["RETRY_BACKOFF"] * 2 ** (job.attempts - 1)
+            _finish(
+                job,
+                status=Job.STATUS_QUEUED,
+                error=error,
+                run_after=timezone.now() + timedelta(seconds=delay),
+            )
+    else:
+        _finish(
+            job,
+            status=Job.STATUS_SUCCEEDED,
+            result=result,
+            error="",
+            finished_time=timezone.now(),
+        )
+
+
+def prune_finished_jobs(retention_days=None):
+    """
+    Supprime les tâches terminées (réussies ou échouées) depuis plus de
+    retention_days jours (JOBS["RETENTION_DAYS"] par défaut) ; retourne leur nombre.
+    """
+    if retention_days is None:
+        retention_days = settings.JOBS["RETENTION_DAYS"]
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    return Job.objects.filter(
+        status__in=[Job.STATUS_SUCCEEDED, Job.STATUS_FAILED], finished_time__lt=cutoff
+    ).delete()[0]
@@ -0,0 +1,21 @@
+from rest_framework import serializers
+from .models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """Serializer pour le suivi d'une tâche différée."""
+
+    class Meta:
+        model = Job
+        fields = [
+            "id",
+            "name",
+            "status",
+            "attempts",
+            "progress",
+            "result",
+            "error",
+            "created_time",
+            "finished_time",
+        ]
+        read_only_fields = fields
@@ -0,0 +1,160 @@
+from datetime import timedelta
+
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from core.testing import QueryBudgetTestMixin
+from users.models import CustomUser
+from .models import Job
+from .queue import claim_next, enqueue, prune_finished_jobs, run_job, task
+from .worker import Worker
+
+CALLS = []
+
+
+@task("tests.record")
+def record(job, value):
+    CALLS.append(value)
+    return {"value": value}
+
+
+@task("tests.fail")
+def fail(job):
+    raise RuntimeError("échec")
+
+
+class QueueTests(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_claim_next_reserves_in_order(self):
+        later = enqueue("tests.record", {"value": 2})
+        first = enqueue(
+            "tests.record", {"value": 1}, run_after=later.run_after - timedelta(seconds=1)
+        )
+        enqueue(
+            "tests.record", {"value": 3}, run_after=timezone.now() + timedelta(hours=1)
+        )
+
+        job = claim_next("w1")
+        self.assertEqual(job.pk, first.pk)
+        self.assertEqual(
+            (job.status, job.locked_by, job.attempts), (Job.STATUS_RUNNING, "w1", 1)
+        )
+        self.assertEqual(claim_next("w2").pk, later.pk)
+        # La dernière n'est pas encore due
+        self.assertIsNone(claim_next("w3"))
+
+    def test_run_job_stores_result(self):
+        enqueue("tests.record", {"value": 1})
+        job = claim_next("w1")
+        run_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_SUCCEEDED)
+        self.assertEqual(job.result, {"value": 1})
+        self.assertIsNone(job.locked_until)
+        self.assertEqual(CALLS, [1])
+
+    def test_unique(self):
+        job = enqueue("tests.record", {"value": 1}, unique=True)
+        self.assertEqual(enqueue("tests.record", {"value": 1}, unique=True), job)
+        self.assertNotEqual(enqueue("tests.record", {"value": 2}, unique=True), job)
+
+    def test_prune_finished_jobs(self):
+        old = timezone.now() - timedelta(days=8)
+        succeeded = enqueue("tests.record", {"value": 1})
+        failed = enqueue("tests.record", {"value": 2})
+        recent = enqueue("tests.record", {"value": 3})
+        queued = enqueue("tests.record", {"value": 4})
+        Job.objects.filter(pk=succeeded.pk).update(
+            status=Job.STATUS_SUCCEEDED, finished_time=old
+        )
+        Job.objects.filter(pk=failed.pk).update(status=Job.STATUS_FAILED, finished_time=old)
+        Job.objects.filter(pk=recent.pk).update(
+            status=Job.STATUS_SUCCEEDED, finished_time=timezone.now()
+        )
+
+        self.assertEqual(prune_finished_jobs(retention_days=7), 2)
+        # Les tâches récentes et en attente sont conservées
+        self.assertCountEqual(
+            Job.objects.values_list("pk", flat=True), [recent.pk, queued.pk]
+        )
+
+    def test_unknown_task(self):
+        with self.assertRaises(ValueError):
+            enqueue("tests.unknown")
+
+    @override_settings(
+        JOBS={"VISIBILITY_TIMEOUT": 300, "MAX_ATTEMPTS": 2, "RETRY_BACKOFF": 30}
+    )
+    def test_retry_with_backoff_then_fail(self):
+        enqueue("tests.fail")
+        job = claim_next("w1")
+        with self.assertLogs("jobs.queue", "ERROR"):
+            run_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_QUEUED)
+        self.assertEqual(job.error, "RuntimeError: échec")
+        self.assertGreater(job.run_after, timezone.now() + timedelta(seconds=25))
+        self.assertIsNone(claim_next("w1"))
+
+        # Délai écoulé : 2e et dernière tentative
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        job = claim_next("w1")
+        self.assertEqual(job.attempts, 2)
+        with self.assertLogs("jobs.queue", "ERROR"):
+            run_job(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_FAILED)
+        self.assertIsNotNone(job.finished_time)
+
+    def test_expired_lock_is_claimed_again(self):
+        enqueue("tests.record", {"value": 1})
+        stale = claim_next("w1")
+        self.assertIsNone(claim_next("w2"))
+
+        # w1 est mort : la réservation expire et w2 reprend la tâche
+        Job.objects.filter(pk=stale.pk).update(
+            locked_until=timezone.now() - timedelta(seconds=1)
+        )
+        job = claim_next("w2")
+        self.assertEqual((job.pk, job.locked_by, job.attempts), (stale.pk, "w2", 2))
+        run_job(job)
+
+        # Le résultat tardif de w1 est ignoré : il n'a plus la réservation
+        with self.assertLogs("jobs.queue", "WARNING"):
+            run_job(stale)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by), (Job.STATUS_SUCCEEDED, "w2"))
+
+
+class WorkerTests(TransactionTestCase):
+    """Les threads du worker ont leur propre connexion : données validées."""
+
+    def setUp(self):
+        CALLS.clear()
+
+    def test_burst_runs_every_due_job(self):
+        for value in range(5):
+            enqueue("tests.record", {"value": value})
+
+        Worker(concurrency=2, poll_interval=0.01, burst=True).run()
+
+        self.assertEqual(sorted(CALLS), list(range(5)))
+        self.assertEqual(Job.objects.filter(status=Job.STATUS_SUCCEEDED).count(), 5)
+
+
+class JobQueryCountTests(QueryBudgetTestMixin, APITestCase):
+    def test_list_and_retrieve(self):
+        user = CustomUser.objects.create_user("alice", password="x")
+        for value in range(3):
+            job = enqueue("tests.record", {"value": value}, user=user)
+        self.client.force_authenticate(user)
+        # COUNT, page
+        with self.assertMaxQueries(2):
+            self.assertEqual(self.client.get("/api/jobs/").data["count"], 3)
+        with self.assertMaxQueries(1):
+            self.assertEqual(self.client.get(f"/api/jobs/{job.pk}/").status_code, 200)
@@ -0,0 +1,11 @@
+from django.urls import path, include
+from rest_framework import routers
+from .views import JobViewSet
+
+# SimpleRouter : la racine de l'API est déjà fournie par projects.urls
+router = routers.SimpleRouter()
+router.register(r"jobs", JobViewSet, basename="job")
+
+urlpatterns = [
+    path("", include(router.urls)),
+]
@@ -0,0 +1,40 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.http import FileResponse, Http404
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from .models import Job
+from .serializers import JobSerializer
+
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet de suivi des tâches différées de l'utilisateur.
+
+    - list: Liste les tâches lancées par l'utilisateur
+    - retrieve: Statut, avancement et résultat d'une tâche
+    - download: Télécharge le fichier produit par une tâche (exports)
+    """
+
+    permission_classes = [IsAuthenticated]
+    serializer_class = JobSerializer
+
+    def get_queryset(self):
+        """Un utilisateur ne voit que ses propres tâches."""
+        return Job.objects.filter(user=self.request.user)
+
+    @action(detail=True, methods=["get"])
+    def download(self, request, pk=None):
+        """Retourne le fichier indiqué par result["file"] (relatif à JOBS["EXPORT_DIR"])."""
+        job = self.get_object()
+        filename = (job.result or {}).get("file") if job.status == Job.STATUS_SUCCEEDED else None
+        if not filename:
+            raise Http404("Aucun fichier disponible pour cette tâche.")
+
+        export_dir = Path(settings.JOBS["EXPORT_DIR"]).resolve()
+        path = (export_dir / filename).resolve()
+        if export_dir not in path.parents or not path.exists():
+            raise Http404("Fichier introuvable.")
+        return FileResponse(open(path, "rb"), as_attachment=True, filename=path.name)
@@ -0,0 +1,66 @@
+"""
+Worker local de la file de tâches : interroge la base et exécute les tâches
+dans un pool de threads.
+"""
+
+import logging
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections, connections
+
+from .queue import claim_next, run_job
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    """
+    Boucle de traitement : réserve des tâches tant qu'un thread est libre,
+    puis attend poll_interval secondes quand la file est vide.
+    """
+
+    def __init__(self, concurrency=1, poll_interval=1.0, burst=False):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        # burst : s'arrête dès que la file est vide (cron, tests)
+        self.burst = burst
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.stop_event = threading.Event()
+        self.slots = threading.Semaphore(concurrency)
+
+    def stop(self):
+        """Demande l'arrêt : les tâches en cours sont terminées, aucune n'est réservée."""
+        self.stop_event.set()
+
+    def _execute(self, job):
+        try:
+            run_job(job)
+        finally:
+            # Chaque thread a sa propre connexion : on la ferme après la tâche
+            connections.close_all()
+            self.slots.release()
+
+    def run(self):
+        logger.info("Worker %s démarré (%s threads)", self.worker_id, self.concurrency)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            while not self.stop_event.is_set():
+                # Attend qu'un thread se libère avant de réserver une tâche
+                if not self.slots.acquire(timeout=self.poll_interval):
+                    continue
+
+                close_old_connections()
+                job = claim_next(self.worker_id)
+                if job is None:
+                    self.slots.release()
+                    if self.burst:
+                        break
+                    self.stop_event.wait(self.poll_interval)
+                    continue
+
+                logger.info("Exécution de %s", job)
+                pool.submit(self._execute, job)
+
+        logger.info("Worker %s arrêté", self.worker_id)
@@ -0,0 +1,13 @@
+from django.contrib import admin
+from .models import Notification
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    """Interface d'administration pour les notifications en attente."""
+
+    list_display = ["id", "recipient", "event", "issue_title", "count", "updated_time"]
+    list_filter = ["event"]
+    list_select_related = ["recipient"]
+    raw_id_fields = ["recipient", "project"]
+    readonly_fields = ["created_time", "updated_time"]
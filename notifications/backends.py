@@ -0,0 +1,66 @@
+"""
+Canaux d'envoi des résumés (NOTIFICATIONS["BACKEND"] dans settings.py).
+
+Un backend reçoit une liste de messages (dict : recipient_id, username,
+email, subject, body) et les envoie en une fois. Une exception fait échouer
+la tâche, qui est retentée : les notifications du lot restent en attente.
+"""
+
+import json
+import sys
+import threading
+
+from django.conf import settings
+from django.core.mail import send_mass_mail
+from django.utils.module_loading import import_string
+
+
+class BaseBackend:
+    def send_messages(self, messages):
+        raise NotImplementedError
+
+
+class ConsoleBackend(BaseBackend):
+    """Affiche les messages sur la sortie standard (développement)."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def send_messages(self, messages):
+        for message in messages:
+            self.stream.write(
+                f"À : {message['username']} <{message['email']}>\n"
+                f"Objet : {message['subject']}\n\n{message['body']}\n{'-' * 70}\n"
+            )
+        self.stream.flush()
+
+
+class FileBackend(BaseBackend):
+    """Ajoute les messages, une ligne JSON chacun, à NOTIFICATIONS["FILE_PATH"] (tests)."""
+
+    lock = threading.Lock()
+
+    def send_messages(self, messages):
+        with (
+            self.lock,
+            open(settings.NOTIFICATIONS["FILE_PATH"], "a", encoding="utf-8") as file,
+        ):
+            for message in messages:
+                file.write(json.dumps(message, ensure_ascii=False) + "\n")
+
+
+class EmailBackend(BaseBackend):
+    """Envoie les messages par e-mail (EMAIL_BACKEND de Django), une connexion par lot."""
+
+    def send_messages(self, messages):
+        send_mass_mail(
+            [
+                (message["subject"], message["body"], None, [message["email"]])
+                for message in messages
+                if message["email"]
+            ]
+        )
+
+
+def get_backend():
+    return import_string(settings.NOTIFICATIONS["BACKEND"])()
@@ -0,0 +1,102 @@
+"""
+Envoi des résumés de notifications (tâche notifications.send_digests).
+
+Les destinataires sont traités par lots de NOTIFICATIONS["BATCH_SIZE"] : un
+message par destinataire (au plus MAX_EVENTS_PER_DIGEST événements détaillés,
+les suivants comptés), envoyé au backend en un seul appel par lot, puis les
+notifications envoyées sont supprimées.
+
+Seules les notifications antérieures au début de l'envoi sont traitées : une
+notification regroupée entre-temps (updated_time plus récent) est gardée pour
+le résumé suivant, plutôt que perdue.
+"""
+
+from django.conf import settings
+from django.utils import timezone
+
+from users.models import CustomUser
+from .backends import get_backend
+from .models import Notification
+
+EVENT_LINES = {
+    Notification.EVENT_ISSUE_ASSIGNED: "{actor} vous a assigné « {title} »",
+    Notification.EVENT_COMMENT_CREATED: "{count} nouveau(x) commentaire(s) sur « {title} » (dernier : {actor})",
+}
+
+
+def digest_message(user, notifications):
+    """Message d'un destinataire ; notifications : lignes .values() de Notification."""
+    limit = settings.NOTIFICATIONS["MAX_EVENTS_PER_DIGEST"]
+    lines = [
+        "- "
+        + EVENT_LINES[row["event"]].format(
+            actor=row["actor_username"], title=row["issue_title"], count=row["count"]
+        )
+        + f" (projet {row['project_id']}, problème {row['issue_id']})"
+        for row in notifications[:limit]
+    ]
+    if len(notifications) > limit:
+        lines.append(f"... et {len(notifications) - limit} autre(s) problème(s).")
+    return {
+        "recipient_id": user.pk,
+        "username": user.username,
+        "email": user.email,
+        "subject": f"SoftDesk : {len(notifications)} problème(s) à consulter",
+        "body": "\n".join(lines),
+    }
+
+
+def send_digests(progress=None):
+    """
+    Envoie un résumé à chaque destinataire ayant des notifications en attente.
+    progress(total) est appelé après chaque lot. Retourne le nombre de messages envoyés.
+    """
+    batch_size = settings.NOTIFICATIONS["BATCH_SIZE"]
+    backend = get_backend()
+    started = timezone.now()
+    due = Notification.objects.filter(updated_time__lte=started)
+
+    sent = 0
+    last = 0
+    while True:
+        recipient_ids = list(
+            due.filter(recipient_id__gt=last)
+            .order_by("recipient_id")
+            .values_list("recipient_id", flat=True)
+            .distinct()[:batch_size]
+        )
+        if not recipient_ids:
+            return sent
+        last = recipient_ids[-1]
+
+        rows = list(
+            due.filter(recipient_id__in=recipient_ids)
+            .order_by("recipient_id", "-updated_time")
+            .values(
+                "pk",
+                "recipient_id",
+                "event",
+                "project_id",
+                "issue_id",
+                "issue_title",
+                "actor_username",
+                "count",
+            )
+        )
+        by_recipient = {}
+        for row in rows:
+            by_recipient.setdefault(row["recipient_id"], []).append(row)
+
+        # can_be_contacted relu à l'envoi : le choix a pu changer depuis l'événement
+        users = CustomUser.objects.filter(pk__in=recipient_ids, can_be_contacted=True)
+        messages = [digest_message(user, by_recipient[user.pk]) for user in users]
+        if messages:
+            backend.send_messages(messages)
+        sent += len(messages)
+
+        # Envoyées (ou destinataire injoignable) : supprimées, sauf regroupées depuis
+        Notification.objects.filter(
+            pk__in=[row["pk"] for row in rows], updated_time__lte=started
+        ).delete()
+        if progress:
+            progress(sent)
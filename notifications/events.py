@@ -0,0 +1,174 @@
+"""
+Notifications des utilisateurs (NOTIFICATIONS dans settings.py).
+
+Le chemin de la requête ne fait qu'ajouter une tâche à la file, à la
+validation de la transaction :
+- notify_issue_assigned : le nouvel assignee d'un problème ;
+- notify_comment_created : les contributeurs du projet du problème commenté.
+
+Le worker (notifications.fan_out) calcule ensuite les destinataires par lots
+de BATCH_SIZE et enregistre un Notification par destinataire ; les événements
+répétés sur un même problème incrémentent la ligne en attente au lieu d'en
+créer une autre. Un résumé par destinataire est envoyé DIGEST_DELAY secondes
+plus tard (notifications/digests.py). Les utilisateurs qui refusent d'être
+contactés (can_be_contacted) ne reçoivent rien ; l'auteur de l'événement
+n'est jamais notifié.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.sharding import on_project_shard
+from jobs.queue import enqueue
+from projects.models import Contributor, Project
+from users.models import CustomUser
+from .models import Notification
+
+
+def _enqueue_on_commit(event, issue, actor, using, **payload):
+    if not settings.NOTIFICATIONS["ENABLED"]:
+        return
+    payload.update(
+        event=event,
+        project_id=issue.project_id,
+        issue_id=issue.pk,
+        issue_title=issue.title,
+        actor_id=actor.pk,
+        actor_username=actor.username,
+    )
+    transaction.on_commit(
+        lambda: enqueue("notifications.fan_out", payload, user=actor), using=using
+    )
+
+
+def notify_issue_assigned(issue, actor):
+    """Notifie l'assignee de issue (sauf s'il s'est assigné lui-même)."""
+    if issue.assignee_id is None or issue.assignee_id == actor.pk:
+        return
+    _enqueue_on_commit(
+        Notification.EVENT_ISSUE_ASSIGNED,
+        issue,
+        actor,
+        issue._state.db,
+        recipient_id=issue.assignee_id,
+    )
+
+
+def notify_comment_created(comment, actor):
+    """Notifie les contributeurs du projet du commentaire."""
+    _enqueue_on_commit(
+        Notification.EVENT_COMMENT_CREATED, comment.issue, actor, comment._state.db
+    )
+
+
+def _recipient_batches(project_id, recipient_id, batch_size):
+    """Listes d'ids (au plus batch_size) des destinataires potentiels, par id croissant."""
+    if recipient_id is not None:
+        yield [recipient_id]
+        return
+    user_ids = (
+        on_project_shard(Contributor.objects.all(), project_id)
+        .filter(project_id=project_id)
+        .order_by("user_id")
+        .values_list("user_id", flat=True)
+    )
+    last = 0
+    while True:
+        batch = list(user_ids.filter(user_id__gt=last)[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last = batch[-1]
+
+
+def store_notifications(
+    event, project_id, issue_id, issue_title, actor_id, actor_username, user_ids
+):
+    """
+    Enregistre l'événement pour les user_ids joignables (un nombre fixe de
+    requêtes, quel que soit leur nombre). Retourne le nombre de destinataires.
+    """
+    recipients = list(
+        CustomUser.objects.filter(pk__in=user_ids, can_be_contacted=True)
+        .exclude(pk=actor_id)
+        .values_list("pk", flat=True)
+    )
+    if not recipients:
+        return 0
+    now = timezone.now()
+    pending = Notification.objects.filter(
+        recipient_id__in=recipients, issue_id=issue_id, event=event
+    )
+    with transaction.atomic():
+        # Événement déjà en attente : regroupé dans la même ligne
+        pending.update(
+            count=F("count") + 1,
+            issue_title=issue_title,
+            actor_username=actor_username,
+            updated_time=now,
+        )
+        existing = set(pending.values_list("recipient_id", flat=True))
+        Notification.objects.bulk_create(
+            [
+                Notification(
+                    recipient_id=user_id,
+                    event=event,
+                    project_id=project_id,
+                    issue_id=issue_id,
+                    issue_title=issue_title,
+                    actor_username=actor_username,
+                    created_time=now,
+                    updated_time=now,
+                )
+                for user_id in recipients
+                if user_id not in existing
+            ],
+            ignore_conflicts=True,
+        )
+    return len(recipients)
+
+
+def fan_out(
+    event,
+    project_id,
+    issue_id,
+    issue_title,
+    actor_id,
+    actor_username="",
+    recipient_id=None,
+    progress=None,
+):
+    """
+    Enregistre l'événement pour chaque destinataire, par lots de
+    NOTIFICATIONS["BATCH_SIZE"], puis programme l'envoi des résumés.
+    progress(total) est appelé après chaque lot. Retourne le nombre de
+    destinataires.
+    """
+    config = settings.NOTIFICATIONS
+    if not Project.objects.alive().filter(pk=project_id).exists():
+        return 0
+    total = 0
+    for user_ids in _recipient_batches(project_id, recipient_id, config["BATCH_SIZE"]):
+        total += store_notifications(
+            event,
+            project_id,
+            issue_id,
+            issue_title,
+            actor_id,
+            actor_username,
+            user_ids,
+        )
+        if progress:
+            progress(total)
+    if total:
+        # Une seule tâche d'envoi en attente : les événements d'ici là sont regroupés
+        enqueue(
+            "notifications.send_digests",
+            run_after=timezone.now() + timedelta(seconds=config["DIGEST_DELAY"]),
+            unique=True,
+        )
+    return total
@@ -0,0 +1,80 @@
+# Generated by Django 6.0 on 2026-10-19 13:05
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("projects", "0004_contributor_username"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Notification",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "event",
+                    models.CharField(
+                        choices=[
+                            ("issue_assigned", "Problème assigné"),
+                            ("comment_created", "Nouveau commentaire"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("issue_id", models.BigIntegerField()),
+                ("issue_title", models.CharField(max_length=255)),
+                ("actor_username", models.CharField(blank=True, max_length=150)),
+                ("count", models.PositiveIntegerField(default=1)),
+                (
+                    "created_time",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    "updated_time",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    "project",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="projects.project",
+                    ),
+                ),
+                (
+                    "recipient",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="notifications",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["recipient", "-updated_time"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("recipient", "issue_id", "event"),
+                        name="notification_pending_unique",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Notification(models.Model):
+    """
+    Événement en attente du prochain résumé de son destinataire
+    (notifications/events.py). Les événements répétés sur un même problème
+    sont regroupés dans une seule ligne (count) ; la ligne est supprimée une
+    fois le résumé envoyé.
+    """
+
+    EVENT_ISSUE_ASSIGNED = "issue_assigned"
+    EVENT_COMMENT_CREATED = "comment_created"
+
+    EVENT_CHOICES = [
+        (EVENT_ISSUE_ASSIGNED, "Problème assigné"),
+        (EVENT_COMMENT_CREATED, "Nouveau commentaire"),
+    ]
+
+    recipient = models.ForeignKey(
+        "users.CustomUser", on_delete=models.CASCADE, related_name="notifications"
+    )
+    event = models.CharField(max_length=20, choices=EVENT_CHOICES)
+    project = models.ForeignKey(
+        "projects.Project", on_delete=models.CASCADE, related_name="+"
+    )
+    # Pas de clé étrangère : le problème peut être dans un shard ou archivé
+    issue_id = models.BigIntegerField()
+    issue_title = models.CharField(max_length=255)
+    # Auteur du dernier événement regroupé
+    actor_username = models.CharField(max_length=150, blank=True)
+    count = models.PositiveIntegerField(default=1)
+    created_time = models.DateTimeField(default=timezone.now)
+    updated_time = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["recipient", "-updated_time"]
+        constraints = [
+            # Un seul événement en attente par destinataire, problème et type
+            models.UniqueConstraint(
+                fields=["recipient", "issue_id", "event"],
+                name="notification_pending_unique",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_event_display()} : {self.issue_title} ({self.count})"
@@ -0,0 +1,23 @@
+"""
+Tâches différées de l'application notifications (exécutées par run_worker).
+"""
+
+from jobs.queue import task
+from .digests import send_digests
+from .events import fan_out
+
+
+@task("notifications.fan_out")
+def fan_out_event(job, **event):
+    """Enregistre un événement pour chacun de ses destinataires, par lots."""
+    recipients = fan_out(
+        **event, progress=lambda total: job.report_progress(recipients=total)
+    )
+    return {"recipients": recipients}
+
+
+@task("notifications.send_digests")
+def send_pending_digests(job):
+    """Envoie les résumés en attente, par lots de destinataires."""
+    sent = send_digests(progress=lambda total: job.report_progress(sent=total))
+    return {"sent": sent}
@@ -0,0 +1,109 @@
+import json
+import tempfile
+from pathlib import Path
+
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from core.sharding import use_project_shard
+from core.testing import ShardedTestMixin
+from jobs.models import Job
+from jobs.queue import claim_next, run_job
+from projects.models import Contributor, Project
+from issues.models import Issue
+from users.models import CustomUser
+from .models import Notification
+
+
+class NotificationTests(ShardedTestMixin, APITestCase):
+    """Événements mis en file à la validation, regroupés puis envoyés en résumé."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUser.objects.create_user("author", password="x")
+        cls.contributor = CustomUser.objects.create_user("contributor", password="x")
+        cls.silent = CustomUser.objects.create_user(
+            "silent", password="x", can_be_contacted=False
+        )
+        cls.project = Project.objects.create(
+            name="Projet",
+            description="",
+            type=Project.TYPE_CHOICES[0][0],
+            author=cls.author,
+        )
+        with use_project_shard(cls.project.pk):
+            for user, role in [
+                (cls.author, Contributor.ROLE_AUTHOR),
+                (cls.contributor, Contributor.ROLE_CONTRIBUTOR),
+                (cls.silent, Contributor.ROLE_CONTRIBUTOR),
+            ]:
+                Contributor.objects.create(project=cls.project, user=user, role=role)
+            cls.issue = Issue.objects.create(
+                title="Problème", description="", project=cls.project, author=cls.author
+            )
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.outbox = Path(directory.name) / "notifications.ndjson"
+        overrides = override_settings(
+            NOTIFICATIONS={
+                "ENABLED": True,
+                "BACKEND": "notifications.backends.FileBackend",
+                "FILE_PATH": self.outbox,
+                "DIGEST_DELAY": 0,
+                "BATCH_SIZE": 1,
+                "MAX_EVENTS_PER_DIGEST": 20,
+            }
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def comment(self, user):
+        self.client.force_authenticate(user)
+        url = f"/api/projects/{self.project.pk}/issues/{self.issue.pk}/comments/"
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, {"description": "x"}, format="json")
+        self.assertEqual(response.status_code, 201)
+
+    def run_jobs(self):
+        while (job := claim_next("test")) is not None:
+            run_job(job)
+            job.refresh_from_db()
+            self.assertEqual(job.status, Job.STATUS_SUCCEEDED, job.error)
+
+    def sent_messages(self):
+        if not self.outbox.exists():
+            return []
+        return [json.loads(line) for line in self.outbox.read_text().splitlines()]
+
+    def test_comments_are_coalesced_into_one_digest(self):
+        self.comment(self.author)
+        self.comment(self.author)
+        # Une tâche par événement, rien d'autre dans la requête
+        self.assertEqual(Job.objects.filter(name="notifications.fan_out").count(), 2)
+        self.assertFalse(Notification.objects.exists())
+
+        self.run_jobs()
+
+        messages = self.sent_messages()
+        self.assertEqual([m["username"] for m in messages], ["contributor"])
+        self.assertIn("2 nouveau(x) commentaire(s)", messages[0]["body"])
+        self.assertFalse(Notification.objects.exists())
+
+    def test_assignment_notifies_the_assignee_only(self):
+        self.client.force_authenticate(self.author)
+        url = f"/api/projects/{self.project.pk}/issues/{self.issue.pk}/"
+        for assignee in (self.contributor, self.silent):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.patch(
+                    url, {"assignee_id": assignee.pk}, format="json"
+                )
+            self.assertEqual(response.status_code, 200)
+
+        self.run_jobs()
+
+        messages = self.sent_messages()
+        self.assertEqual([m["username"] for m in messages], ["contributor"])
+        self.assertIn("author vous a assigné « Problème »", messages[0]["body"])
@@ -1,4 +1,5 @@
 from django.contrib import admin
+from core.admin import LargeTableAdmin
 from .models import Project, Contributor
 
 
@@ -6,25 +7,29 @@ from .models import Project, Contributor
 class ProjectAdmin(admin.ModelAdmin):
     """Configuration de l'interface admin pour Project."""
 
-    list_display = ["id", "name", "type", "author", "created_time"]
-    list_filter = ["type", "created_time"]
+    list_display = ["id", "name", "type", "author", "created_time", "deleted_time"]
+    list_filter = ["type", "created_time", "deleted_time"]
     search_fields = ["name", "description", "author__username"]
-    readonly_fields = ["created_time"]
+    list_select_related = ["author"]
+    autocomplete_fields = ["author"]
+    readonly_fields = ["created_time", "deleted_time"]
 
     fieldsets = [
         ("Informations du projet", {"fields": ["name", "description", "type"]}),
         ("Auteur", {"fields": ["author"]}),
-        ("Dates", {"fields": ["created_time"], "classes": ["collapse"]}),
+        ("Dates", {"fields": ["created_time", "deleted_time"], "classes": ["collapse"]}),
     ]
 
 
 @admin.register(Contributor)
-class ContributorAdmin(admin.ModelAdmin):
+class ContributorAdmin(LargeTableAdmin):
     """Configuration de l'interface admin pour Contributor."""
 
     list_display = ["id", "user", "project", "role", "created_time"]
     list_filter = ["role", "created_time"]
-    search_fields = ["user__username", "project__name"]
+    search_fields = ["=user__username", "^project__name"]
+    list_select_related = ["user", "project"]
+    autocomplete_fields = ["user", "project"]
     readonly_fields = ["created_time"]
 
     fieldsets = [
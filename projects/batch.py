@@ -0,0 +1,159 @@
+"""
+Exécution groupée de requêtes sur les routes de projects/urls.py (POST /api/batch/).
+
+Les sous-requêtes sont exécutées dans le processus, sans repasser par les
+middlewares ni par l'authentification : l'utilisateur déjà authentifié par la
+requête de lot leur est transmis directement (jeton JWT décodé et utilisateur
+chargé une seule fois). Les vérifications d'appartenance aux projets sont
+mémorisées pour tout le lot (core/request_cache.py) ; le cache est vidé après
+chaque écriture.
+
+Un lot composé uniquement de lectures peut être exécuté en parallèle
+("concurrent": true), chaque thread utilisant sa propre connexion à la base.
+
+Les sous-requêtes ne passant pas par IdempotencyMiddleware, un lot envoyé
+avec Idempotency-Key ne peut contenir que des lectures : sa réponse n'est pas
+toujours conservée (taille, 5xx), et le renvoyer réexécuterait les écritures.
+"""
+
+import contextvars
+import io
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections
+from django.urls import Resolver404, resolve
+
+from core.request_cache import invalidate, request_cache
+
+logger = logging.getLogger("softdesk.batch")
+
+# Routes accessibles dans un lot (l'export en streaming en est exclu)
+ALLOWED_ROUTES = {
+    "project-list",
+    "project-detail",
+    "project-contributors",
+    "project-export",
+    "project-contributors-list",
+    "project-contributors-detail",
+    "project-issues-list",
+    "project-issues-detail",
+    "issue-comments-list",
+    "issue-comments-detail",
+}
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# En-têtes de la requête de lot à ne pas transmettre aux sous-requêtes
+_PARENT_ONLY = {
+    "CONTENT_LENGTH",
+    "CONTENT_TYPE",
+    "QUERY_STRING",
+    "HTTP_ACCEPT_ENCODING",
+    "HTTP_IDEMPOTENCY_KEY",
+}
+
+
+def check_idempotent_batch(parent, specs):
+    """Message d'erreur si le lot combine Idempotency-Key et écritures, sinon None."""
+    if "Idempotency-Key" not in parent.headers:
+        return None
+    if any(spec["method"] not in SAFE_METHODS for spec in specs):
+        return "Un lot avec Idempotency-Key ne peut contenir que des lectures."
+    return None
+
+
+def _error(status, detail):
+    return {"status": status, "body": {"detail": detail}}
+
+
+def _build_request(parent, method, path, body):
+    """WSGIRequest de la sous-requête, authentifiée comme la requête de lot."""
+    url = urlsplit(path)
+    payload = json.dumps(body).encode() if body is not None else b""
+    environ = {
+        key: value
+        for key, value in parent.META.items()
+        if key not in _PARENT_ONLY and not key.startswith("wsgi.")
+    }
+    environ.update(
+        {
+            "REQUEST_METHOD": method,
+            "PATH_INFO": url.path,
+            "QUERY_STRING": url.query,
+            "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(payload)),
+            "wsgi.input": io.BytesIO(payload),
+            "wsgi.url_scheme": parent.scheme,
+        }
+    )
+    request = WSGIRequest(environ)
+    # Repris par rest_framework.request.Request (ForcedAuthentication)
+    request._force_auth_user = parent.user
+    request._force_auth_token = parent.auth
+    return request
+
+
+def run_subrequest(parent, spec):
+    """Exécute une sous-requête et retourne {"status", "body"}."""
+    method = spec["method"]
+    path = spec["path"]
+    try:
+        match = resolve(urlsplit(path).path)
+    except Resolver404:
+        return _error(404, f"Route inconnue : {path}")
+    if match.url_name not in ALLOWED_ROUTES:
+        return _error(400, f"Route non disponible dans un lot : {path}")
+
+    request = _build_request(parent, method, path, spec.get("body"))
+    request.resolver_match = match
+    try:
+        response = match.func(request, *match.args, **match.kwargs)
+        if hasattr(response, "render"):
+            response.render()
+    except Exception:
+        logger.exception("Sous-requête %s %s en échec", method, path)
+        return _error(500, "Erreur interne.")
+
+    body = None
+    if response.content:
+        if response.get("Content-Type", "").startswith("application/json"):
+            body = json.loads(response.content)
+        else:
+            body = response.content.decode(response.charset, errors="replace")
+    return {"status": response.status_code, "body": body}
+
+
+def _run_in_thread(parent, spec):
+    try:
+        return run_subrequest(parent, spec)
+    finally:
+        # Connexions ouvertes par ce thread du pool
+        connections.close_all()
+
+
+def run_batch(parent, specs, concurrent=False):
+    """Exécute les sous-requêtes dans l'ordre et retourne leurs réponses."""
+    with request_cache():
+        if concurrent and all(spec["method"] in SAFE_METHODS for spec in specs):
+            workers = min(settings.BATCH["MAX_WORKERS"], len(specs))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                # Chaque tâche reçoit une copie du contexte : cache du lot partagé
+                futures = [
+                    pool.submit(
+                        contextvars.copy_context().run, _run_in_thread, parent, spec
+                    )
+                    for spec in specs
+                ]
+                return [future.result() for future in futures]
+
+        responses = []
+        for spec in specs:
+            responses.append(run_subrequest(parent, spec))
+            if spec["method"] not in SAFE_METHODS:
+                invalidate()
+        return responses
@@ -0,0 +1,66 @@
+"""
+Suppression d'un projet par lots.
+
+project.delete() passe par le collecteur de Django : tous les problèmes,
+commentaires et contributeurs du projet sont chargés en mémoire puis supprimés
+dans une seule transaction, ce qui verrouille SQLite pendant toute la durée.
+
+Ici, les dépendances sont supprimées des feuilles vers la racine, par lots
+bornés dans des transactions courtes. Combiné au tombstone (Project.deleted_time),
+le projet disparaît de l'API immédiatement et la suppression physique peut être
+confiée au worker.
+"""
+
+from django.utils import timezone
+
+from core.bulk import delete_in_batches
+from core.sharding import use_project_shard
+from issues.models import (
+    ArchivedComment,
+    ArchivedIssue,
+    HistoryEntry,
+    Issue,
+    Comment,
+)
+from notifications.models import Notification
+from .models import Project, Contributor
+
+
+def mark_project_deleted(project):
+    """Pose le tombstone : le projet et ses données sont masqués de l'API."""
+    project.deleted_time = timezone.now()
+    Project.objects.filter(pk=project.pk).update(deleted_time=project.deleted_time)
+
+
+def delete_project(project, batch_size=None, progress=None):
+    """
+    Supprime le projet et toutes ses données par lots de batch_size.
+
+    progress(libellé, total) est appelé après chaque lot.
+    Retourne un dict {libellé: nombre de lignes supprimées}.
+    """
+    steps = [
+        ("history", HistoryEntry.objects.filter(project=project)),
+        ("archived_comments", ArchivedComment.objects.filter(issue__project=project)),
+        ("archived_issues", ArchivedIssue.objects.filter(project=project)),
+        ("comments", Comment.objects.filter(issue__project=project)),
+        ("issues", Issue.objects.filter(project=project)),
+        ("contributors", Contributor.objects.filter(project=project)),
+    ]
+    counts = {}
+    # Mode shards : les dépendances sont dans le shard du projet
+    with use_project_shard(project.pk):
+        for label, queryset in steps:
+            counts[label] = delete_in_batches(
+                queryset, batch_size=batch_size, progress=progress, label=label
+            )
+
+    counts["notifications"] = delete_in_batches(
+        Notification.objects.filter(project=project),
+        batch_size=batch_size,
+        progress=progress,
+        label="notifications",
+    )
+    project.delete()
+    counts["projects"] = 1
+    return counts
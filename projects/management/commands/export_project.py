@@ -0,0 +1,27 @@
+"""
+Commande d'export d'un projet : python manage.py export_project <id> projet.ndjson.gz
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from projects.models import Project
+from projects.transfer import export_project
+
+
+class Command(BaseCommand):
+    help = "Exporte un projet (contributeurs, problèmes, commentaires) en NDJSON gzip."
+
+    def add_arguments(self, parser):
+        parser.add_argument("project_id", type=int)
+        parser.add_argument("path", help="Fichier d'archive à écrire (.ndjson.gz).")
+
+    def handle(self, *args, **options):
+        try:
+            project = Project.objects.select_related("author").get(pk=options["project_id"])
+        except Project.DoesNotExist:
+            raise CommandError(f"Projet inconnu : {options['project_id']}")
+
+        export_project(project, options["path"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Projet {project.pk} exporté dans {options['path']}.")
+        )
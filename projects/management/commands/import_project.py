@@ -0,0 +1,44 @@
+"""
+Commande d'import d'un projet : python manage.py import_project projet.ndjson.gz
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from projects.transfer import ProjectArchiveError, import_project
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = "Importe un projet depuis une archive produite par export_project."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Fichier d'archive à lire (.ndjson.gz).")
+        parser.add_argument(
+            "--author", help="Username de l'auteur du projet importé (celui de l'archive par défaut)."
+        )
+        parser.add_argument(
+            "--fallback-user",
+            help="Username utilisé à la place des utilisateurs absents de cette instance.",
+        )
+        parser.add_argument("--batch-size", type=int, default=None)
+
+    def _get_user(self, username):
+        if username is None:
+            return None
+        try:
+            return CustomUser.objects.get(username=username)
+        except CustomUser.DoesNotExist:
+            raise CommandError(f"Utilisateur inconnu : {username}")
+
+    def handle(self, *args, **options):
+        try:
+            project = import_project(
+                options["path"],
+                author=self._get_user(options["author"]),
+                fallback_user=self._get_user(options["fallback_user"]),
+                batch_size=options["batch_size"],
+            )
+        except ProjectArchiveError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(self.style.SUCCESS(f"Projet importé avec l'id {project.pk}."))
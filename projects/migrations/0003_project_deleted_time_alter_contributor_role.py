@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-19 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0002_alter_contributor_role_alter_project_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='deleted_time',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='contributor',
+            name='role',
+            field=models.CharField(choices=[('author', 'Auteur'), ('contributor', 'Contributeur')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 14:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0003_project_deleted_time_alter_contributor_role"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="contributor",
+            name="username",
+            field=models.CharField(blank=True, editable=False, max_length=150),
+        ),
+    ]
@@ -1,5 +1,15 @@
 from django.db import models
 
+from core.request_cache import memoize
+from core.sharding import assign_ids, on_project_shard, sharding_enabled
+from users.fields import UsernameCopiesMixin
+
+
+class ProjectQuerySet(models.QuerySet):
+    def alive(self):
+        """Projets non supprimés (sans tombstone)."""
+        return self.filter(deleted_time__isnull=True)
+
 
 class Project(models.Model):
     """Représente un projet de développement."""
@@ -19,23 +29,60 @@ class Project(models.Model):
         "users.CustomUser", on_delete=models.CASCADE, related_name="authored_projects"
     )
     created_time = models.DateTimeField(auto_now_add=True)
+    # Tombstone : le projet est masqué de l'API en attendant sa suppression par lots
+    deleted_time = models.DateTimeField(null=True, blank=True)
+
+    objects = ProjectQuerySet.as_manager()
 
     class Meta:
         ordering = ["-created_time"]
+        indexes = [
+            # Recherche par préfixe dans l'admin (core/admin.py)
+            models.Index(fields=["name"], name="project_name_idx"),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.type})"
 
     def is_author(self, user):
         """Vérifie si l'utilisateur est l'auteur du projet."""
-        return self.author == user
+        return self.author_id == user.pk
 
     def is_contributor(self, user):
         """Vérifie si l'utilisateur est contributeur du projet."""
-        return self.contributors.filter(user=user).exists()
+        return Contributor.objects.is_member(user, self.pk)
+
 
+class ContributorQuerySet(models.QuerySet):
+    def active(self):
+        """Contributions aux projets non supprimés (sans tombstone)."""
+        if sharding_enabled():
+            # Projets dans la base principale : pas de jointure depuis un shard
+            deleted = memoize(
+                ("deleted-projects",),
+                lambda: list(
+                    Project.objects.filter(deleted_time__isnull=False)
+                    .order_by()
+                    .values_list("pk", flat=True)
+                ),
+            )
+            return self.exclude(project_id__in=deleted)
+        return self.filter(project__deleted_time__isnull=True)
 
-class Contributor(models.Model):
+    def is_member(self, user, project_id):
+        """
+        Vérifie que user contribue au projet (non supprimé).
+        Mémorisé pour la requête en cours (voir core/request_cache.py).
+        """
+        return memoize(
+            ("project-member", user.pk, str(project_id)),
+            lambda: on_project_shard(self.active(), project_id)
+            .filter(project_id=project_id, user=user)
+            .exists(),
+        )
+
+
+class Contributor(UsernameCopiesMixin, models.Model):
     """
     Table intermédiaire entre User et Project.
     Représente un contributeur sur un projet avec son rôle.
@@ -58,6 +105,12 @@ class Contributor(models.Model):
     )
     role = models.CharField(max_length=20, choices=ROLE_CHOICES)
     created_time = models.DateTimeField(auto_now_add=True)
+    # Copie dénormalisée de user.username (voir Issue.author_username)
+    username = models.CharField(max_length=150, blank=True, editable=False)
+
+    USERNAME_COPIES = {"user": "username"}
+
+    objects = ContributorQuerySet.as_manager()
 
     class Meta:
         unique_together = ["user", "project"]
@@ -65,3 +118,10 @@ class Contributor(models.Model):
 
     def __str__(self):
         return f"{self.user.username} - {self.project.name} ({self.role})"
+
+    def save(self, *args, **kwargs):
+        self.fill_usernames()
+        # Identifiant unique entre les shards (core/sharding.py)
+        if assign_ids([self]):
+            kwargs["force_insert"] = True
+        super().save(*args, **kwargs)
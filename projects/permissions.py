@@ -82,7 +82,7 @@ class IsProjectAuthorForContributors(permissions.BasePermission):
                 from django.shortcuts import get_object_or_404
                 from .models import Project
 
-                project = get_object_or_404(Project, pk=project_pk)
+                project = get_object_or_404(Project.objects.alive(), pk=project_pk)
                 return project.is_author(request.user)
 
         # Pour GET/DELETE, on laisse passer et on vérifie dans has_object_permission
@@ -94,9 +94,7 @@ class IsProjectAuthorForContributors(permissions.BasePermission):
         """
         # GET : Tous les contributeurs du projet peuvent voir
         if request.method in permissions.SAFE_METHODS:
-            return Contributor.objects.filter(
-                project=obj.project, user=request.user
-            ).exists()
+            return Contributor.objects.is_member(request.user, obj.project_id)
 
         # DELETE : Seul l'auteur du projet peut supprimer
         return obj.project.is_author(request.user)
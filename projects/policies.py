@@ -0,0 +1,31 @@
+"""
+Règles de lecture exprimées en filtres SQL.
+
+Un objet imbriqué dans un projet (problème, commentaire) n'est lisible que par
+les contributeurs de ce projet. Plutôt que de vérifier la règle objet par
+objet (une requête Contributor par vérification), les viewsets l'appliquent
+dans get_queryset avec readable_by() : elle devient une sous-requête EXISTS de
+la requête principale, et has_object_permission n'a plus rien à vérifier pour
+les lectures.
+
+has_permission garde sa vérification d'appartenance au projet de l'URL : un
+non-contributeur reçoit toujours un 403 plutôt qu'une liste vide.
+"""
+
+from django.db.models import Exists, OuterRef
+
+from .models import Contributor
+
+
+def member_of(user, project_field="project"):
+    """Condition "user contribue au projet <project_field>" (non supprimé)."""
+    return Exists(
+        Contributor.objects.active().filter(
+            user=user, project_id=OuterRef(project_field)
+        )
+    )
+
+
+def readable_by(queryset, user, project_field="project"):
+    """Restreint queryset aux lignes que user peut lire."""
+    return queryset.filter(member_of(user, project_field))
@@ -1,12 +1,14 @@
+from django.conf import settings
 from rest_framework import serializers
 from .models import Project, Contributor
+from users.fields import UsernameField, get_username
 from users.models import CustomUser
 
 
 class ContributorSerializer(serializers.ModelSerializer):
     """Serializer pour les contributeurs d'un projet."""
 
-    username = serializers.CharField(source="user.username", read_only=True)
+    username = UsernameField("user", "username")
     user_id = serializers.PrimaryKeyRelatedField(
         queryset=CustomUser.objects.all(), source="user", write_only=True
     )
@@ -80,8 +82,8 @@ class ProjectDetailSerializer(serializers.ModelSerializer):
         return [
             {
                 "id": contributor.id,
-                "user_id": contributor.user.id,
-                "username": contributor.user.username,
+                "user_id": contributor.user_id,
+                "username": get_username(contributor, "user", "username"),
                 "role": contributor.role,
             }
             for contributor in obj.contributors.all()
@@ -95,8 +97,31 @@ class ProjectDetailSerializer(serializers.ModelSerializer):
         project = Project.objects.create(**validated_data)
 
         # Ajoute automatiquement l'auteur comme contributeur avec le rôle "author"
-        Contributor.objects.create(
-            project=project, user=validated_data["author"], role=Contributor.ROLE_AUTHOR
+        # Par le projet : le contributeur est écrit dans le shard du projet
+        project.contributors.create(
+            user=validated_data["author"], role=Contributor.ROLE_AUTHOR
         )
 
         return project
+
+
+class BatchSubRequestSerializer(serializers.Serializer):
+    """Une sous-requête d'un lot : méthode, chemin (avec query string) et corps JSON."""
+
+    method = serializers.ChoiceField(choices=["GET", "POST", "PUT", "PATCH", "DELETE"])
+    path = serializers.RegexField(r"^/api/", max_length=2000)
+    body = serializers.JSONField(required=False)
+
+
+class BatchSerializer(serializers.Serializer):
+    """Lot de sous-requêtes (voir projects/batch.py)."""
+
+    requests = BatchSubRequestSerializer(many=True, allow_empty=False)
+    concurrent = serializers.BooleanField(default=False)
+
+    def validate_requests(self, value):
+        if len(value) > settings.BATCH["MAX_REQUESTS"]:
+            raise serializers.ValidationError(
+                f"Au plus {settings.BATCH['MAX_REQUESTS']} sous-requêtes par lot."
+            )
+        return value
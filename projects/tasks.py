@@ -0,0 +1,39 @@
+"""
+Tâches différées de l'application projects (exécutées par run_worker).
+"""
+
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+from jobs.queue import task
+from .deletion import delete_project
+from .models import Project
+from .transfer import export_project
+
+
+@task("projects.export_project")
+def export_project_archive(job, project_id):
+    """Écrit l'archive du projet dans JOBS["EXPORT_DIR"] (téléchargeable via /api/jobs/{id}/download/)."""
+    project = Project.objects.select_related("author").get(pk=project_id)
+
+    export_dir = Path(settings.JOBS["EXPORT_DIR"])
+    export_dir.mkdir(parents=True, exist_ok=True)
+    filename = f"project-{project.pk}-{timezone.now():%Y%m%d%H%M%S}-{job.pk}.ndjson.gz"
+
+    export_project(project, export_dir / filename)
+    return {"file": filename}
+
+
+@task("projects.delete_project")
+def delete_project_in_batches(job, project_id):
+    """Supprime par lots un projet marqué supprimé, en publiant l'avancement."""
+    project = Project.objects.filter(pk=project_id).first()
+    if project is None:
+        return {"deleted": 0}
+
+    counts = delete_project(
+        project, progress=lambda label, total: job.report_progress(**{label: total})
+    )
+    return {"deleted": sum(counts.values())}
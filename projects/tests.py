@@ -1,3 +1,321 @@
-from django.test import TestCase
+import gzip
+import json
+import tempfile
+from pathlib import Path
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from rest_framework.test import APITestCase
+
+from issues.models import Issue
+from jobs.models import Job
+from core.sharding import on_project_shard, use_project_shard
+from core.testing import (
+    PER_SHARD,
+    SHARD_QUERIES,
+    QueryBudgetTestMixin,
+    ShardedTestMixin,
+)
+from jobs.queue import claim_next, run_job
+from users.models import CustomUser
+from .models import Contributor, Project
+from .transfer import ProjectArchiveError, export_project, import_project
+
+
+class ProjectTransferTests(ShardedTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = CustomUser.objects.create_user("alice", password="x")
+        cls.bob = CustomUser.objects.create_user("bob", password="x")
+        cls.project = Project.objects.create(
+            name="Projet",
+            description="",
+            type=Project.TYPE_CHOICES[0][0],
+            author=cls.alice,
+        )
+        with use_project_shard(cls.project.pk):
+            Contributor.objects.create(
+                project=cls.project, user=cls.alice, role=Contributor.ROLE_AUTHOR
+            )
+            # Problème 0 assigné à bob, problème 1 écrit par bob
+            Issue.objects.create(
+                title="0",
+                description="",
+                project=cls.project,
+                author=cls.alice,
+                assignee=cls.bob,
+            )
+            Issue.objects.create(
+                title="1", description="", project=cls.project, author=cls.bob
+            )
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "projet.jsonl.gz"
+
+    def export_renaming(self, old, new):
+        """Exporte le projet en remplaçant le username old par new dans l'archive."""
+        export_project(self.project, self.path)
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        for record in records:
+            for field in ("author", "assignee", "user"):
+                if record.get(field) == old:
+                    record[field] = new
+        with gzip.open(self.path, "wt", encoding="utf-8") as f:
+            f.writelines(json.dumps(record) + "\n" for record in records)
+
+    def test_unknown_optional_then_required_user_uses_fallback(self):
+        self.export_renaming("bob", "ghost")
+        project = import_project(self.path, fallback_user=self.alice)
+
+        issues = {
+            issue.title: issue
+            for issue in on_project_shard(Issue.objects.filter(project=project), project.pk)
+        }
+        self.assertIsNone(issues["0"].assignee)
+        self.assertEqual(issues["1"].author, self.alice)
+
+    def test_unknown_required_user_without_fallback(self):
+        self.export_renaming("bob", "ghost")
+        with self.assertRaises(ProjectArchiveError):
+            import_project(self.path)
+        self.assertEqual(Project.objects.count(), 1)
+
+
+class ProjectDeletionTests(ShardedTestMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUser.objects.create_user("author", password="x")
+        cls.contributor = CustomUser.objects.create_user("contributor", password="x")
+        cls.project = Project.objects.create(
+            name="Projet",
+            description="",
+            type=Project.TYPE_CHOICES[0][0],
+            author=cls.author,
+        )
+        with use_project_shard(cls.project.pk):
+            Contributor.objects.create(
+                project=cls.project, user=cls.author, role=Contributor.ROLE_AUTHOR
+            )
+            Contributor.objects.create(
+                project=cls.project,
+                user=cls.contributor,
+                role=Contributor.ROLE_CONTRIBUTOR,
+            )
+            cls.issue = Issue.objects.create(
+                title="Problème", description="", project=cls.project, author=cls.author
+            )
+        cls.url = f"/api/projects/{cls.project.pk}/"
+
+    def delete(self):
+        self.client.force_authenticate(self.author)
+        response = self.client.delete(self.url)
+        self.assertEqual(response.status_code, 204)
+
+    def test_synchronous_deletion(self):
+        self.delete()
+        self.assertFalse(Project.objects.exists())
+        self.assertFalse(Issue.objects.exists())
+        self.assertFalse(Contributor.objects.exists())
+        self.assertFalse(Job.objects.exists())
+
+    @override_settings(BACKGROUND_PROJECT_DELETION=True)
+    def test_tombstone_hides_project_until_worker_deletes_it(self):
+        self.delete()
+
+        # Masqué : projet introuvable, plus membre pour les issues et commentaires
+        self.assertFalse(Contributor.objects.active().exists())
+        self.assertFalse(Contributor.objects.is_member(self.contributor, self.project.pk))
+        self.client.force_authenticate(self.contributor)
+        self.assertEqual(self.client.get("/api/projects/").data["count"], 0)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.assertEqual(self.client.get(f"{self.url}issues/").status_code, 403)
+        self.assertEqual(
+            self.client.post(
+                f"{self.url}issues/{self.issue.pk}/comments/",
+                {"description": "x"},
+                format="json",
+            ).status_code,
+            403,
+        )
+        self.assertTrue(Issue.objects.exists())
+
+        job = claim_next("test")
+        self.assertEqual(
+            (job.name, job.user_id), ("projects.delete_project", self.author.pk)
+        )
+        run_job(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_SUCCEEDED)
+        self.assertFalse(Project.objects.exists())
+        self.assertFalse(Issue.objects.exists())
+        self.assertFalse(Contributor.objects.exists())
+
+
+class BatchTests(ShardedTestMixin, APITestCase):
+    """Lots de sous-requêtes : ordre, permissions, Idempotency-Key."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUser.objects.create_user("author", password="x")
+        cls.outsider = CustomUser.objects.create_user("outsider", password="x")
+        cls.project = Project.objects.create(
+            name="Projet",
+            description="",
+            type=Project.TYPE_CHOICES[0][0],
+            author=cls.author,
+        )
+        with use_project_shard(cls.project.pk):
+            Contributor.objects.create(
+                project=cls.project, user=cls.author, role=Contributor.ROLE_AUTHOR
+            )
+        cls.url = f"/api/projects/{cls.project.pk}/"
+
+    def batch(self, user, requests, **extra):
+        self.client.force_authenticate(user)
+        return self.client.post(
+            "/api/batch/", {"requests": requests}, format="json", **extra
+        )
+
+    def test_subrequests_run_in_order(self):
+        issues_url = f"{self.url}issues/"
+        response = self.batch(
+            self.author,
+            [
+                {"method": "GET", "path": issues_url},
+                {
+                    "method": "POST",
+                    "path": issues_url,
+                    "body": {"title": "Nouveau", "description": "Détail"},
+                },
+                {"method": "GET", "path": issues_url},
+                {"method": "GET", "path": "/api/inconnue/"},
+            ],
+        )
+        self.assertEqual(response.status_code, 200)
+        responses = response.data["responses"]
+        self.assertEqual(
+            [r["status"] for r in responses], [200, 201, 200, 404]
+        )
+        # La lecture suivant l'écriture la voit (cache d'appartenance vidé)
+        self.assertEqual(responses[0]["body"]["count"], 0)
+        self.assertEqual(responses[2]["body"]["count"], 1)
+
+    def test_subrequests_apply_permissions(self):
+        # Projet invisible pour un non-contributeur, route hors du lot refusée
+        response = self.batch(
+            self.outsider,
+            [
+                {"method": "GET", "path": self.url},
+                {"method": "PATCH", "path": self.url, "body": {"name": "Volé"}},
+                {"method": "GET", "path": "/api/auth/profile/"},
+            ],
+        )
+        self.assertEqual(
+            [r["status"] for r in response.data["responses"]], [404, 404, 400]
+        )
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.name, "Projet")
+
+    def test_anonymous_batch(self):
+        response = self.client.post(
+            "/api/batch/",
+            {"requests": [{"method": "GET", "path": self.url}]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_idempotency_key_requires_read_only_batch(self):
+        writes = [{"method": "DELETE", "path": self.url}]
+        response = self.batch(self.author, writes, HTTP_IDEMPOTENCY_KEY="lot-1")
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(Project.objects.filter(pk=self.project.pk).exists())
+
+        reads = [{"method": "GET", "path": self.url}]
+        response = self.batch(self.author, reads, HTTP_IDEMPOTENCY_KEY="lot-2")
+        self.assertEqual(response.data["responses"][0]["status"], 200)
+
+
+class ProjectQueryCountTests(ShardedTestMixin, QueryBudgetTestMixin, APITestCase):
+    """Nombre de requêtes SQL des endpoints projets, contributeurs et lots."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUser.objects.create_user("author", password="x")
+        cls.contributor = CustomUser.objects.create_user("contributor", password="x")
+        cls.newcomer = CustomUser.objects.create_user("newcomer", password="x")
+        cls.project = Project.objects.create(
+            name="Projet",
+            description="",
+            type=Project.TYPE_CHOICES[0][0],
+            author=cls.author,
+        )
+        with use_project_shard(cls.project.pk):
+            Contributor.objects.create(
+                project=cls.project, user=cls.author, role=Contributor.ROLE_AUTHOR
+            )
+            cls.contribution = Contributor.objects.create(
+                project=cls.project,
+                user=cls.contributor,
+                role=Contributor.ROLE_CONTRIBUTOR,
+            )
+            cls.issue = Issue.objects.create(
+                title="Problème", description="", project=cls.project, author=cls.author
+            )
+        cls.url = f"/api/projects/{cls.project.pk}/"
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.author)
+
+    def request(self, budget, method, url, data=None, status=200):
+        with self.assertMaxQueries(budget):
+            response = getattr(self.client, method)(url, data, format="json")
+        self.assertEqual(response.status_code, status, getattr(response, "data", None))
+
+    def test_project_list(self):
+        # COUNT, page, contributeurs et leurs utilisateurs (prefetch) ; en mode
+        # shards, contributions lues dans chaque shard puis nombre de contributeurs
+        self.request(3 + PER_SHARD, "get", "/api/projects/")
+
+    def test_project_retrieve(self):
+        # projet, contributeurs, utilisateurs, appartenance
+        self.request(4, "get", self.url)
+
+    def test_project_create(self):
+        data = {"name": "Nouveau", "description": "x", "type": "backend"}
+        # projet, contribution de l'auteur, relecture pour la réponse
+        self.request(4, "post", "/api/projects/", data, status=201)
+
+    def test_project_update(self):
+        # lecture comme retrieve, UPDATE, nombre de contributeurs
+        self.request(6, "patch", self.url, {"description": "x"})
+
+    def test_contributor_list(self):
+        # projet, contributeurs, utilisateurs, appartenance
+        self.request(4, "get", f"{self.url}contributors/")
+
+    def test_contributor_create(self):
+        data = {"user_id": self.newcomer.pk, "role": Contributor.ROLE_CONTRIBUTOR}
+        # projet, contributeurs, utilisateurs, nouvel utilisateur, transaction
+        # (SAVEPOINT et RELEASE en test) avec l'INSERT et celui de l'historique
+        self.request(8, "post", f"{self.url}contributors/", data, status=201)
+
+    def test_contributor_delete(self):
+        url = f"{self.url}contributors/{self.contribution.pk}/"
+        # contribution, transaction (SAVEPOINT et RELEASE en test) avec le DELETE
+        # et l'INSERT de l'historique ; en mode shards, projets supprimés et projet (pas de
+        # jointure depuis le shard)
+        self.request(5 + 2 * SHARD_QUERIES, "delete", url, status=204)
+
+    def test_batch(self):
+        data = {
+            "requests": [
+                {"method": "GET", "path": self.url},
+                {"method": "GET", "path": f"{self.url}issues/"},
+                {"method": "GET", "path": f"{self.url}issues/{self.issue.pk}/comments/"},
+            ]
+        }
+        # Appartenance mémorisée pour tout le lot : 4 + 2 + 1 au lieu de 4 + 3 + 2
+        self.request(8, "post", "/api/batch/", data)
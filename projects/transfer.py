@@ -0,0 +1,297 @@
+"""
+Export et import d'un projet complet (sauvegarde et migration entre instances).
+
+Format d'archive : NDJSON compressé en gzip, une ligne par enregistrement :
+- {"type": "header", "version": 1, "project": {...}} : toujours en premier
+- {"type": "contributor", ...}
+- {"type": "issue", "id": <ancien id>, ...}
+- {"type": "comment", "id": <ancien id>, "issue": <ancien id du problème>, ...}
+
+Les utilisateurs sont référencés par leur username (les ids diffèrent d'une
+instance à l'autre). Les problèmes archivés (issues/archive.py) sont exportés
+comme les autres et réimportés dans les tables actives. À l'import, les ids sont réattribués par la base cible et
+les commentaires sont rattachés aux nouveaux problèmes via une table de
+correspondance ancien id -> nouvel id.
+
+Les deux sens fonctionnent en flux : l'export parcourt les tables avec
+.iterator(), l'import insère par lots avec bulk_create. Seules la table de
+correspondance des problèmes et le cache des utilisateurs restent en mémoire.
+"""
+
+import gzip
+import json
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from core.sharding import (
+    assign_ids,
+    on_project_shard,
+    sharding_enabled,
+    use_project_shard,
+)
+from issues.models import ArchivedComment, ArchivedIssue, Issue, Comment
+from users.fields import username_expression
+from users.models import CustomUser
+from .models import Project, Contributor
+
+ARCHIVE_VERSION = 1
+
+ISSUE_FIELDS = ["title", "description", "priority", "status", "tag"]
+
+
+class ProjectArchiveError(ValueError):
+    """Archive invalide ou impossible à importer."""
+
+
+def iter_project_records(project, chunk_size=None):
+    """Génère les enregistrements (dicts) de l'archive d'un projet."""
+    chunk_size = chunk_size or settings.BULK_BATCH_SIZE
+
+    yield {
+        "type": "header",
+        "version": ARCHIVE_VERSION,
+        "project": {
+            "name": project.name,
+            "description": project.description,
+            "type": project.type,
+            "author": project.author.username,
+            "created_time": project.created_time,
+        },
+    }
+
+    # Shard désigné explicitement (générateur) ; usernames lus sans jointure
+    # possible vers les utilisateurs en mode shards (users/fields.py)
+    contributors = (
+        on_project_shard(Contributor.objects.all(), project.pk)
+        .filter(project=project)
+        .order_by("id")
+        .values(
+            "role", "created_time", export_user=username_expression("user", "username")
+        )
+    )
+    for row in contributors.iterator(chunk_size=chunk_size):
+        yield {
+            "type": "contributor",
+            "user": row["export_user"],
+            "role": row["role"],
+            "created_time": row["created_time"],
+        }
+
+    for issue_model in (Issue, ArchivedIssue):
+        issues = (
+            on_project_shard(issue_model.objects.all(), project.pk)
+            .filter(project=project)
+            .order_by("id")
+            .values(
+                "id",
+                *ISSUE_FIELDS,
+                "created_time",
+                export_author=username_expression("author", "author_username"),
+                export_assignee=username_expression("assignee", "assignee_username"),
+            )
+        )
+        for row in issues.iterator(chunk_size=chunk_size):
+            yield {
+                "type": "issue",
+                "id": row["id"],
+                **{field: row[field] for field in ISSUE_FIELDS},
+                "author": row["export_author"],
+                "assignee": row["export_assignee"],
+                "created_time": row["created_time"],
+            }
+
+    # Après tous les problèmes : l'import rattache chaque commentaire à un problème déjà inséré
+    for comment_model in (Comment, ArchivedComment):
+        comments = (
+            on_project_shard(comment_model.objects.all(), project.pk)
+            .filter(issue__project=project)
+            .order_by("id")
+            .values(
+                "id",
+                "issue_id",
+                "description",
+                "created_time",
+                export_author=username_expression("author", "author_username"),
+            )
+        )
+        for row in comments.iterator(chunk_size=chunk_size):
+            yield {
+                "type": "comment",
+                "id": row["id"],
+                "issue": row["issue_id"],
+                "description": row["description"],
+                "author": row["export_author"],
+                "created_time": row["created_time"],
+            }
+
+
+def export_project(project, path):
+    """Écrit l'archive gzip du projet dans le fichier path."""
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for record in iter_project_records(project):
+            f.write(encoder.encode(record))
+            f.write("\n")
+
+
+@contextmanager
+def _keep_created_time(*models):
+    """
+    Désactive temporairement auto_now_add sur created_time pour conserver les
+    dates d'origine lors de l'import. Réservé aux commandes de gestion : la
+    modification s'applique au processus entier.
+    """
+    fields = [model._meta.get_field("created_time") for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class _UserResolver:
+    """Résout les usernames de l'archive en utilisateurs de l'instance cible."""
+
+    def __init__(self, fallback=None):
+        self.fallback = fallback
+        self.cache = {}
+
+    def __call__(self, username, required=True):
+        if username is None:
+            return None
+        if username not in self.cache:
+            # None mis en cache aussi : la règle required s'applique à chaque appel
+            self.cache[username] = CustomUser.objects.filter(username=username).first()
+        user = self.cache[username]
+        if user is None and required:
+            if self.fallback is None:
+                raise ProjectArchiveError(
+                    f"Utilisateur inconnu sur cette instance : {username}"
+                )
+            user = self.fallback
+        return user
+
+
+def import_project(path, author=None, fallback_user=None, batch_size=None):
+    """
+    Importe l'archive path et retourne le nouveau Project.
+
+    author : auteur du projet importé (par défaut celui de l'archive).
+    fallback_user : utilisateur substitué aux usernames absents de l'instance
+    (par défaut, un username inconnu fait échouer l'import).
+
+    L'import est atomique : en cas d'erreur, rien n'est conservé.
+    """
+    batch_size = batch_size or settings.BULK_BATCH_SIZE
+    resolve_user = _UserResolver(fallback=fallback_user)
+    issue_ids = {}
+
+    with gzip.open(path, "rt", encoding="utf-8") as f, transaction.atomic(), _keep_created_time(
+        Project, Contributor, Issue, Comment
+    ), ExitStack() as stack:
+        header = json.loads(f.readline() or "{}")
+        if header.get("type") != "header" or header.get("version") != ARCHIVE_VERSION:
+            raise ProjectArchiveError("En-tête d'archive absent ou version non supportée.")
+
+        data = header["project"]
+        project = Project.objects.create(
+            name=data["name"],
+            description=data["description"],
+            type=data["type"],
+            author=author or resolve_user(data["author"]),
+            created_time=parse_datetime(data["created_time"]),
+        )
+        if sharding_enabled():
+            # Données du projet dans son shard, dans une transaction de ce shard
+            # (validée juste avant celle de la base principale)
+            shard = stack.enter_context(use_project_shard(project.pk))
+            stack.enter_context(transaction.atomic(using=shard))
+
+        pending = {Contributor: [], Issue: [], Comment: []}
+        pending_issue_ids = []
+
+        def flush(model):
+            objs = pending[model]
+            if not objs:
+                return
+            # Mode shards : ids attribués avant l'insertion (core/sharding.py)
+            assign_ids(objs)
+            # ignore_conflicts : un fallback peut produire deux fois le même contributeur
+            model.objects.bulk_create(
+                objs, batch_size=batch_size, ignore_conflicts=model is Contributor
+            )
+            if model is Issue:
+                # bulk_create renseigne les nouveaux ids (SQLite >= 3.35, PostgreSQL)
+                for old_id, issue in zip(pending_issue_ids, objs):
+                    issue_ids[old_id] = issue.pk
+                pending_issue_ids.clear()
+            objs.clear()
+
+        for line in f:
+            record = json.loads(line)
+            kind = record["type"]
+            created_time = parse_datetime(record["created_time"])
+
+            if kind == "contributor":
+                if record["role"] == Contributor.ROLE_AUTHOR:
+                    user = project.author
+                else:
+                    user = resolve_user(record["user"])
+                obj = Contributor(
+                    project=project,
+                    user=user,
+                    role=record["role"],
+                    created_time=created_time,
+                )
+                model = Contributor
+            elif kind == "issue":
+                obj = Issue(
+                    project=project,
+                    author=resolve_user(record["author"]),
+                    assignee=resolve_user(record["assignee"], required=False),
+                    created_time=created_time,
+                    **{field: record[field] for field in ISSUE_FIELDS},
+                )
+                pending_issue_ids.append(record["id"])
+                model = Issue
+            elif kind == "comment":
+                # Les commentaires suivent les problèmes : ceux-ci doivent être insérés
+                flush(Issue)
+                try:
+                    issue_id = issue_ids[record["issue"]]
+                except KeyError:
+                    raise ProjectArchiveError(
+                        f"Commentaire {record['id']} rattaché à un problème absent."
+                    )
+                obj = Comment(
+                    issue_id=issue_id,
+                    author=resolve_user(record["author"]),
+                    description=record["description"],
+                    created_time=created_time,
+                )
+                model = Comment
+            else:
+                raise ProjectArchiveError(f"Type d'enregistrement inconnu : {kind}")
+
+            # bulk_create n'appelle pas save() : usernames dénormalisés à la main
+            obj.fill_usernames()
+            pending[model].append(obj)
+            if len(pending[model]) >= batch_size:
+                flush(model)
+
+        for model in (Contributor, Issue, Comment):
+            flush(model)
+
+        # L'auteur doit faire partie des contributeurs, même si l'archive l'omet
+        if not Contributor.objects.filter(project=project, user=project.author).exists():
+            Contributor.objects.create(
+                project=project, user=project.author, role=Contributor.ROLE_AUTHOR
+            )
+
+    return project
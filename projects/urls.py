@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework_nested import routers
-from .views import ProjectViewSet, ContributorViewSet
+from .views import ProjectViewSet, ContributorViewSet, BatchView
 from issues.views import IssueViewSet, CommentViewSet
 
 # Router principal pour les projets
@@ -21,6 +21,8 @@ issues_router = routers.NestedDefaultRouter(projects_router, r"issues", lookup="
 issues_router.register(r"comments", CommentViewSet, basename="issue-comments")
 
 urlpatterns = [
+    # Plusieurs requêtes sur les routes ci-dessous en un seul aller-retour
+    path("batch/", BatchView.as_view(), name="batch"),
     path("", include(router.urls)),
     path("", include(projects_router.urls)),
     path("", include(issues_router.urls)),
@@ -2,12 +2,28 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
+from rest_framework.exceptions import ValidationError
 from django.shortcuts import get_object_or_404
+from django.conf import settings
+from core.sharding import ProjectShardMixin, each_shard, joinable, sharding_enabled
+from issues.history import (
+    CONTRIBUTOR_FIELDS,
+    history_batch,
+    record_contributor,
+    snapshot,
+)
+from issues.models import HistoryEntry
+from jobs.queue import enqueue
+from .batch import check_idempotent_batch, run_batch
+from .deletion import delete_project, mark_project_deleted
+from users.fields import user_relations
 from .models import Project, Contributor
 from .serializers import (
     ProjectListSerializer,
     ProjectDetailSerializer,
     ContributorSerializer,
+    BatchSerializer,
 )
 from .permissions import (
     IsProjectAuthor,
@@ -17,7 +33,7 @@ from .permissions import (
 )
 
 
-class ProjectViewSet(viewsets.ModelViewSet):
+class ProjectViewSet(ProjectShardMixin, viewsets.ModelViewSet):
     """
     ViewSet pour gérer les projets.
 
@@ -25,7 +41,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
     - retrieve: Détail d'un projet
     - create: Crée un nouveau projet
     - update/partial_update: Modifie un projet (auteur uniquement)
-    - destroy: Supprime un projet (auteur uniquement)
+    - destroy: Supprime un projet (auteur uniquement), par lots
 
     Permissions :
     - IsAuthenticated : utilisateur authentifié requis
@@ -34,6 +50,8 @@ class ProjectViewSet(viewsets.ModelViewSet):
     """
 
     permission_classes = [IsAuthenticated, IsProjectContributor, IsProjectAuthor]
+    # Routes de détail : contributeurs lus dans le shard du projet (core/sharding.py)
+    shard_url_kwarg = "pk"
 
     def get_queryset(self):
         """
@@ -42,11 +60,34 @@ class ProjectViewSet(viewsets.ModelViewSet):
         Optimisé avec select_related et prefetch_related pour éviter les requêtes N+1.
         """
         user = self.request.user
+        if sharding_enabled():
+            # Contributions réparties entre les shards : projets choisis par id,
+            # contributeurs lus ensuite dans le shard de chaque projet
+            pk = self.kwargs.get("pk")
+            if pk is not None:
+                # Route de détail : seul le shard du projet (appartenance mémorisée,
+                # relue par IsProjectContributor)
+                project_ids = [pk] if Contributor.objects.is_member(user, pk) else []
+            else:
+                project_ids = [
+                    project_id
+                    for queryset in each_shard(Contributor.objects.filter(user=user))
+                    for project_id in queryset.values_list("project_id", flat=True)
+                ]
+            return (
+                Project.objects.alive()
+                .filter(pk__in=project_ids)
+                .select_related("author")
+            )
         # Optimisation : charge l'auteur et les contributeurs en une seule requête
         queryset = (
-            Project.objects.filter(contributors__user=user)
+            Project.objects.alive()
+            .filter(contributors__user=user)
             .select_related("author")  # Charge l'auteur en une requête
-            .prefetch_related("contributors__user")  # Charge les contributeurs
+            # Charge les contributeurs (et leurs utilisateurs, sauf usernames dénormalisés)
+            .prefetch_related(
+                "contributors", *(f"contributors__{r}" for r in user_relations("user"))
+            )
             .distinct()
         )
         return queryset
@@ -64,6 +105,23 @@ class ProjectViewSet(viewsets.ModelViewSet):
         """
         serializer.save(author=self.request.user)
 
+    def perform_destroy(self, instance):
+        """
+        Supprime le projet et ses données par lots (voir projects/deletion.py).
+        Avec BACKGROUND_PROJECT_DELETION, le projet est masqué immédiatement
+        (tombstone) et la suppression physique est confiée au worker.
+        """
+        if settings.BACKGROUND_PROJECT_DELETION:
+            mark_project_deleted(instance)
+            enqueue(
+                "projects.delete_project",
+                {"project_id": instance.pk},
+                user=self.request.user,
+                unique=True,
+            )
+        else:
+            delete_project(instance)
+
     @action(
         detail=True,
         methods=["get", "post"],
@@ -89,13 +147,29 @@ class ProjectViewSet(viewsets.ModelViewSet):
             )
 
             if serializer.is_valid():
-                serializer.save(project=project)
+                with history_batch():
+                    contributor = serializer.save(project=project)
+                    record_contributor(
+                        HistoryEntry.CONTRIBUTOR_ADDED, contributor, request.user
+                    )
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
 
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=True, methods=["post"])
+    def export(self, request, pk=None):
+        """
+        POST: Lance l'export du projet en arrière-plan (auteur uniquement).
+        L'archive se télécharge ensuite via /api/jobs/{id}/download/.
+        """
+        project = self.get_object()
+        job = enqueue(
+            "projects.export_project", {"project_id": project.pk}, user=request.user
+        )
+        return Response({"job": job.pk}, status=status.HTTP_202_ACCEPTED)
 
-class ContributorViewSet(viewsets.ModelViewSet):
+
+class ContributorViewSet(ProjectShardMixin, viewsets.ModelViewSet):
     """
     ViewSet pour gérer les contributeurs.
     Accessible via /api/projects/{project_pk}/contributors/
@@ -113,10 +187,13 @@ class ContributorViewSet(viewsets.ModelViewSet):
         Optimisé avec select_related pour charger les users.
         """
         project_pk = self.kwargs.get("project_pk")
-        return (
-            Contributor.objects.filter(project_id=project_pk)
-            .select_related("user", "project")  # Charge user et project en une requête
-        )
+        queryset = Contributor.objects.active().filter(project_id=project_pk)
+        # Charge project (et user si les usernames ne sont pas dénormalisés)
+        relations = [*joinable("project"), *user_relations("user")]
+        if relations:
+            # select_related() sans argument suivrait toutes les relations
+            queryset = queryset.select_related(*relations)
+        return queryset
 
     def perform_create(self, serializer):
         """
@@ -124,10 +201,33 @@ class ContributorViewSet(viewsets.ModelViewSet):
         Les permissions sont vérifiées par IsProjectAuthorForContributors.
         """
         project_pk = self.kwargs.get("project_pk")
-        project = get_object_or_404(Project, pk=project_pk)
+        project = get_object_or_404(Project.objects.alive(), pk=project_pk)
 
-        # Par défaut, le rôle est "contributor"
-        serializer.save(project=project, role=Contributor.ROLE_CONTRIBUTOR)
+        # Par défaut, le rôle est "contributor" ; écriture et historique dans
+        # une seule transaction
+        with history_batch():
+            contributor = serializer.save(
+                project=project, role=Contributor.ROLE_CONTRIBUTOR
+            )
+            record_contributor(
+                HistoryEntry.CONTRIBUTOR_ADDED, contributor, self.request.user
+            )
+
+    def perform_update(self, serializer):
+        """Historise le changement de rôle."""
+        before = snapshot(serializer.instance, CONTRIBUTOR_FIELDS, [])
+        with history_batch():
+            contributor = serializer.save()
+            record_contributor(
+                HistoryEntry.CONTRIBUTOR_UPDATED, contributor, self.request.user, before
+            )
+
+    def perform_destroy(self, instance):
+        with history_batch():
+            record_contributor(
+                HistoryEntry.CONTRIBUTOR_REMOVED, instance, self.request.user
+            )
+            instance.delete()
 
     def destroy(self, request, *args, **kwargs):
         """
@@ -143,4 +243,33 @@ class ContributorViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        return super().destroy(request, *args, **kwargs)
+        # Contribution déjà chargée : pas de second get_object() via super().destroy()
+        self.perform_destroy(contributor)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class BatchView(APIView):
+    """
+    Exécute plusieurs requêtes sur les projets en un seul aller-retour - POST /api/batch/
+
+    Corps : {"requests": [{"method": "GET", "path": "/api/projects/1/"}, ...],
+             "concurrent": false}
+    Réponse : {"responses": [{"status": 200, "body": {...}}, ...]}, dans l'ordre.
+    Chaque sous-requête applique ses propres permissions. Avec Idempotency-Key,
+    le lot ne peut contenir que des lectures (voir projects/batch.py).
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        error = check_idempotent_batch(request, serializer.validated_data["requests"])
+        if error:
+            raise ValidationError({"requests": error})
+        responses = run_batch(
+            request,
+            serializer.validated_data["requests"],
+            concurrent=serializer.validated_data["concurrent"],
+        )
+        return Response({"responses": responses})
@@ -1,5 +1,15 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_save, pre_delete, pre_save
 
 
 class UsersConfig(AppConfig):
     name = 'users'
+
+    def ready(self):
+        """Maintient les usernames dénormalisés lors des renommages et suppressions."""
+        from .models import CustomUser
+        from .usernames import clear_assignee_username, remember_username, username_changed
+
+        pre_save.connect(remember_username, sender=CustomUser)
+        post_save.connect(username_changed, sender=CustomUser)
+        pre_delete.connect(clear_assignee_username, sender=CustomUser)
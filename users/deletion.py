@@ -0,0 +1,174 @@
+"""
+Suppression d'un compte utilisateur (RGPD - droit à l'oubli) par lots.
+
+Un simple user.delete() laisse le collecteur de Django charger en mémoire tous
+les projets, problèmes, commentaires et contributions de l'utilisateur, puis
+tout supprimer dans une seule transaction. Pour un utilisateur très actif, cela
+consomme énormément de mémoire et bloque la base pendant toute la durée.
+
+Ici, les dépendances sont supprimées des feuilles vers la racine (commentaires,
+problèmes, contributeurs, projets), par lots bornés, avant de supprimer
+l'utilisateur lui-même. La sémantique des ForeignKey est conservée :
+- assignee (SET_NULL) : les problèmes assignés sont désassignés, pas supprimés
+- les autres relations (CASCADE) sont supprimées
+"""
+
+from core.bulk import delete_in_batches, update_in_batches
+from core.sharding import each_shard, sharding_enabled
+from issues.models import (
+    ArchivedComment,
+    ArchivedIssue,
+    HistoryEntry,
+    Issue,
+    Comment,
+)
+from notifications.models import Notification
+from projects.models import Project, Contributor
+
+
+def _project_author(user, project_field):
+    """
+    Filtre "le projet <project_field> a pour auteur user". En mode shards, les
+    projets sont dans la base principale : filtre sur leurs ids.
+    """
+    if sharding_enabled():
+        project_ids = Project.objects.filter(author=user).values_list("pk", flat=True)
+        return {f"{project_field}_id__in": list(project_ids)}
+    return {f"{project_field}__author": user}
+
+
+def user_deletion_steps(user):
+    """
+    Liste ordonnée des étapes (libellé, queryset, valeurs) de suppression.
+    valeurs vaut None pour une suppression, un dict pour une mise à jour.
+    """
+    return [
+        # Historique : ses modifications restent, anonymisées (SET_NULL) ;
+        # celui des problèmes et projets supprimés ci-dessous disparaît avec eux
+        (
+            "history.actor",
+            HistoryEntry.objects.filter(actor=user),
+            {"actor": None, "actor_username": None},
+        ),
+        (
+            "history.issue_author",
+            HistoryEntry.objects.filter(
+                action__in=HistoryEntry.ISSUE_ACTIONS,
+                object_id__in=Issue.objects.filter(author=user).values("pk"),
+            ),
+            None,
+        ),
+        (
+            "history.archived_issue_author",
+            HistoryEntry.objects.filter(
+                action__in=HistoryEntry.ISSUE_ACTIONS,
+                object_id__in=ArchivedIssue.objects.filter(author=user).values("pk"),
+            ),
+            None,
+        ),
+        (
+            "history.project_author",
+            HistoryEntry.objects.filter(**_project_author(user, "project")),
+            None,
+        ),
+        # SET_NULL : on conserve les problèmes assignés à l'utilisateur
+        (
+            "issues.assignee",
+            Issue.objects.filter(assignee=user),
+            {"assignee": None, "assignee_username": None},
+        ),
+        (
+            "archived_issues.assignee",
+            ArchivedIssue.objects.filter(assignee=user),
+            {"assignee": None, "assignee_username": None},
+        ),
+        # Archives (issues/archive.py) : mêmes règles que les tables actives
+        (
+            "archived_comments.author",
+            ArchivedComment.objects.filter(author=user),
+            None,
+        ),
+        (
+            "archived_comments.issue_author",
+            ArchivedComment.objects.filter(issue__author=user),
+            None,
+        ),
+        (
+            "archived_comments.project_author",
+            ArchivedComment.objects.filter(**_project_author(user, "issue__project")),
+            None,
+        ),
+        ("archived_issues.author", ArchivedIssue.objects.filter(author=user), None),
+        (
+            "archived_issues.project_author",
+            ArchivedIssue.objects.filter(**_project_author(user, "project")),
+            None,
+        ),
+        # Commentaires : ceux de l'utilisateur, puis ceux qui disparaîtront en cascade
+        ("comments.author", Comment.objects.filter(author=user), None),
+        ("comments.issue_author", Comment.objects.filter(issue__author=user), None),
+        (
+            "comments.project_author",
+            Comment.objects.filter(**_project_author(user, "issue__project")),
+            None,
+        ),
+        ("issues.author", Issue.objects.filter(author=user), None),
+        (
+            "issues.project_author",
+            Issue.objects.filter(**_project_author(user, "project")),
+            None,
+        ),
+        ("contributors.user", Contributor.objects.filter(user=user), None),
+        (
+            "contributors.project_author",
+            Contributor.objects.filter(**_project_author(user, "project")),
+            None,
+        ),
+        ("notifications.recipient", Notification.objects.filter(recipient=user), None),
+        (
+            "notifications.project_author",
+            Notification.objects.filter(**_project_author(user, "project")),
+            None,
+        ),
+        ("projects.author", Project.objects.filter(author=user), None),
+    ]
+
+
+def delete_user(user, batch_size=None, progress=None):
+    """
+    Supprime l'utilisateur et toutes ses données par lots de batch_size.
+
+    progress(libellé, total) est appelé après chaque lot.
+    Retourne un dict {libellé: nombre de lignes traitées}.
+    """
+    counts = {}
+    for label, step_queryset, values in user_deletion_steps(user):
+        counts[label] = 0
+        # Mode shards : chaque étape est exécutée dans tous les shards
+        for queryset in each_shard(step_queryset):
+            done = counts[label]
+            shard_progress = progress and (
+                lambda label, total, done=done: progress(label, done + total)
+            )
+            if values is None:
+                counts[label] += delete_in_batches(
+                    queryset,
+                    batch_size=batch_size,
+                    progress=shard_progress,
+                    label=label,
+                )
+            else:
+                counts[label] += update_in_batches(
+                    queryset,
+                    values,
+                    batch_size=batch_size,
+                    progress=shard_progress,
+                    label=label,
+                )
+
+    # Il ne reste que des dépendances légères (groupes, permissions, logs admin)
+    user.delete()
+    counts["users"] = 1
+    if progress:
+        progress("users", 1)
+    return counts
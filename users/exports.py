@@ -0,0 +1,169 @@
+"""
+Export des données personnelles d'un utilisateur (RGPD - droit à la portabilité).
+
+L'export est produit au format NDJSON (une ligne JSON par enregistrement) et
+streamé section par section :
+- profile : le profil de l'utilisateur
+- projects : les projets dont il est l'auteur
+- contributions : ses participations aux projets
+- issues : les problèmes dont il est l'auteur
+- assigned_issues : les problèmes qui lui sont assignés (hors ceux dont il est
+  l'auteur, déjà dans issues)
+- comments : les commentaires dont il est l'auteur
+- archived_issues, archived_assigned_issues, archived_comments : les mêmes,
+  pour les problèmes archivés
+- history : ses modifications de problèmes et de contributeurs
+
+Chaque section est parcourue par id croissant avec .iterator() : la mémoire
+reste constante quel que soit le volume. Chaque ligne porte un jeton de reprise
+("section:id") qui permet de relancer un export interrompu là où il s'est arrêté.
+"""
+
+import heapq
+from operator import itemgetter
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from core.sharding import each_shard
+
+from issues.models import (
+    ArchivedComment,
+    ArchivedIssue,
+    HistoryEntry,
+    Issue,
+    Comment,
+)
+from projects.models import Project, Contributor
+
+# Nombre de lignes lues par aller-retour avec la base
+EXPORT_CHUNK_SIZE = 2000
+
+SECTIONS = [
+    "profile",
+    "projects",
+    "contributions",
+    "issues",
+    "assigned_issues",
+    "comments",
+    "archived_issues",
+    "archived_assigned_issues",
+    "archived_comments",
+    "history",
+]
+
+ISSUE_EXPORT_FIELDS = [
+    "id",
+    "project_id",
+    "title",
+    "description",
+    "priority",
+    "status",
+    "tag",
+    "assignee_id",
+    "created_time",
+]
+COMMENT_EXPORT_FIELDS = ["id", "issue_id", "description", "created_time"]
+
+
+class InvalidResumeToken(ValueError):
+    """Jeton de reprise mal formé."""
+
+
+def parse_resume_token(token):
+    """
+    Décode un jeton de reprise "section:id".
+    Retourne (section, dernier_id) ou (None, None) si aucun jeton n'est fourni.
+    """
+    if not token:
+        return None, None
+
+    section, _, last_id = token.partition(":")
+    if section not in SECTIONS or not last_id.isdigit():
+        raise InvalidResumeToken(f"Jeton de reprise invalide : {token!r}")
+    return section, int(last_id)
+
+
+def _section_querysets(user):
+    """Requêtes (valeurs brutes, sans instanciation de modèles) de chaque section."""
+    return {
+        "profile": type(user)
+        .objects.filter(pk=user.pk)
+        .values(
+            "id",
+            "username",
+            "email",
+            "first_name",
+            "last_name",
+            "age",
+            "can_be_contacted",
+            "can_data_be_shared",
+            "date_joined",
+            "last_login",
+        ),
+        "projects": Project.objects.filter(author=user).values(
+            "id", "name", "description", "type", "created_time"
+        ),
+        "contributions": Contributor.objects.filter(user=user).values(
+            "id", "project_id", "role", "created_time"
+        ),
+        "issues": Issue.objects.filter(author=user).values(*ISSUE_EXPORT_FIELDS),
+        "assigned_issues": Issue.objects.filter(assignee=user)
+        .exclude(author=user)
+        .values(*ISSUE_EXPORT_FIELDS),
+        "comments": Comment.objects.filter(author=user).values(*COMMENT_EXPORT_FIELDS),
+        "archived_issues": ArchivedIssue.objects.filter(author=user).values(
+            *ISSUE_EXPORT_FIELDS
+        ),
+        "archived_assigned_issues": ArchivedIssue.objects.filter(assignee=user)
+        .exclude(author=user)
+        .values(*ISSUE_EXPORT_FIELDS),
+        "archived_comments": ArchivedComment.objects.filter(author=user).values(
+            *COMMENT_EXPORT_FIELDS
+        ),
+        "history": HistoryEntry.objects.filter(actor=user).values(
+            "id", "project_id", "action", "object_id", "changes", "created_time"
+        ),
+    }
+
+
+def _iter_rows(queryset, chunk_size):
+    """
+    Lignes du queryset par id croissant. En mode shards, les lignes de chaque
+    shard sont fusionnées (les ids sont uniques entre les shards).
+    """
+    querysets = each_shard(queryset)
+    if len(querysets) == 1:
+        return queryset.iterator(chunk_size=chunk_size)
+    return heapq.merge(
+        *(shard.iterator(chunk_size=chunk_size) for shard in querysets),
+        key=itemgetter("id"),
+    )
+
+
+def iter_user_export(user, resume_from=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Génère l'export NDJSON de l'utilisateur, une ligne (str terminée par \\n) par enregistrement.
+
+    resume_from : jeton "section:id" de la dernière ligne reçue ; l'export reprend
+    juste après cet enregistrement.
+    """
+    resume_section, resume_id = parse_resume_token(resume_from)
+    querysets = _section_querysets(user)
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+    started = resume_section is None
+    for section in SECTIONS:
+        queryset = querysets[section].order_by("id")
+
+        if not started:
+            if section != resume_section:
+                continue
+            started = True
+            queryset = queryset.filter(id__gt=resume_id)
+
+        for row in _iter_rows(queryset, chunk_size):
+            line = {"section": section, "resume": f"{section}:{row['id']}", "data": row}
+            yield encoder.encode(line) + "\n"
+
+    # Ligne finale : permet au client de savoir que l'export est complet
+    yield encoder.encode({"section": "end"}) + "\n"
@@ -0,0 +1,82 @@
+"""
+Affichage des usernames sans jointure (DENORMALIZED_USERNAMES dans settings.py).
+
+Issue, Comment et Contributor gardent une copie du username de leurs
+utilisateurs (UsernameCopiesMixin). Quand DENORMALIZED_USERNAMES est actif,
+les serializers lisent cette copie et les viewsets n'ont plus à joindre la
+table des utilisateurs.
+"""
+
+from django.conf import settings
+from django.db.models import F
+from rest_framework import serializers
+
+
+class UsernameCopiesMixin:
+    """
+    Modèle avec des copies de usernames (USERNAME_COPIES : relation -> colonne),
+    renseignées par fill_usernames() à chaque save().
+
+    Un utilisateur n'est relu que si sa relation a changé depuis le chargement
+    (ou depuis le dernier fill_usernames) : modifier un problème ne coûte pas
+    un SELECT par utilisateur lié. Les renommages sont propagés à part
+    (users/usernames.py).
+    """
+
+    USERNAME_COPIES = {}
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._copied_user_ids = {
+            relation: instance.__dict__.get(f"{relation}_id")
+            for relation in cls.USERNAME_COPIES
+        }
+        return instance
+
+    def fill_usernames(self):
+        """Recopie les usernames des utilisateurs liés (à appeler avant bulk_create)."""
+        copied = getattr(self, "_copied_user_ids", {})
+        for relation, copy in self.USERNAME_COPIES.items():
+            field = self._meta.get_field(relation)
+            user_id = getattr(self, field.attname)
+            if user_id is None:
+                setattr(self, copy, None)
+            # Utilisateur déjà en cache : sa lecture ne coûte pas de requête
+            elif field.is_cached(self) or copied.get(relation) != user_id:
+                setattr(self, copy, getattr(self, relation).username)
+        self._copied_user_ids = {
+            relation: getattr(self, f"{relation}_id") for relation in self.USERNAME_COPIES
+        }
+
+
+def get_username(instance, relation, copy):
+    """Username de instance.<relation>, lu dans la colonne copy si possible."""
+    if getattr(instance, f"{relation}_id") is None:
+        return None
+    if settings.DENORMALIZED_USERNAMES:
+        return getattr(instance, copy)
+    return getattr(instance, relation).username
+
+
+def username_expression(relation, copy):
+    """Expression d'annotation du username, pour les requêtes .values()."""
+    return F(copy) if settings.DENORMALIZED_USERNAMES else F(f"{relation}__username")
+
+
+def user_relations(*relations):
+    """Relations à passer à select_related pour afficher les usernames."""
+    return [] if settings.DENORMALIZED_USERNAMES else list(relations)
+
+
+class UsernameField(serializers.CharField):
+    """Username d'un utilisateur lié, en lecture seule (voir get_username)."""
+
+    def __init__(self, relation, copy, **kwargs):
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+        self.relation = relation
+        self.copy = copy
+
+    def get_attribute(self, instance):
+        return get_username(instance, self.relation, self.copy)
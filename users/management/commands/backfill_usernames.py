@@ -0,0 +1,32 @@
+"""
+Renseigne les usernames dénormalisés : python manage.py backfill_usernames
+
+À lancer une fois après la migration qui ajoute les colonnes, avant d'activer
+DENORMALIZED_USERNAMES. Sans danger à relancer : seules les copies différentes
+du username actuel sont réécrites, par lots.
+"""
+
+from django.core.management.base import BaseCommand
+
+from users.usernames import backfill_usernames
+
+
+class Command(BaseCommand):
+    help = "Recopie les usernames dans Issue, Comment et Contributor, par lots."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Nombre de lignes par lot (BULK_BATCH_SIZE par défaut).",
+        )
+
+    def handle(self, *args, **options):
+        def progress(label, total):
+            self.stdout.write(f"{label} : {total}")
+
+        counts = backfill_usernames(batch_size=options["batch_size"], progress=progress)
+        self.stdout.write(
+            self.style.SUCCESS(f"{sum(counts.values())} lignes mises à jour.")
+        )
@@ -0,0 +1,39 @@
+"""
+Commande de suppression d'un compte : python manage.py delete_user <username>
+
+Supprime l'utilisateur et toutes ses données par lots, en affichant la progression.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.deletion import delete_user
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = "Supprime un utilisateur et toutes ses données par lots."
+
+    def add_arguments(self, parser):
+        parser.add_argument("username")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Nombre de lignes par lot (BULK_BATCH_SIZE par défaut).",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = CustomUser.objects.get(username=options["username"])
+        except CustomUser.DoesNotExist:
+            raise CommandError(f"Utilisateur inconnu : {options['username']}")
+
+        def progress(label, total):
+            self.stdout.write(f"{label} : {total}")
+
+        counts = delete_user(user, batch_size=options["batch_size"], progress=progress)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Utilisateur {options['username']} supprimé ({sum(counts.values())} lignes)."
+            )
+        )
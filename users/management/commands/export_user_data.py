@@ -0,0 +1,87 @@
+"""
+Commande d'export RGPD : python manage.py export_user_data <username> -o export.ndjson
+
+Avec --resume, un fichier de sortie existant est complété à partir de sa
+dernière ligne complète au lieu d'être réécrit.
+"""
+
+import json
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.exports import iter_user_export
+from users.models import CustomUser
+
+
+def _last_resume_token(path):
+    """
+    Lit la dernière ligne complète du fichier et retourne son jeton de reprise.
+    Une éventuelle ligne tronquée (export interrompu) est supprimée du fichier.
+    """
+    with open(path, "rb+") as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        # Lit la fin du fichier par blocs jusqu'à trouver deux fins de ligne
+        block = 4096
+        data = b""
+        pos = end
+        while pos > 0 and data.count(b"\n") < 2:
+            pos = max(0, pos - block)
+            f.seek(pos)
+            data = f.read(end - pos)
+
+        if not data.endswith(b"\n"):
+            # Dernière ligne tronquée : on la retire
+            cut = data.rfind(b"\n") + 1
+            f.truncate(pos + cut)
+            data = data[:cut]
+
+        lines = data.splitlines()
+        if not lines:
+            return None
+        last = json.loads(lines[-1])
+
+    if last.get("section") == "end":
+        raise CommandError("L'export présent dans ce fichier est déjà complet.")
+    return last["resume"]
+
+
+class Command(BaseCommand):
+    help = "Exporte toutes les données d'un utilisateur au format NDJSON (RGPD)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("username")
+        parser.add_argument(
+            "-o", "--output", help="Fichier de sortie (sortie standard par défaut)."
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Reprend un export interrompu dans le fichier de sortie.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = CustomUser.objects.get(username=options["username"])
+        except CustomUser.DoesNotExist:
+            raise CommandError(f"Utilisateur inconnu : {options['username']}")
+
+        output = options["output"]
+        resume_from = None
+        mode = "w"
+        if options["resume"]:
+            if not output:
+                raise CommandError("--resume nécessite --output.")
+            if os.path.exists(output):
+                resume_from = _last_resume_token(output)
+                mode = "a"
+
+        stream = open(output, mode, encoding="utf-8") if output else sys.stdout
+        try:
+            for line in iter_user_export(user, resume_from=resume_from):
+                stream.write(line)
+        finally:
+            if output:
+                stream.close()
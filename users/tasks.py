@@ -0,0 +1,33 @@
+"""
+Tâches différées de l'application users (exécutées par run_worker).
+"""
+
+from jobs.queue import task
+from .deletion import delete_user
+from .models import CustomUser
+from .usernames import propagate_username
+
+
+@task("users.delete_account")
+def delete_account(job, user_id):
+    """Supprime un compte et toutes ses données par lots, en publiant l'avancement."""
+    user = CustomUser.objects.filter(pk=user_id).first()
+    if user is None:
+        # Déjà supprimé (tentative précédente interrompue après la fin)
+        return {"deleted": 0}
+
+    counts = delete_user(user, progress=lambda label, total: job.report_progress(**{label: total}))
+    return {"deleted": sum(counts.values())}
+
+
+@task("users.propagate_username")
+def propagate_username_in_batches(job, user_id):
+    """Recopie le username actuel d'un utilisateur dans ses lignes dénormalisées."""
+    user = CustomUser.objects.filter(pk=user_id).first()
+    if user is None:
+        return {"updated": 0}
+
+    total = propagate_username(
+        user, progress=lambda label, total: job.report_progress(**{label: total})
+    )
+    return {"updated": total}
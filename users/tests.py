@@ -1,3 +1,290 @@
-from django.test import TestCase
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import skipIf, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from issues.models import ArchivedIssue, Comment, Issue
+from jobs.models import Job
+from core.sharding import ShardingError, use_project_shard
+from core.testing import QueryBudgetTestMixin, ShardedTestMixin
+from jobs.queue import claim_next, run_job
+from projects.models import Contributor, Project
+from .deletion import delete_user
+from .models import CustomUser
+
+
+class UserDataTestCase(ShardedTestMixin, APITestCase):
+    """
+    Deux utilisateurs : alice, auteur d'un projet où bob contribue. Un problème
+    d'alice assigné à bob, un problème de bob, un commentaire de chacun, et un
+    problème archivé d'alice assigné à bob.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = CustomUser.objects.create_user("alice", password="x")
+        cls.bob = CustomUser.objects.create_user("bob", password="x")
+        cls.project = Project.objects.create(
+            name="Projet",
+            description="",
+            type=Project.TYPE_CHOICES[0][0],
+            author=cls.alice,
+        )
+        with use_project_shard(cls.project.pk):
+            Contributor.objects.create(
+                project=cls.project, user=cls.alice, role=Contributor.ROLE_AUTHOR
+            )
+            Contributor.objects.create(
+                project=cls.project, user=cls.bob, role=Contributor.ROLE_CONTRIBUTOR
+            )
+            cls.assigned = Issue.objects.create(
+                title="Assigné",
+                description="",
+                project=cls.project,
+                author=cls.alice,
+                assignee=cls.bob,
+            )
+            cls.bob_issue = Issue.objects.create(
+                title="De bob", description="", project=cls.project, author=cls.bob
+            )
+            Comment.objects.create(description="a", issue=cls.assigned, author=cls.alice)
+            Comment.objects.create(description="b", issue=cls.assigned, author=cls.bob)
+            cls.archived = ArchivedIssue.objects.create(
+                id=10_000,
+                title="Archivé",
+                description="",
+                priority="low",
+                status="finished",
+                tag="bug",
+                project=cls.project,
+                author=cls.alice,
+                assignee=cls.bob,
+                author_username="alice",
+                assignee_username="bob",
+                created_time=cls.assigned.created_time,
+            )
+
+
+class UserExportTests(UserDataTestCase):
+    url = "/api/auth/profile/export/"
+
+    def export(self, user, **params):
+        self.client.force_authenticate(user)
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        content = b"".join(response.streaming_content).decode()
+        return [json.loads(line) for line in content.splitlines()]
+
+    def sections(self, lines):
+        sections = {}
+        for line in lines:
+            if line["section"] != "end":
+                sections.setdefault(line["section"], []).append(line["data"]["id"])
+        return sections
+
+    def test_export_includes_assigned_issues(self):
+        lines = self.export(self.bob)
+        self.assertEqual(lines[-1], {"section": "end"})
+        sections = self.sections(lines)
+        self.assertEqual(sections["issues"], [self.bob_issue.pk])
+        self.assertEqual(sections["assigned_issues"], [self.assigned.pk])
+        self.assertEqual(sections["archived_assigned_issues"], [self.archived.pk])
+        self.assertEqual(len(sections["comments"]), 1)
+        self.assertNotIn("projects", sections)
+
+    def test_authored_issues_are_not_repeated(self):
+        sections = self.sections(self.export(self.alice))
+        self.assertEqual(sections["issues"], [self.assigned.pk])
+        self.assertNotIn("assigned_issues", sections)
+        self.assertEqual(sections["archived_issues"], [self.archived.pk])
+
+    def test_resume(self):
+        lines = self.export(self.bob)
+        resumed = self.export(self.bob, resume_from=lines[2]["resume"])
+        self.assertEqual(resumed, lines[3:])
+
+    def test_invalid_resume_token(self):
+        self.client.force_authenticate(self.bob)
+        response = self.client.get(self.url, {"resume_from": "inconnu:1"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_command_resumes_truncated_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = Path(directory) / "bob.ndjson"
+            call_command("export_user_data", "bob", output=str(output))
+            complete = output.read_text()
+
+            # Export interrompu au milieu de la 4e ligne
+            lines = complete.splitlines(keepends=True)
+            output.write_text("".join(lines[:3]) + lines[3][:5])
+            call_command("export_user_data", "bob", output=str(output), resume=True)
+
+            self.assertEqual(output.read_text(), complete)
+
+
+class UserDeletionTests(UserDataTestCase):
+    """Suppression par lots (users/deletion.py) : cascades et SET_NULL."""
+
+    def test_delete_contributor(self):
+        progress = []
+        counts = delete_user(
+            self.bob, batch_size=1, progress=lambda *args: progress.append(args)
+        )
+
+        self.assertFalse(CustomUser.objects.filter(username="bob").exists())
+        # SET_NULL : les problèmes assignés restent, sans assignee ni sa copie
+        self.assigned.refresh_from_db()
+        self.assertIsNone(self.assigned.assignee_id)
+        self.assertIsNone(self.assigned.assignee_username)
+        self.archived.refresh_from_db()
+        self.assertIsNone(self.archived.assignee_id)
+        # CASCADE : ses problèmes, commentaires et contributions disparaissent
+        self.assertFalse(Issue.objects.filter(pk=self.bob_issue.pk).exists())
+        self.assertEqual(
+            list(Comment.objects.values_list("author_username", flat=True)),
+            ["alice"],
+        )
+        self.assertEqual(Contributor.objects.count(), 1)
+        self.assertEqual(counts["issues.assignee"], 1)
+        self.assertEqual(counts["comments.author"], 1)
+        self.assertIn(("users", 1), progress)
+
+    def test_delete_project_author(self):
+        counts = delete_user(self.alice, batch_size=1)
+
+        # Tout ce qui dépend de son projet est supprimé, bob reste
+        self.assertEqual(counts["projects.author"], 1)
+        self.assertEqual(counts["comments.issue_author"], 1)
+        self.assertEqual(counts["issues.project_author"], 1)
+        self.assertFalse(Project.objects.exists())
+        self.assertFalse(Issue.objects.exists())
+        self.assertFalse(ArchivedIssue.objects.exists())
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(Contributor.objects.exists())
+        self.assertEqual(
+            list(CustomUser.objects.values_list("username", flat=True)), ["bob"]
+        )
+
+    def test_delete_endpoint(self):
+        self.client.force_authenticate(self.bob)
+        response = self.client.delete("/api/auth/profile/delete/")
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(CustomUser.objects.filter(username="bob").exists())
+
+    def test_background_delete_endpoint(self):
+        self.client.force_authenticate(self.bob)
+        response = self.client.delete("/api/auth/profile/delete/?background=1")
+        self.assertEqual(response.status_code, 202)
+
+        job = claim_next("test")
+        self.assertEqual((job.pk, job.user_id), (response.data["job"], self.bob.pk))
+        run_job(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_SUCCEEDED)
+        self.assertFalse(CustomUser.objects.filter(username="bob").exists())
+
+
+class UserQueryCountTests(QueryBudgetTestMixin, UserDataTestCase):
+    def test_profile_with_jwt(self):
+        response = self.client.post(
+            "/api/token/", {"username": "bob", "password": "x"}, format="json"
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        # utilisateur du jeton, rien d'autre
+        with self.assertMaxQueries(1):
+            self.assertEqual(self.client.get("/api/auth/profile/").status_code, 200)
+
+    def test_register(self):
+        data = {"username": "carol", "password": "Motdepasse123!", "age": 20}
+        # unicité du username, INSERT
+        with self.assertMaxQueries(2):
+            response = self.client.post("/api/auth/register/", data, format="json")
+        self.assertEqual(response.status_code, 201, response.data)
+
+
+class UsernameCopyTests(UserDataTestCase):
+    """Usernames dénormalisés : renommage par le worker, suppression, rattrapage."""
+
+    def copies(self):
+        return {
+            "assignee": Issue.objects.get(pk=self.assigned.pk).assignee_username,
+            "author": Issue.objects.get(pk=self.bob_issue.pk).author_username,
+            "comment": Comment.objects.get(author=self.bob).author_username,
+            "contributor": Contributor.objects.get(user=self.bob).username,
+            "archived": ArchivedIssue.objects.get(pk=self.archived.pk).assignee_username,
+        }
+
+    def rename(self, username):
+        self.bob.username = username
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bob.save()
+
+    def test_rename_is_propagated_by_the_worker(self):
+        self.rename("robert")
+        self.rename("roberto")
+        # Rien de réécrit pendant la requête, une seule tâche pour deux renommages
+        self.assertEqual(set(self.copies().values()), {"bob"})
+        self.assertEqual(Job.objects.filter(name="users.propagate_username").count(), 1)
+
+        job = claim_next("test")
+        run_job(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_SUCCEEDED)
+        self.assertEqual(job.result, {"updated": 5})
+        self.assertEqual(set(self.copies().values()), {"roberto"})
+
+    def test_other_updates_do_not_enqueue(self):
+        self.bob.email = "bob@example.com"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bob.save()
+        self.assertFalse(Job.objects.exists())
+
+    def test_save_reads_changed_users_only(self):
+        issue = Issue.objects.get(pk=self.assigned.pk)
+        issue.title = "Modifié"
+        # Utilisateurs inchangés depuis le chargement : pas de SELECT
+        with CaptureQueriesContext(connection) as queries:
+            issue.save()
+        self.assertFalse(
+            [q for q in queries if 'FROM "users_customuser"' in q["sql"]]
+        )
+
+        issue.assignee_id = self.alice.pk
+        issue.save()
+        issue = Issue.objects.get(pk=self.assigned.pk)
+        self.assertEqual((issue.author_username, issue.assignee_username), ("alice", "alice"))
+        issue.assignee = None
+        issue.save()
+        self.assertIsNone(Issue.objects.get(pk=self.assigned.pk).assignee_username)
+
+    def test_delete_clears_assignee_username(self):
+        self.bob.delete()
+        self.assertIsNone(Issue.objects.get(pk=self.assigned.pk).assignee_username)
+        self.assertIsNone(
+            ArchivedIssue.objects.get(pk=self.archived.pk).assignee_username
+        )
+
+    @skipIf(settings.DATABASE_SHARDS, "comparaison par jointure, hors mode shards")
+    def test_backfill_usernames(self):
+        Issue.objects.update(author_username="", assignee_username=None)
+        Contributor.objects.update(username="ancien")
+        ArchivedIssue.objects.update(assignee_username="ancien")
+
+        call_command("backfill_usernames", batch_size=1, stdout=StringIO())
+
+        self.assertEqual(set(self.copies().values()), {"bob"})
+        self.assertEqual(
+            Issue.objects.get(pk=self.assigned.pk).author_username, "alice"
+        )
+
+    @skipUnless(settings.DATABASE_SHARDS, "mode shards")
+    def test_backfill_refuses_shards(self):
+        with self.assertRaises(ShardingError):
+            call_command("backfill_usernames", stdout=StringIO())
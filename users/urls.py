@@ -1,8 +1,9 @@
 from django.urls import path
-from .views import RegisterView, UserProfileView, UserDeleteView
+from .views import RegisterView, UserProfileView, UserDeleteView, UserExportView
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('profile/', UserProfileView.as_view(), name='profile'),
     path('profile/delete/', UserDeleteView.as_view(), name='profile-delete'),
+    path('profile/export/', UserExportView.as_view(), name='profile-export'),
 ]
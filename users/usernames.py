@@ -0,0 +1,145 @@
+"""
+Cohérence des usernames dénormalisés (Issue, Comment, Contributor, les
+archives ArchivedIssue, ArchivedComment et l'historique HistoryEntry).
+
+Les copies sont renseignées à l'enregistrement (save() des modèles). Ce module
+les corrige quand l'utilisateur change : renommage (propagate_username, confié
+au worker à la validation de la transaction : la requête qui renomme ne
+réécrit pas toutes les lignes de l'utilisateur) ou suppression (les problèmes
+assignés perdent leur assignee_username). Les signaux sont connectés dans
+UsersConfig.ready().
+"""
+
+from django.db import transaction
+from django.db.models import F, OuterRef, Q, Subquery
+
+from core.bulk import update_in_batches
+from core.sharding import ShardingError, each_shard, sharding_enabled
+from issues.models import (
+    ArchivedComment,
+    ArchivedIssue,
+    HistoryEntry,
+    Issue,
+    Comment,
+)
+from jobs.queue import enqueue
+from projects.models import Contributor
+from .models import CustomUser
+
+
+def username_copies():
+    """Liste des (modèle, relation vers l'utilisateur, colonne copiée)."""
+    return [
+        (Issue, "author", "author_username"),
+        (Issue, "assignee", "assignee_username"),
+        (Comment, "author", "author_username"),
+        (Contributor, "user", "username"),
+        (ArchivedIssue, "author", "author_username"),
+        (ArchivedIssue, "assignee", "assignee_username"),
+        (ArchivedComment, "author", "author_username"),
+        (HistoryEntry, "actor", "actor_username"),
+    ]
+
+
+def propagate_username(user, batch_size=None, progress=None):
+    """
+    Recopie le username actuel de user dans toutes ses lignes, par lots.
+    progress(libellé, total) est appelé après chaque lot. Retourne le nombre
+    de lignes modifiées.
+    """
+    total = 0
+    for model, relation, copy in username_copies():
+        label = f"{model._meta.label}.{copy}"
+        queryset = model.objects.filter(**{relation: user}).exclude(
+            **{copy: user.username}
+        )
+        for shard_queryset in each_shard(queryset):
+            total += update_in_batches(
+                shard_queryset,
+                {copy: user.username},
+                batch_size=batch_size,
+                progress=progress,
+                label=label,
+            )
+    return total
+
+
+def backfill_usernames(batch_size=None, progress=None):
+    """
+    Corrige toutes les copies différentes du username actuel (lignes
+    antérieures à la dénormalisation, écritures faites hors de save()).
+    Retourne {libellé: nombre de lignes corrigées}.
+
+    Compare chaque copie au username par jointure : à exécuter avant
+    d'activer les shards (core/sharding.py).
+    """
+    if sharding_enabled():
+        raise ShardingError("backfill_usernames ne fonctionne pas en mode shards.")
+    counts = {}
+    for model, relation, copy in username_copies():
+        label = f"{model._meta.label}.{copy}"
+        username = Subquery(
+            CustomUser.objects.filter(pk=OuterRef(f"{relation}_id")).values("username")[
+                :1
+            ]
+        )
+        stale = model.objects.filter(
+            Q(**{f"{relation}__isnull": False})
+            & ~Q(**{copy: F(f"{relation}__username")})
+            | Q(**{f"{relation}__isnull": False, f"{copy}__isnull": True})
+        )
+        counts[label] = update_in_batches(
+            stale,
+            {copy: username},
+            batch_size=batch_size,
+            progress=progress,
+            label=label,
+        )
+    # Copies d'un assignee retiré hors de save() (ex. suppression de l'utilisateur)
+    for model in (Issue, ArchivedIssue):
+        counts[f"{model._meta.label}.assignee_username (vide)"] = update_in_batches(
+            model.objects.filter(assignee__isnull=True, assignee_username__isnull=False),
+            {"assignee_username": None},
+            batch_size=batch_size,
+            progress=progress,
+        )
+    return counts
+
+
+def remember_username(sender, instance, update_fields=None, **kwargs):
+    """pre_save : mémorise l'ancien username pour détecter un renommage."""
+    instance._previous_username = None
+    if instance.pk is None or (update_fields and "username" not in update_fields):
+        return
+    instance._previous_username = (
+        CustomUser.objects.filter(pk=instance.pk)
+        .values_list("username", flat=True)
+        .first()
+    )
+
+
+def username_changed(sender, instance, created, **kwargs):
+    """post_save : programme la propagation d'un renommage (tâche users.propagate_username)."""
+    previous = getattr(instance, "_previous_username", None)
+    if not created and previous is not None and previous != instance.username:
+        # unique : des renommages rapprochés ne donnent qu'une propagation,
+        # qui relit le username au moment de s'exécuter
+        transaction.on_commit(
+            lambda: enqueue(
+                "users.propagate_username", {"user_id": instance.pk}, unique=True
+            ),
+            using=instance._state.db,
+        )
+
+
+def clear_assignee_username(sender, instance, **kwargs):
+    """pre_delete : assignee passe à NULL (SET_NULL), sa copie aussi."""
+    for model in (Issue, ArchivedIssue):
+        if sharding_enabled():
+            # Le SET_NULL du collecteur ne s'applique qu'à la base principale
+            for queryset in each_shard(model.objects.filter(assignee=instance)):
+                queryset.update(assignee=None, assignee_username=None)
+            continue
+        model.objects.filter(
+            assignee=instance, assignee_username__isnull=False
+        ).update(assignee_username=None)
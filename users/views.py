@@ -1,4 +1,12 @@
-from rest_framework import generics, permissions
+from django.http import StreamingHttpResponse
+from rest_framework import generics, permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.views import TokenObtainPairView
+from core.throttling import LoginIPRateThrottle, LoginRateThrottle
+from jobs.queue import enqueue
+from .deletion import delete_user
+from .exports import InvalidResumeToken, iter_user_export, parse_resume_token
 from .models import CustomUser
 from .serializers import UserSerializer
 
@@ -11,6 +19,12 @@ class RegisterView(generics.CreateAPIView):
     permission_classes = [permissions.AllowAny]
 
 
+class LoginView(TokenObtainPairView):
+    """Connexion (obtention des jetons JWT) - POST /api/token/, limitée par IP et par IP et username."""
+
+    throttle_classes = [LoginIPRateThrottle, LoginRateThrottle]
+
+
 class UserProfileView(generics.RetrieveAPIView):
     """Récupérer son propre profil - GET /api/auth/profile/"""
 
@@ -23,7 +37,12 @@ class UserProfileView(generics.RetrieveAPIView):
 
 
 class UserDeleteView(generics.DestroyAPIView):
-    """Supprimer son propre compte - DELETE /api/auth/profile/"""
+    """
+    Supprimer son propre compte - DELETE /api/auth/profile/
+
+    Avec ?background=1, le compte est désactivé immédiatement et la suppression
+    des données est confiée au worker : la réponse 202 contient l'id de la tâche.
+    """
 
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -31,3 +50,47 @@ class UserDeleteView(generics.DestroyAPIView):
     def get_object(self):
         """Retourne toujours l'utilisateur authentifié."""
         return self.request.user
+
+    def destroy(self, request, *args, **kwargs):
+        if request.query_params.get("background") not in ("1", "true"):
+            return super().destroy(request, *args, **kwargs)
+
+        user = self.get_object()
+        # Désactivé : le JWT n'est plus accepté pendant la suppression
+        user.is_active = False
+        user.save(update_fields=["is_active"])
+        job = enqueue(
+            "users.delete_account", {"user_id": user.pk}, user=user, unique=True
+        )
+        return Response({"job": job.pk}, status=status.HTTP_202_ACCEPTED)
+
+    def perform_destroy(self, instance):
+        """Supprime le compte et ses données par lots (voir users/deletion.py)."""
+        delete_user(instance)
+
+
+class UserExportView(APIView):
+    """
+    Exporter ses données personnelles (RGPD) - GET /api/auth/profile/export/
+
+    La réponse est streamée au format NDJSON. Pour reprendre un export interrompu,
+    passer la valeur "resume" de la dernière ligne reçue : ?resume_from=issues:1234
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        resume_from = request.query_params.get("resume_from")
+        try:
+            parse_resume_token(resume_from)
+        except InvalidResumeToken as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = StreamingHttpResponse(
+            iter_user_export(request.user, resume_from=resume_from),
+            content_type="application/x-ndjson",
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="softdesk-export-{request.user.pk}.ndjson"'
+        )
+        return response